@@ -0,0 +1,170 @@
+# app/admission_utils.py
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+
+from .metrics_utils import registry
+from .stream_utils import LatencyTracker
+
+SUMMARIZE_MAX_CONCURRENT = int(os.getenv("SUMMARIZE_MAX_CONCURRENT", "2"))  # Summaries generated at once
+SUMMARIZE_MAX_QUEUED = int(os.getenv("SUMMARIZE_MAX_QUEUED", "4"))          # Summaries allowed to wait for a slot
+SUMMARIZE_QUEUE_TIMEOUT = float(os.getenv("SUMMARIZE_QUEUE_TIMEOUT", "10"))  # Seconds a summary may wait
+SUMMARIZE_DEADLINE = float(os.getenv("SUMMARIZE_DEADLINE", "120"))  # Default time_budget; later chunks go extractive
+SUMMARIZE_DEGRADE = os.getenv("SUMMARIZE_DEGRADE", "true").lower() == "true"  # Minimal summarizer when overloaded
+SUMMARIZE_FALLBACK_RESERVE = float(os.getenv("SUMMARIZE_FALLBACK_RESERVE", "1"))  # Deadline seconds kept for it
+MINIMAL_MAX_CONCURRENT = int(os.getenv("MINIMAL_MAX_CONCURRENT", "4"))  # Rule-based summaries run at once
+MINIMAL_MAX_QUEUED = int(os.getenv("MINIMAL_MAX_QUEUED", "16"))
+SEARCH_MAX_CONCURRENT = int(os.getenv("SEARCH_MAX_CONCURRENT", "16"))  # Searches in flight at once
+SEARCH_MAX_QUEUED = int(os.getenv("SEARCH_MAX_QUEUED", "64"))
+SEARCH_QUEUE_TIMEOUT = float(os.getenv("SEARCH_QUEUE_TIMEOUT", "5"))
+
+ADMISSION_SHED = registry.counter(
+    "papermind_admission_shed_total", "Requests turned away by admission control", ("endpoint", "reason"))
+ADMISSION_DEGRADED = registry.counter(
+    "papermind_admission_degraded_total", "Requests answered by a cheaper fallback under overload", ("endpoint",))
+
+
+class ShedError(Exception):
+    """Raised when an endpoint cannot take a request: 429 when its queue is full, 503 when the request
+    waited too long for a slot"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class EndpointLimiter:
+    """Runs at most max_concurrent requests of one endpoint; up to max_queued more wait (first come,
+    first served) for at most queue_timeout seconds, anything beyond that is shed at once.
+
+    run() executes blocking work on the limiter's own threads, so model calls never hold up the
+    event loop or the thread pool that serves /health and the other sync endpoints.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queued: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = Counter()  # reason -> requests
+        self.degraded = 0
+        self.queue_wait = LatencyTracker()
+        self._semaphore = None  # Created on first use, inside the event loop
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix=name)
+
+    @property
+    def saturated(self) -> bool:
+        """Every slot is taken or promised to a waiting request, so a new request would have to queue"""
+        return self.in_flight + self.queued >= self.max_concurrent
+
+    def _shed(self, reason: str, message: str, status_code: int) -> ShedError:
+        self.shed[reason] += 1
+        ADMISSION_SHED.inc(endpoint=self.name, reason=reason)
+        return ShedError(message, status_code, retry_after=max(1, round(self.queue_timeout)))
+
+    def ensure_capacity(self):
+        """Raise ShedError (429) if a request could not even queue right now"""
+        # queued counts requests from the moment they start waiting, so a burst arriving before any
+        # of them holds its slot is still counted in full
+        if self.in_flight + self.queued >= self.max_concurrent + self.max_queued:
+            raise self._shed("queue_full", f"{self.name} is at capacity ({self.in_flight} running, "
+                                            f"{self.queued} queued), retry later", 429)
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """Wait for a slot for at most min(timeout, queue_timeout) seconds; raises ShedError"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.ensure_capacity()
+        started = time.perf_counter()
+        if not self._semaphore.locked():
+            # A free slot (with nobody waiting for it) is taken at once, whatever the timeout:
+            # wait_for(..., 0) would time out even then
+            await self._semaphore.acquire()
+        else:
+            wait = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), max(wait, 0.0))
+            except asyncio.TimeoutError:
+                reason = "deadline" if timeout is not None and timeout <= self.queue_timeout else "queue_timeout"
+                raise self._shed(reason, f"{self.name} request waited {wait:.1f}s without a free slot", 503)
+            finally:
+                self.queued -= 1
+        self.in_flight += 1
+        self.admitted += 1
+        self.queue_wait.record((time.perf_counter() - started) * 1000)
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        await self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) on this endpoint's threads (call while holding a slot)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def record_degraded(self):
+        self.degraded += 1
+        ADMISSION_DEGRADED.inc(endpoint=self.name)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "queue_timeout_s": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "degraded": self.degraded,
+            "queue_wait": self.queue_wait.stats(),
+        }
+
+
+_limiters: Dict[str, EndpointLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, max_concurrent: int, max_queued: int, queue_timeout: float) -> EndpointLimiter:
+    """Shared limiter per endpoint name"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = EndpointLimiter(name, max_concurrent, max_queued, queue_timeout)
+        return _limiters[name]
+
+
+def get_admission_stats() -> dict:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+def _gauge_values(attribute: str) -> Callable[[], dict]:
+    def values() -> dict:
+        with _limiters_lock:
+            return {(limiter.name,): getattr(limiter, attribute) for limiter in _limiters.values()}
+    return values
+
+
+registry.gauge("papermind_admission_in_flight", "Requests holding an endpoint slot", ("endpoint",),
+               callback=_gauge_values("in_flight"))
+registry.gauge("papermind_admission_queued", "Requests waiting for an endpoint slot", ("endpoint",),
+               callback=_gauge_values("queued"))
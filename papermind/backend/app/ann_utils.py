@@ -0,0 +1,168 @@
+# app/ann_utils.py
+import os
+import numpy as np
+from typing import List, Tuple
+
+SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "exact")  # exact or ivf
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))       # Higher = better recall, slower queries
+ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "20000"))  # Below this, exact search is faster
+
+
+def exact_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without a full sort"""
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def recall_at_k(approx_ids: List[np.ndarray], exact_ids: List[np.ndarray]) -> float:
+    """Fraction of the exact top-k neighbours that the approximate search also returned"""
+    hits, total = 0, 0
+    for approx, exact in zip(approx_ids, exact_ids):
+        hits += len(np.intersect1d(approx, exact))
+        total += len(exact)
+    return hits / total if total else 1.0
+
+
+class ExactEngine:
+    """Brute-force inner-product search over normalized vectors"""
+
+    name = "exact"
+
+    def __init__(self, **kwargs):
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def build(self, vectors: np.ndarray):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def add(self, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.vectors = vectors.copy() if len(self) == 0 else np.vstack([self.vectors, vectors])
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.vectors @ query
+        ids = exact_top_k(scores, top_k)
+        return ids, scores[ids]
+
+
+class IVFEngine:
+    """Inverted-file index: spherical k-means coarse quantizer, exact scoring inside probed lists"""
+
+    name = "ivf"
+
+    def __init__(self, nlist: int = None, nprobe: int = IVF_NPROBE, iterations: int = 10,
+                 sample_size: int = 50000, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.sample_size = sample_size
+        self.seed = seed
+        self.centroids = None
+        self.lists: List[np.ndarray] = []       # Global row ids per list
+        self.list_vectors: List[np.ndarray] = []  # Vectors per list, same order as self.lists
+        self.trained_size = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _train(self, vectors: np.ndarray):
+        rng = np.random.default_rng(self.seed)
+        nlist = self.nlist or max(1, int(np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+
+        sample = vectors
+        if len(vectors) > self.sample_size:
+            sample = vectors[rng.choice(len(vectors), self.sample_size, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            # Re-seed empty clusters from random points so every list stays useful
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+        self.centroids = centroids
+
+    def _assign(self, vectors: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[i:i + batch_size] @ self.centroids.T, axis=1)
+            for i in range(0, len(vectors), batch_size)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    def build(self, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._count = 0
+        if len(vectors) == 0:
+            self.centroids, self.lists, self.list_vectors, self.trained_size = None, [], [], 0
+            return
+        self._train(vectors)
+        self.trained_size = len(vectors)
+        self.lists = [np.zeros(0, dtype=np.int64) for _ in range(len(self.centroids))]
+        self.list_vectors = [np.zeros((0, vectors.shape[1]), dtype=np.float32)
+                             for _ in range(len(self.centroids))]
+        self.add(vectors)
+
+    def add(self, vectors: np.ndarray):
+        """Assign new vectors to existing lists; retrain once the index has doubled"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.centroids is None:
+            self.build(vectors)
+            return
+        if self._count + len(vectors) > 2 * self.trained_size:
+            self.build(np.vstack([self._all_vectors(), vectors]))
+            return
+
+        ids = np.arange(self._count, self._count + len(vectors))
+        assign = self._assign(vectors)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+        for c in range(len(self.centroids)):
+            sel = order[bounds[c]:bounds[c + 1]]
+            if len(sel):
+                self.lists[c] = np.concatenate([self.lists[c], ids[sel]])
+                self.list_vectors[c] = np.vstack([self.list_vectors[c], vectors[sel]])
+        self._count += len(vectors)
+
+    def _all_vectors(self) -> np.ndarray:
+        out = np.zeros((self._count, self.centroids.shape[1]), dtype=np.float32)
+        for ids, vecs in zip(self.lists, self.list_vectors):
+            out[ids] = vecs
+        return out
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.centroids is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        nprobe = min(self.nprobe, len(self.centroids))
+        probe = exact_top_k(self.centroids @ query, nprobe)
+        ids = np.concatenate([self.lists[c] for c in probe])
+        if len(ids) == 0:
+            return ids, np.zeros(0, dtype=np.float32)
+        scores = np.concatenate([self.list_vectors[c] @ query for c in probe])
+        top = exact_top_k(scores, top_k)
+        return ids[top], scores[top]
+
+
+ENGINES = {
+    "exact": ExactEngine,
+    "ivf": IVFEngine,
+}
+
+
+def create_engine(name: str = SEARCH_ENGINE, **kwargs):
+    """Instantiate a search engine by name"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown search engine '{name}', expected one of {list(ENGINES)}")
+    return ENGINES[name](**kwargs)
@@ -0,0 +1,241 @@
+# app/cache_utils.py
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+
+CACHE_DIR = os.getenv(
+    "CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache_data")
+)
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "256"))               # Whole-document summaries
+SUMMARY_CHUNK_CACHE_SIZE = int(os.getenv("SUMMARY_CHUNK_CACHE_SIZE", "4096"))   # Per-chunk summaries
+SUMMARY_CACHE_DISK = os.getenv("SUMMARY_CACHE_DISK", "false").lower() == "true"  # Also keep them on disk
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def summary_key(*parts) -> str:
+    """Content address of a summary from everything that influences it"""
+    return sha256_hex("\0".join(str(part) for part in parts).encode("utf-8"))
+
+
+def chunk_key(text: str, model_name: str, backend: str) -> str:
+    """Content address of one chunk's embedding under a given model and embedding backend
+    (fp32 and int8 vectors of the same model differ, and must not end up in one index)"""
+    return sha256_hex(f"{model_name}\0{backend}\0".encode("utf-8") + text.encode("utf-8"))
+
+
+class DiskCache:
+    """Content-addressed files on local disk with size-bounded least-recently-used eviction"""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = {}  # path -> size in bytes
+        self._total = 0
+        self._stats = {}  # namespace -> {"hits", "misses"}
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    os.remove(path)  # Interrupted write
+                else:
+                    self._sizes[path] = os.path.getsize(path)
+                    self._total += self._sizes[path]
+
+    def _path(self, namespace: str, key: str) -> str:
+        return os.path.join(self.directory, namespace, key[:2], key)
+
+    def _count(self, namespace: str, hit: bool):
+        stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        path = self._path(namespace, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Mark as recently used for eviction
+        except FileNotFoundError:
+            data = None
+        with self._lock:
+            self._count(namespace, data is not None)
+        return data
+
+    def put(self, namespace: str, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total += len(data) - self._sizes.get(path, 0)
+            self._sizes[path] = len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of its budget"""
+        def mtime(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0.0
+
+        for path in sorted(self._sizes, key=mtime):
+            if self._total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._total -= self._sizes.pop(path)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for path in list(self._sizes):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._sizes.clear()
+            self._total = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            namespaces = {}
+            for name, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                namespaces[name] = dict(counts, hit_rate=counts["hits"] / lookups if lookups else 0.0)
+            return {
+                "entries": len(self._sizes),
+                "size_bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "namespaces": namespaces,
+            }
+
+
+class IngestionCache:
+    """Skip re-extracting identical PDFs and re-embedding identical chunks"""
+
+    def __init__(self, disk: DiskCache = None):
+        self.disk = disk or DiskCache()
+
+    def get_document(self, digest: str) -> Optional[dict]:
+        data = self.disk.get("documents", digest)
+        return json.loads(data) if data is not None else None
+
+    def put_document(self, digest: str, pdf_id, chunks: List[str], pages: List[int]):
+        entry = {"pdf_id": pdf_id, "chunks": chunks, "pages": pages}
+        self.disk.put("documents", digest, json.dumps(entry).encode("utf-8"))
+
+    def get_embeddings(self, chunks: List[str], model_name: str, backend: str) -> List[Optional[np.ndarray]]:
+        results = []
+        for chunk in chunks:
+            data = self.disk.get("embeddings", chunk_key(chunk, model_name, backend))
+            results.append(np.frombuffer(data, dtype=np.float32) if data is not None else None)
+        return results
+
+    def put_embeddings(self, chunks: List[str], embeddings: np.ndarray, model_name: str, backend: str):
+        for chunk, vector in zip(chunks, np.asarray(embeddings, dtype=np.float32)):
+            self.disk.put("embeddings", chunk_key(chunk, model_name, backend), vector.tobytes())
+
+    def stats(self) -> dict:
+        return self.disk.stats()
+
+
+class SummaryCache:
+    """In-process LRU of summaries with an optional on-disk tier shared with the ingestion cache"""
+
+    def __init__(self, namespace: str, max_entries: int, disk: Optional[DiskCache] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return summary
+        data = self.disk.get(self.namespace, key) if self.disk is not None else None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        summary = data.decode("utf-8")
+        self._remember(key, summary)
+        return summary
+
+    def put(self, key: str, summary: str):
+        self._remember(key, summary)
+        if self.disk is not None:
+            self.disk.put(self.namespace, key, summary.encode("utf-8"))
+
+    def _remember(self, key: str, summary: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_tier": self.disk is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+_ingestion_cache = None  # Lazy-loaded cache
+_summary_caches = None
+
+
+def get_ingestion_cache() -> IngestionCache:
+    """Open the on-disk ingestion cache once"""
+    global _ingestion_cache
+    if _ingestion_cache is None:
+        _ingestion_cache = IngestionCache()
+    return _ingestion_cache
+
+
+def get_summary_caches() -> tuple:
+    """(document summaries, chunk summaries) caches, created once"""
+    global _summary_caches
+    if _summary_caches is None:
+        disk = get_ingestion_cache().disk if SUMMARY_CACHE_DISK else None
+        _summary_caches = (
+            SummaryCache("summaries", SUMMARY_CACHE_SIZE, disk),
+            SummaryCache("chunk_summaries", SUMMARY_CHUNK_CACHE_SIZE, disk),
+        )
+    return _summary_caches
@@ -0,0 +1,180 @@
+# app/chunk_utils.py
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+EMBED_CHUNK_TOKENS = int(os.getenv("EMBED_CHUNK_TOKENS", "120"))    # MiniLM truncates inputs at 128 tokens
+EMBED_CHUNK_OVERLAP = int(os.getenv("EMBED_CHUNK_OVERLAP", "16"))   # Tokens repeated from the previous chunk
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "250"))  # About the old 1000-character chunks
+SUMMARY_CHUNK_OVERLAP = int(os.getenv("SUMMARY_CHUNK_OVERLAP", "0"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "200000"))     # Cached sentence token counts
+
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+APPROX_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+SPECIAL_TOKENS_RESERVE = 2  # Room for the BOS/EOS (or CLS/SEP) tokens the model adds
+CHARS_PER_TOKEN = 4  # English prose in BPE/SentencePiece tokens, for sizes still given in characters
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_PATTERN.split(text) if s.strip()]
+
+
+def chars_to_tokens(chars: int) -> int:
+    """Token budget for a chunk size given in characters (the unit chunk_length used to have)"""
+    return max(1, math.ceil(chars / CHARS_PER_TOKEN))
+
+
+class TokenCounter:
+    """Token counts for one tokenizer, cached per sentence so repeated text is tokenized once"""
+
+    def __init__(self, name: str, tokenizer=None, cache_size: int = TOKEN_CACHE_SIZE):
+        self.name = name
+        self.tokenizer = tokenizer  # Hugging Face tokenizer, or None to approximate
+        self.failed = False  # The tokenizer raised once; keep approximating
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    @property
+    def model_max_tokens(self) -> Optional[int]:
+        limit = getattr(self.tokenizer, "model_max_length", None)
+        return limit if isinstance(limit, int) and 0 < limit < 1_000_000 else None
+
+    def _tokenize(self, texts: List[str]) -> List[int]:
+        if self.tokenizer is not None:
+            try:
+                ids = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+                return [len(i) for i in ids]
+            except Exception as e:
+                print(f"Tokenizer {self.name} failed, approximating token counts: {e}")
+                self.tokenizer, self.failed = None, True
+        # Subword tokenizers split rare words further, so pad the word/punctuation count
+        return [math.ceil(len(APPROX_TOKEN_PATTERN.findall(t)) * 1.3) for t in texts]
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        counts, missing = [None] * len(texts), []
+        with self._lock:
+            for i, text in enumerate(texts):
+                count = self._cache.get(text)
+                if count is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(text)
+                    counts[i] = count
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            fresh = self._tokenize([texts[i] for i in missing])  # One batched call for all new text
+            with self._lock:
+                for i, count in zip(missing, fresh):
+                    counts[i] = count
+                    if self.cache_size > 0:
+                        self._cache[texts[i]] = count
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return counts
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "tokenizer": self.name,
+                "exact": self.exact,
+                "cached": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _split_long(sentence: str, tokens: int, budget: int) -> List[Tuple[str, int]]:
+    """Cut a sentence longer than the budget into word windows of roughly budget tokens"""
+    words = sentence.split()
+    per_piece = max(1, int(len(words) * budget / tokens))
+    pieces = [" ".join(words[i:i + per_piece]) for i in range(0, len(words), per_piece)]
+    return [(piece, min(budget, math.ceil(tokens * len(piece.split()) / len(words)))) for piece in pieces]
+
+
+def iter_token_chunks(texts: Iterable[str], counter: TokenCounter, max_tokens: int,
+                      overlap_tokens: int = 0, min_words: int = 0) -> Iterator[str]:
+    """Pack sentences into chunks of at most max_tokens, streaming over texts as they arrive.
+
+    overlap_tokens of trailing whole sentences are repeated at the start of the next chunk.
+    """
+    budget = max(1, max_tokens)
+    overlap_tokens = min(overlap_tokens, budget // 2)
+    current: List[Tuple[str, int]] = []
+    size = 0
+
+    def emit():
+        chunk = " ".join(sentence for sentence, _ in current)
+        return chunk if len(chunk.split()) >= min_words else None
+
+    for text in texts:
+        sentences = split_sentences(text)
+        for sentence, tokens in zip(sentences, counter.count_many(sentences)):
+            pieces = _split_long(sentence, tokens, budget) if tokens > budget else [(sentence, tokens)]
+            for piece, piece_tokens in pieces:
+                if current and size + piece_tokens > budget:
+                    chunk = emit()
+                    if chunk:
+                        yield chunk
+                    # Carry trailing sentences over as overlap, if they leave room for the new one
+                    carried, carried_size = [], 0
+                    for item in reversed(current):
+                        if carried_size + item[1] > overlap_tokens or carried_size + item[1] + piece_tokens > budget:
+                            break
+                        carried.insert(0, item)
+                        carried_size += item[1]
+                    current, size = carried, carried_size
+                current.append((piece, piece_tokens))
+                size += piece_tokens
+    if current:
+        chunk = emit()
+        if chunk:
+            yield chunk
+
+
+_counters = {}  # tokenizer name -> TokenCounter
+_counters_lock = threading.Lock()
+
+
+def get_token_counter(name: str, tokenizer=None) -> TokenCounter:
+    """Shared counter per tokenizer name; loads the Hugging Face tokenizer (no model weights) when not given one"""
+    with _counters_lock:
+        counter = _counters.get(name)
+        if counter is not None:
+            if counter.tokenizer is None and tokenizer is not None and not counter.failed:
+                counter.tokenizer = tokenizer  # Upgrade from approximate to exact counts
+                counter.clear()
+            return counter
+    if tokenizer is None:
+        try:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(name)
+        except Exception as e:
+            print(f"Tokenizer {name} unavailable, approximating token counts: {e}")
+    with _counters_lock:
+        return _counters.setdefault(name, TokenCounter(name, tokenizer))
+
+
+def get_tokenization_stats() -> dict:
+    with _counters_lock:
+        counters = list(_counters.values())
+    return {counter.name: counter.stats() for counter in counters}
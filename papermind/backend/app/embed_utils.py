@@ -1,64 +1,130 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
 import numpy as np
+from typing import Optional
+
+from .ann_utils import exact_top_k
+from .cache_utils import get_ingestion_cache
+from .chunk_utils import (EMBED_CHUNK_OVERLAP, EMBED_CHUNK_TOKENS, TokenCounter, get_token_counter,
+                          iter_token_chunks)
+from .encoder_utils import EMBEDDING_BACKEND, load_encoder
+from .index_utils import VectorIndex, normalize_vectors
+from .inference_utils import get_inference_client, inference_enabled
+from .metrics_utils import timed
+from .normalize_utils import EMBED_NORMALIZER
+
+EMBEDDING_MODEL_NAME = "paraphrase-MiniLM-L3-v2"
 
 _model = None  # Lazy-loaded model
+_index = None  # Lazy-loaded vector index
+_load_lock = threading.Lock()  # Ingestion threads and requests may race to load
 
 
 def get_model():
     """Load the model only once, on demand."""
     global _model
     if _model is None:
-        print("Loading SentenceTransformer model (this may take a bit)...")
-        _model = SentenceTransformer("paraphrase-MiniLM-L3-v2")
+        with _load_lock:
+            if _model is None:
+                print(f"Loading SentenceTransformer model ({EMBEDDING_BACKEND} backend, this may take a bit)...")
+                with timed("embedding_model_load"):
+                    _model = load_encoder(EMBEDDING_MODEL_NAME)
     return _model
 
 
-# Split text into manageable chunks
-def chunk_text(text: str, max_length: int = 500) -> list:
+def embedding_backend(wait: bool = True) -> Optional[str]:
+    """Backend the embedding model actually loaded with, which caches are keyed on: load_encoder falls
+    back to torch when ONNX is unavailable. With wait=False, None until the model has loaded"""
+    if inference_enabled():
+        return get_inference_client().embedding_backend(wait)
+    if _model is None and not wait:
+        return None
+    return get_model().backend
+
+
+def is_model_loaded() -> bool:
+    return _model is not None
+
+
+def is_index_loaded() -> bool:
+    return _index is not None
+
+
+def get_index() -> VectorIndex:
+    """Open the on-disk vector index once; shards are memory-mapped, not re-embedded."""
+    global _index
+    if _index is None:
+        with _load_lock:
+            if _index is None:
+                _index = VectorIndex()
+                print(f"Vector index loaded: {len(_index.shards)} documents, {len(_index)} chunks")
+    return _index
+
+
+def get_embedding_token_counter() -> TokenCounter:
+    """Token counter for the embedding model's tokenizer (the loaded model's own, when available)"""
+    tokenizer = getattr(_model, "tokenizer", None) if _model is not None else None
+    return get_token_counter(f"sentence-transformers/{EMBEDDING_MODEL_NAME}", tokenizer)
+
+
+# Split text into chunks that fit the embedding model's token limit
+def chunk_text(text: str, max_tokens: int = EMBED_CHUNK_TOKENS,
+               overlap_tokens: int = EMBED_CHUNK_OVERLAP, collapsed: bool = False) -> list:
     if not text or not text.strip():
         return []
-    
-    # Clean up the text
-    text = text.strip()
-    
-    # Split by sentences first, then by lines
-    sentences = text.replace('\n', ' ').split('. ')
-    chunks, current = [], ""
-
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-            
-        # Add period back if it was removed by split
-        if not sentence.endswith('.') and not sentence.endswith('!') and not sentence.endswith('?'):
-            sentence += '.'
-            
-        if len(current) + len(sentence) + 1 < max_length:
-            current += " " + sentence if current else sentence
-        else:
-            if current:
-                chunks.append(current.strip())
-            current = sentence
-    
-    if current:
-        chunks.append(current.strip())
-
-    # Filter out empty chunks and ensure minimum length
-    return [c for c in chunks if c and len(c.strip()) > 10]
-
-
-# Embed a list of text chunks
-def embed_chunks(chunks: list[str]) -> np.ndarray:
-    model = get_model()
-    return model.encode(chunks)
+    with timed("chunk_embedding"):
+        chunks = iter_token_chunks(EMBED_NORMALIZER.iter_normalized([text], collapsed), get_embedding_token_counter(),
+                                   max_tokens, overlap_tokens)
+        # Filter out fragments too short to be useful on their own
+        chunks = [c for c in chunks if len(c.strip()) > 10]
+    return chunks
+
+
+# Chunk page texts (whitespace already normalized by pdf_utils) separately so every chunk can cite its page
+def chunk_pages(pages: list, max_tokens: int = EMBED_CHUNK_TOKENS) -> tuple[list, list]:
+    chunks, page_numbers = [], []
+    for page_number, text in pages:
+        page_chunks = chunk_text(text, max_tokens, collapsed=True)
+        chunks.extend(page_chunks)
+        page_numbers.extend([page_number] * len(page_chunks))
+    return chunks, page_numbers
+
+
+# Encode texts locally, or in the inference process (INFERENCE_MODE=process) in the given priority lane
+def encode_texts(texts: list[str], priority: str = "normal") -> np.ndarray:
+    model = None if inference_enabled() else get_model()  # Loading is timed separately
+    with timed("embed", items=len(texts)):
+        if model is None:
+            return get_inference_client().embed(texts, priority)
+        return model.encode(texts)
+
+
+# Embed a list of text chunks (ingestion-sized work goes to the bulk lane)
+def embed_chunks(chunks: list[str], priority: str = "bulk") -> np.ndarray:
+    return encode_texts(chunks, priority)
+
+
+# Embed chunks, reusing cached embeddings of identical chunk texts
+def embed_chunks_cached(chunks: list[str]) -> np.ndarray:
+    cache = get_ingestion_cache()
+    backend = embedding_backend()
+    vectors = cache.get_embeddings(chunks, EMBEDDING_MODEL_NAME, backend)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        fresh = embed_chunks([chunks[i] for i in missing])
+        cache.put_embeddings([chunks[i] for i in missing], fresh, EMBEDDING_MODEL_NAME, backend)
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+    return np.vstack(vectors)
 
 
 # Perform semantic search over embedded chunks
 def search_chunks(query: str, chunks: list[str], embeddings: np.ndarray, top_k: int = 3) -> list[str]:
-    model = get_model()
-    query_embedding = model.encode([query])
-    scores = cosine_similarity(query_embedding, embeddings)[0]
-    top_indices = scores.argsort()[-top_k:][::-1]
-    return [chunks[i] for i in top_indices]
+    query_embedding = normalize_vectors(encode_texts([query], "interactive"))[0]
+    scores = normalize_vectors(embeddings) @ query_embedding
+    return [chunks[i] for i in exact_top_k(scores, top_k)]
+
+
+# Perform semantic search over the persistent multi-document index
+def search_index(query: str, top_k: int = 3, pdf_ids: list = None) -> list[dict]:
+    query_embedding = encode_texts([query], "interactive")
+    return get_index().search(query_embedding, top_k=top_k, doc_ids=pdf_ids)
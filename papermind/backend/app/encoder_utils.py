@@ -0,0 +1,195 @@
+# app/encoder_utils.py
+import inspect
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()  # torch, torch-int8, onnx or onnx-int8
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))   # Texts per forward pass
+ONNX_MODEL_DIR = os.getenv(  # Exported ONNX graphs, reused across restarts
+    "ONNX_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "onnx_models")
+)
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+ONNX_OPSET = 14
+
+
+def length_sorted_batches(texts: List[str], batch_size: int) -> Iterator[np.ndarray]:
+    """Indices of texts in batches of similar length, longest first, so little padding is computed"""
+    order = np.argsort([-len(text) for text in texts], kind="stable")
+    for start in range(0, len(order), max(1, batch_size)):
+        yield order[start:start + batch_size]
+
+
+def embedding_threads() -> int:
+    """EMBEDDING_THREADS (0 = library default, one per core), read when an encoder is created: a
+    preforking master pins it to 1 while it loads models and restores it before forking"""
+    return int(os.getenv("EMBEDDING_THREADS", "0"))
+
+
+class TorchEncoder:
+    """SentenceTransformer in fp32, or with its Linear layers dynamically quantized to int8"""
+
+    def __init__(self, model, quantize: bool = False, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 threads: Optional[int] = None):
+        self.set_threads(embedding_threads() if threads is None else threads)
+        if quantize:
+            import torch
+            # Weights stored as int8, activations quantized on the fly; no calibration data needed
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        self.backend = "torch-int8" if quantize else "torch"
+        self.model = model
+        self.tokenizer = model.tokenizer
+        self.batch_size = batch_size
+
+    def set_threads(self, threads: int):
+        if threads:
+            import torch
+            torch.set_num_threads(threads)  # Process-wide: shared with in-process summarization
+
+    def memory_mb(self) -> float:
+        """Size of the weights, including int8-packed ones (which are not module parameters)"""
+        try:
+            total = 0
+            for value in self.model.state_dict().values():
+                for tensor in value if isinstance(value, tuple) else (value,):
+                    if hasattr(tensor, "element_size"):
+                        total += tensor.numel() * tensor.element_size()
+            return total / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def encode(self, texts, batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        # SentenceTransformer sorts each call's texts by length before batching
+        return self.model.encode(texts, batch_size=batch_size or self.batch_size,
+                                 show_progress_bar=False, convert_to_numpy=True, **kwargs)
+
+
+def _pooling_config(model) -> Tuple[str, bool]:
+    """Pooling mode and normalization of a SentenceTransformer, for recomputing them outside torch"""
+    pooling, normalize = None, False
+    for module in model:
+        name = type(module).__name__
+        if name == "Pooling":
+            if module.pooling_mode_cls_token:
+                pooling = "cls"
+            elif module.pooling_mode_mean_tokens:
+                pooling = "mean"
+            elif module.pooling_mode_max_tokens:
+                pooling = "max"
+        elif name == "Normalize":
+            normalize = True
+        elif name != "Transformer":
+            raise ValueError(f"ONNX embedding backend does not support {name} modules")
+    if pooling is None:
+        raise ValueError("ONNX embedding backend needs cls, mean or max pooling")
+    return pooling, normalize
+
+
+def _pool(hidden: np.ndarray, mask: np.ndarray, pooling: str) -> np.ndarray:
+    if pooling == "cls":
+        return hidden[:, 0]
+    mask = mask[..., None].astype(hidden.dtype)
+    if pooling == "max":
+        return np.where(mask > 0, hidden, -1e9).max(axis=1)
+    return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def export_onnx(model, model_name: str, directory: str = ONNX_MODEL_DIR, quantize: bool = False) -> Path:
+    """Export the model's transformer to ONNX once (and its int8 variant); later loads reuse the files"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{model_name}.onnx"
+    if not path.exists():
+        import torch
+        print(f"Exporting {model_name} to ONNX...")
+        transformer = model[0].auto_model.eval()
+        dummy = dict(model.tokenizer(["an example sentence"], return_tensors="pt"))
+        # Graph inputs follow the order of forward()'s parameters, not of the tokenizer output
+        names = [name for name in inspect.signature(transformer.forward).parameters if name in dummy]
+        dummy = {name: dummy[name] for name in names}
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer, (dummy,), str(tmp_path), input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]},
+                opset_version=ONNX_OPSET,
+            )
+        os.replace(tmp_path, path)  # Atomic, in case several workers export at once
+    if not quantize:
+        return path
+    quantized_path = directory / f"{model_name}.int8.onnx"
+    if not quantized_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        tmp_path = quantized_path.with_suffix(f".{os.getpid()}.tmp")
+        quantize_dynamic(str(path), str(tmp_path), weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+class OnnxEncoder:
+    """The model's transformer run by ONNX Runtime, with pooling and normalization in numpy"""
+
+    def __init__(self, model, model_name: str, quantize: bool = False, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 threads: Optional[int] = None, directory: str = ONNX_MODEL_DIR):
+        self.pooling, self.normalize = _pooling_config(model)
+        self.path = export_onnx(model, model_name, directory, quantize)
+        self.set_threads(embedding_threads() if threads is None else threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.backend = "onnx-int8" if quantize else "onnx"
+        self.tokenizer = model.tokenizer
+        self.max_seq_length = model.max_seq_length
+        self.batch_size = batch_size
+
+    def set_threads(self, threads: int):
+        """(Re)create the session: its thread count is fixed when it is built"""
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads  # Per session, unlike torch's process-wide setting
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(self.path), options, providers=["CPUExecutionProvider"])
+
+    def memory_mb(self) -> float:
+        """Size of the ONNX graph and its weights on disk"""
+        return self.path.stat().st_size / (1024 * 1024)
+
+    def encode(self, texts, batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        embeddings = None
+        for indices in length_sorted_batches(texts, batch_size or self.batch_size):
+            encoded = self.tokenizer([texts[i] for i in indices], padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors="np")
+            feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+            pooled = _pool(hidden, encoded["attention_mask"], self.pooling)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            embeddings[indices] = pooled
+        if embeddings is None:
+            return np.empty((0, 0), dtype=np.float32)
+        if self.normalize:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(model_name: str, backend: str = EMBEDDING_BACKEND, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 threads: Optional[int] = None):
+    """Load a SentenceTransformer and wrap it in the configured backend; falls back to fp32 torch"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+    from sentence_transformers import SentenceTransformer  # Heavy import, deferred to first load
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend.startswith("onnx"):
+        try:
+            return OnnxEncoder(model, model_name, backend == "onnx-int8", batch_size, threads)
+        except Exception as e:
+            print(f"ONNX embedding backend unavailable, using torch: {e}")
+            backend = "torch"
+    return TorchEncoder(model, backend == "torch-int8", batch_size, threads)
@@ -0,0 +1,422 @@
+# app/index_utils.py
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+from typing import Dict, List, Optional
+
+from .ann_utils import ANN_MIN_VECTORS, SEARCH_ENGINE, create_engine, exact_top_k
+from .lexical_utils import LexicalPostings, bm25_search, reciprocal_rank_fusion
+
+INDEX_DIR = os.getenv(
+    "INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "index_data")
+)
+INDEX_DTYPE = os.getenv("INDEX_DTYPE", "float32")  # float32, float16 or int8
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid")  # Default /search/ mode: semantic, lexical or hybrid
+SEARCH_MODES = ("semantic", "lexical", "hybrid")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))  # Per-ranker candidates fused in hybrid search
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+VERSION_FILE = "VERSION"  # Rewritten on every change so other processes sharing the directory can notice
+
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """Return L2-normalized float32 copies of the given vectors"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def file_stamp(stat: os.stat_result) -> tuple:
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DocumentShard:
+    """Vectors and chunk texts for a single document, stored as raw memory-mapped files"""
+
+    def __init__(self, directory: str, doc_id: str):
+        self.doc_id = doc_id
+        self.meta_path = os.path.join(directory, f"{doc_id}.json")
+        self.vec_path = os.path.join(directory, f"{doc_id}.vec")
+        self.scale_path = os.path.join(directory, f"{doc_id}.scale")
+        self.meta = None
+        self.stamp = None  # (mtime, size) of the metadata file this shard was loaded from
+        self._vectors = None
+        self._scales = None
+        self._lexical = None  # BM25 postings, built from the chunk texts on first lexical search
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"] if self.meta else 0
+
+    @property
+    def chunks(self) -> List[str]:
+        return self.meta["chunks"] if self.meta else []
+
+    def page(self, i: int) -> Optional[int]:
+        """Source page of chunk i, when the document was ingested page by page"""
+        pages = self.meta.get("pages") if self.meta else None
+        return pages[i] if pages else None
+
+    def load(self):
+        """Read metadata and memory-map the vector file"""
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+            self.stamp = file_stamp(os.fstat(f.fileno()))
+        self._remap()
+
+    def _remap(self):
+        count, dim, dtype = self.meta["count"], self.meta["dim"], self.meta["dtype"]
+        if count == 0:
+            self._vectors = np.zeros((0, dim), dtype=dtype)
+            self._scales = np.zeros(0, dtype=np.float32)
+            return
+        self._vectors = np.memmap(self.vec_path, dtype=dtype, mode="r", shape=(count, dim))
+        if dtype == "int8":
+            self._scales = np.memmap(self.scale_path, dtype=np.float32, mode="r", shape=(count,))
+
+    def append(self, chunks: List[str], vectors: np.ndarray, dtype: str,
+               pages: Optional[List[Optional[int]]] = None):
+        """Append normalized vectors (and their chunk texts) to the shard files"""
+        if self.meta is None:
+            self.meta = {"doc_id": self.doc_id, "dim": int(vectors.shape[1]),
+                         "dtype": dtype, "count": 0, "chunks": []}
+        elif vectors.shape[1] != self.meta["dim"]:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match "
+                f"shard dimension {self.meta['dim']} for document {self.doc_id}"
+            )
+
+        dtype = self.meta["dtype"]
+        self._truncate_to_count()
+        if dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            stored = np.round(vectors / scales[:, None]).astype(np.int8)
+            with open(self.scale_path, "ab") as f:
+                f.write(scales.astype(np.float32).tobytes())
+        else:
+            stored = vectors.astype(dtype)
+
+        with open(self.vec_path, "ab") as f:
+            f.write(stored.tobytes())
+
+        if pages is not None or self.meta.get("pages"):
+            known = self.meta.get("pages") or [None] * self.meta["count"]
+            self.meta["pages"] = known + list(pages or [None] * len(chunks))
+        self.meta["count"] += len(chunks)
+        self.meta["chunks"].extend(chunks)
+        if self._lexical is not None:
+            self._lexical.add(chunks)  # Keep the inverted index in step with the vectors
+
+        # Write metadata last so a crash never leaves it pointing past the vector data
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self.stamp = file_stamp(os.stat(self.meta_path))
+        self._remap()
+
+    def _truncate_to_count(self):
+        """Drop bytes past the committed row count (left behind by an interrupted append)"""
+        count, dim = self.meta["count"], self.meta["dim"]
+        itemsize = np.dtype(self.meta["dtype"]).itemsize
+        for path, size in ((self.vec_path, count * dim * itemsize),
+                           (self.scale_path, count * 4)):
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def lexical(self) -> LexicalPostings:
+        if self._lexical is None:
+            lexical = LexicalPostings()
+            lexical.add(self.chunks)
+            self._lexical = lexical
+        return self._lexical
+
+    def vectors(self) -> np.ndarray:
+        """Return the shard vectors as float32 (dequantized if needed)"""
+        if self.meta["dtype"] == "int8":
+            return self._vectors.astype(np.float32) * self._scales[:, None]
+        return np.asarray(self._vectors, dtype=np.float32)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine scores of a normalized query against every vector in the shard"""
+        if self.count == 0:
+            return np.zeros(0, dtype=np.float32)
+        if self.meta["dtype"] == "int8":
+            return (self._vectors @ query.astype(np.float32)) * self._scales
+        return self._vectors @ query.astype(self._vectors.dtype)
+
+    def delete(self):
+        for path in (self.meta_path, self.vec_path, self.scale_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.meta = None
+        self._vectors = None
+        self._scales = None
+        self._lexical = None
+
+
+class VectorIndex:
+    """Multi-document vector index with one memory-mapped shard per document"""
+
+    def __init__(self, directory: str = INDEX_DIR, dtype: str = INDEX_DTYPE,
+                 engine: str = SEARCH_ENGINE, ann_min_vectors: int = ANN_MIN_VECTORS, **engine_kwargs):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported index dtype '{dtype}', expected one of {SUPPORTED_DTYPES}")
+        self.directory = directory
+        self.dtype = dtype
+        self.shards: Dict[str, DocumentShard] = {}
+        self._lock = threading.Lock()
+
+        # Approximate engine over all documents, built lazily on the first unfiltered search
+        self.engine_name = engine
+        self.ann_min_vectors = ann_min_vectors
+        self._engine_kwargs = engine_kwargs
+        self._engine = None
+        self._engine_rows = []  # (doc_id, first_shard_row, first_engine_row, count) per block
+        self._engine_lock = threading.Lock()
+        create_engine(engine, **engine_kwargs)  # Fail fast on a bad configuration
+        os.makedirs(self.directory, exist_ok=True)
+        self._version = None
+        self.load()
+
+    def _read_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, VERSION_FILE), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _bump_version(self):
+        """Tell other processes (e.g. other server workers) that the shard files changed"""
+        path = os.path.join(self.directory, VERSION_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, path)
+
+    def load(self):
+        """Memory-map every shard found on disk (no re-embedding needed)"""
+        self._version = self._read_version()
+        shards = {}
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            shard = DocumentShard(self.directory, name[:-len(".json")])
+            try:
+                shard.load()
+                shards[shard.doc_id] = shard
+            except Exception as e:
+                print(f"Skipping unreadable index shard {name}: {e}")
+        with self._lock:
+            self.shards = shards
+        self._invalidate_engine()
+
+    def refresh(self) -> bool:
+        """Pick up shards added, extended or deleted by other processes; cheap when nothing changed"""
+        version = self._read_version()
+        if version == self._version:
+            return False
+        self._version = version
+        changed = False
+        with self._lock:
+            on_disk = {name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json")}
+            for doc_id in [d for d in self.shards if d not in on_disk]:
+                del self.shards[doc_id]
+                changed = True
+            for doc_id in on_disk:
+                shard = self.shards.get(doc_id)
+                try:
+                    if shard is not None and file_stamp(os.stat(shard.meta_path)) == shard.stamp:
+                        continue  # Unchanged, or written by this process
+                    shard = DocumentShard(self.directory, doc_id)
+                    shard.load()
+                except FileNotFoundError:
+                    continue  # Deleted while scanning; the next version bump removes it
+                except Exception as e:
+                    print(f"Skipping unreadable index shard {doc_id}: {e}")
+                    continue
+                self.shards[doc_id] = shard
+                changed = True
+        if changed:
+            self._invalidate_engine()
+        return changed
+
+    def add(self, doc_id, chunks: List[str], embeddings: np.ndarray,
+            pages: Optional[List[int]] = None) -> int:
+        """Append chunks, their embeddings and (optionally) source page numbers to a document's shard"""
+        doc_id = str(doc_id)
+        if not chunks:
+            return 0
+        if len(chunks) != len(embeddings) or (pages is not None and len(pages) != len(chunks)):
+            raise ValueError("Number of chunks, embeddings and pages must match")
+        vectors = normalize_vectors(embeddings)
+        with self._lock:
+            shard = self.shards.get(doc_id)
+            if shard is None:
+                shard = DocumentShard(self.directory, doc_id)
+            first_row = shard.count
+            shard.append(list(chunks), vectors, self.dtype, pages)
+            shard.lexical()  # Build the inverted index at upload time, not on the first query
+            self.shards[doc_id] = shard
+        self._bump_version()
+        self._extend_engine(doc_id, first_row, vectors)
+        return len(chunks)
+
+    def delete(self, doc_id) -> bool:
+        """Remove a document and its vectors from the index"""
+        self.refresh()
+        with self._lock:
+            shard = self.shards.pop(str(doc_id), None)
+            if shard is None:
+                return False
+            shard.delete()
+        self._bump_version()
+        self._invalidate_engine()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self.shards = {}
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+        self._bump_version()
+        self._invalidate_engine()
+
+    def _invalidate_engine(self):
+        with self._engine_lock:
+            self._engine = None
+            self._engine_rows = []
+
+    def _extend_engine(self, doc_id: str, first_row: int, vectors: np.ndarray):
+        """Feed freshly appended vectors to an already-built engine instead of rebuilding it"""
+        with self._engine_lock:
+            if self._engine is None:
+                return
+            covered = max((first + n for d, first, _, n in self._engine_rows if d == doc_id), default=0)
+            if covered >= first_row + len(vectors):
+                return  # A concurrent build already picked these rows up from the shard
+            self._engine_rows.append((doc_id, first_row, len(self._engine), len(vectors)))
+            self._engine.add(vectors)
+
+    def _ensure_engine(self):
+        with self._engine_lock:
+            if self._engine is not None:
+                return self._engine
+            engine = create_engine(self.engine_name, **self._engine_kwargs)
+            blocks, rows, offset = [], [], 0
+            for shard in self._selected_shards(None):
+                vectors = shard.vectors()
+                if len(vectors) == 0:
+                    continue
+                blocks.append(vectors)
+                rows.append((shard.doc_id, 0, offset, len(vectors)))
+                offset += len(vectors)
+            dim = blocks[0].shape[1] if blocks else 0
+            engine.build(np.vstack(blocks) if blocks else np.zeros((0, dim), dtype=np.float32))
+            self._engine, self._engine_rows = engine, rows
+            return engine
+
+    def _engine_search(self, query: np.ndarray, top_k: int) -> List[tuple]:
+        engine = self._ensure_engine()
+        with self._engine_lock:
+            ids, scores = engine.search(query, top_k)
+            rows = list(self._engine_rows)
+        starts = np.array([r[2] for r in rows])
+        results = []
+        for gid, score in zip(ids, scores):
+            doc_id, first_row, start, _ = rows[int(np.searchsorted(starts, gid, side="right")) - 1]
+            shard = self.shards.get(doc_id)
+            if shard is not None:
+                results.append((float(score), shard, first_row + int(gid - start)))
+        return results
+
+    def documents(self) -> List[dict]:
+        self.refresh()
+        with self._lock:
+            return [{"pdf_id": s.doc_id, "chunks": s.count, "dtype": s.meta["dtype"]}
+                    for s in self.shards.values()]
+
+    def __len__(self) -> int:
+        self.refresh()
+        with self._lock:
+            return sum(s.count for s in self.shards.values())
+
+    def __contains__(self, doc_id) -> bool:
+        self.refresh()
+        with self._lock:
+            return str(doc_id) in self.shards
+
+    def _selected_shards(self, doc_ids: Optional[List[str]]) -> List[DocumentShard]:
+        with self._lock:
+            if doc_ids is None:
+                return list(self.shards.values())
+            return [self.shards[str(d)] for d in doc_ids if str(d) in self.shards]
+
+    def _semantic_candidates(self, query_embedding: np.ndarray, top_k: int,
+                             doc_ids: Optional[List[str]]) -> List[tuple]:
+        query = normalize_vectors(query_embedding)[0]
+        use_engine = (doc_ids is None and self.engine_name != "exact"
+                      and len(self) >= self.ann_min_vectors)
+        if use_engine:
+            candidates = self._engine_search(query, top_k)
+        else:
+            # Exact scan over the memory-mapped shards
+            candidates = []
+            for shard in self._selected_shards(doc_ids):
+                scores = shard.scores(query)
+                top = exact_top_k(scores, top_k)
+                candidates.extend((float(scores[i]), shard, int(i)) for i in top)
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return candidates[:top_k]
+
+    def _lexical_candidates(self, query: str, top_k: int, doc_ids: Optional[List[str]]) -> List[tuple]:
+        shards = self._selected_shards(doc_ids)
+        return bm25_search([(shard, shard.lexical()) for shard in shards], query, top_k)
+
+    @staticmethod
+    def _results(candidates: List[tuple]) -> List[dict]:
+        return [{
+            "pdf_id": shard.doc_id,
+            "chunk_index": i,
+            "page": shard.page(i),
+            "score": score,
+            "content": shard.chunks[i],
+        } for score, shard, i in candidates]
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 3,
+               doc_ids: Optional[List[str]] = None) -> List[dict]:
+        """Return the top_k chunks most similar to the query, optionally filtered by document"""
+        self.refresh()
+        return self._results(self._semantic_candidates(query_embedding, top_k, doc_ids))
+
+    def lexical_search(self, query: str, top_k: int = 3,
+                       doc_ids: Optional[List[str]] = None) -> List[dict]:
+        """BM25 keyword search; needs no query embedding"""
+        self.refresh()
+        return self._results(self._lexical_candidates(query, top_k, doc_ids))
+
+    def hybrid_search(self, query: str, query_embedding: np.ndarray, top_k: int = 3,
+                      doc_ids: Optional[List[str]] = None, candidates: int = HYBRID_CANDIDATES) -> List[dict]:
+        """Fuse BM25 and embedding rankings with reciprocal rank fusion"""
+        self.refresh()
+        depth = max(candidates, top_k)
+        rankings, by_key = [], {}
+        for found in (self._semantic_candidates(query_embedding, depth, doc_ids),
+                      self._lexical_candidates(query, depth, doc_ids)):
+            ranking = []
+            for _, shard, i in found:
+                key = (shard.doc_id, i)
+                by_key[key] = shard
+                ranking.append(key)
+            rankings.append(ranking)
+        fused = reciprocal_rank_fusion(rankings)[:top_k]
+        return self._results([(score, by_key[key], key[1]) for key, score in fused])
@@ -0,0 +1,346 @@
+# app/inference_utils.py
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "inprocess").lower()  # inprocess, or process (dedicated worker)
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "64"))        # Texts per embedding call
+INFERENCE_SUMMARY_BATCH = int(os.getenv("INFERENCE_SUMMARY_BATCH", "8"))  # Chunks per summarization call
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5"))  # Wait to fill a batch
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "600"))  # Seconds before a request is abandoned
+
+# Lanes are served strictly in this order, so interactive searches overtake bulk ingestion
+PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+_in_worker = False  # True inside the inference process, where models run locally
+
+
+def inference_enabled() -> bool:
+    return INFERENCE_MODE == "process" and not _in_worker
+
+
+class _Piece:
+    """Part of a request: up to one batch worth of inputs that share a model and generation settings"""
+
+    __slots__ = ("request_id", "offset", "kind", "key", "inputs")
+
+    def __init__(self, request_id: int, offset: int, kind: str, key: tuple, inputs: list):
+        self.request_id = request_id
+        self.offset = offset
+        self.kind = kind
+        self.key = key
+        self.inputs = inputs
+
+
+def _run_batch(kind: str, key: tuple, inputs: list) -> list:
+    """Run one batched model call inside the inference process"""
+    if kind == "embed":
+        from .embed_utils import get_model
+        return list(get_model().encode(inputs))
+    if kind == "summarize":
+        from .summarizer_utils import get_model_registry
+        model_name, max_length, min_length = key
+        pipeline = get_model_registry().get(model_name).summarizer
+        return pipeline(inputs, max_length=max_length, min_length=min_length,
+                        do_sample=False, truncation=True, batch_size=len(inputs))
+    if kind == "load":
+        from .embed_utils import get_model
+        from .summarizer_utils import get_model_registry
+        get_model()
+        for model_name in inputs:
+            get_model_registry().get(model_name)
+        return [True] * len(inputs)
+    if kind == "backend":
+        from .embed_utils import get_model
+        return [get_model().backend] * len(inputs)
+    raise ValueError(f"Unknown inference request kind '{kind}'")
+
+
+def _serve(requests, results, max_batch: int, summary_batch: int, window: float):
+    """Inference process main loop: split requests into pieces, batch them per lane, reply per request"""
+    global _in_worker
+    _in_worker = True
+    lanes = [deque() for _ in PRIORITIES]
+    partial: Dict[int, list] = {}  # request_id -> [outputs, remaining]
+
+    def enqueue(message):
+        request_id, kind, priority, key, inputs = message
+        size = summary_batch if kind == "summarize" else max_batch
+        partial[request_id] = [[None] * len(inputs), len(inputs)]
+        for offset in range(0, max(len(inputs), 1), size):
+            lanes[priority].append(_Piece(request_id, offset, kind, key, inputs[offset:offset + size]))
+
+    def drain(timeout: Optional[float]) -> bool:
+        """Move waiting requests into the lanes; False once the shutdown sentinel arrives"""
+        try:
+            message = requests.get(timeout=timeout) if timeout else requests.get_nowait()
+            while True:
+                if message is None:
+                    return False
+                enqueue(message)
+                message = requests.get_nowait()
+        except queue.Empty:
+            return True
+
+    while True:
+        if not any(lanes):
+            message = requests.get()
+            if message is None:
+                return
+            enqueue(message)
+        if not drain(None):
+            return
+
+        level = next(i for i, lane in enumerate(lanes) if lane)
+        lane, head = lanes[level], lanes[level][0]
+        limit = summary_batch if head.kind == "summarize" else max_batch
+        more_urgent = lambda: any(lanes[:level])
+
+        # Dynamic batching: give concurrent requests a short window to join a small batch
+        deadline = time.monotonic() + window
+        while sum(len(p.inputs) for p in lane if p.kind == head.kind and p.key == head.key) < limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not drain(remaining) or more_urgent():
+                break
+        if more_urgent():
+            continue  # Serve the higher-priority lane first
+
+        batch, inputs = [], []
+        for piece in list(lane):
+            if piece.kind == head.kind and piece.key == head.key and len(inputs) + len(piece.inputs) <= limit:
+                lane.remove(piece)
+                batch.append(piece)
+                inputs.extend(piece.inputs)
+
+        try:
+            outputs, error = _run_batch(head.kind, head.key, inputs) if inputs else [], None
+        except Exception as e:
+            outputs, error = None, f"{type(e).__name__}: {e}"
+
+        position = 0
+        for piece in batch:
+            entry = partial.get(piece.request_id)
+            if entry is None:
+                continue  # Already failed by an earlier piece
+            if error is not None:
+                del partial[piece.request_id]
+                results.put((piece.request_id, False, error, len(inputs)))
+                continue
+            entry[0][piece.offset:piece.offset + len(piece.inputs)] = outputs[position:position + len(piece.inputs)]
+            position += len(piece.inputs)
+            entry[1] -= len(piece.inputs)
+            if entry[1] <= 0:
+                del partial[piece.request_id]
+                results.put((piece.request_id, True, entry[0], len(inputs)))
+
+
+class InferenceClient:
+    """Send embedding and summarization work to a dedicated inference process"""
+
+    def __init__(self, max_batch: int = INFERENCE_MAX_BATCH, summary_batch: int = INFERENCE_SUMMARY_BATCH,
+                 window_ms: float = INFERENCE_BATCH_WINDOW_MS, timeout: float = INFERENCE_TIMEOUT):
+        self.max_batch = max_batch
+        self.summary_batch = summary_batch
+        self.window = window_ms / 1000.0
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._futures: Dict[int, tuple] = {}  # request_id -> (future, lane, submitted_at)
+        self._process = None
+        self._requests = None
+        self._results = None
+        self.restarts = -1
+        self.models_loaded = False  # Set by load(); reset when the process restarts
+        self._embedding_backend = None  # Asked once per process; reset when it restarts
+        self._stats = {lane: {"requests": 0, "inputs": 0, "batches": 0, "batched_inputs": 0,
+                              "wait_ms_total": 0.0, "completed": 0, "failed": 0} for lane in PRIORITIES}
+
+    def _ensure_process(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return
+            self._fail_pending("Inference process exited")
+            self._requests, self._results = self._context.Queue(), self._context.Queue()
+            self._process = self._context.Process(
+                target=_serve, name="inference",
+                args=(self._requests, self._results, self.max_batch, self.summary_batch, self.window),
+                daemon=True,
+            )
+            self._process.start()
+            self.models_loaded = False
+            self._embedding_backend = None
+            self.restarts += 1
+            print(f"Inference process started (pid {self._process.pid})")
+            threading.Thread(target=self._read_results, args=(self._process, self._results),
+                             name="inference-results", daemon=True).start()
+
+    def _fail_pending(self, reason: str):
+        for request_id, (future, lane, _) in list(self._futures.items()):
+            self._futures.pop(request_id, None)
+            self._stats[lane]["failed"] += 1
+            if not future.done():
+                future.set_exception(RuntimeError(reason))
+
+    def _read_results(self, process, results):
+        while True:
+            try:
+                request_id, ok, value, batch_size = results.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    with self._lock:
+                        if process is self._process:
+                            self._fail_pending(f"Inference process died (exit code {process.exitcode})")
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                entry = self._futures.pop(request_id, None)
+                if entry is None:
+                    continue
+                future, lane, submitted_at = entry
+                stats = self._stats[lane]
+                stats["batches"] += 1
+                stats["batched_inputs"] += batch_size
+                stats["wait_ms_total"] += (time.monotonic() - submitted_at) * 1000
+                stats["completed" if ok else "failed"] += 1
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(value))
+
+    def submit(self, kind: str, inputs: list, priority: str = "normal", key: tuple = ()) -> Future:
+        """Queue work for the inference process; the future resolves to one output per input"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {list(PRIORITIES)}")
+        self._ensure_process()
+        future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._futures[request_id] = (future, priority, time.monotonic())
+            self._stats[priority]["requests"] += 1
+            self._stats[priority]["inputs"] += len(inputs)
+            self._requests.put((request_id, kind, PRIORITIES[priority], key, list(inputs)))
+        return future
+
+    def _wait(self, future: Future):
+        return future.result(timeout=self.timeout)
+
+    def embed(self, texts: List[str], priority: str = "normal") -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(self._wait(self.submit("embed", texts, priority)))
+
+    def summarize(self, model_name: str, inputs: List[str], max_length: int, min_length: int,
+                  priority: str = "normal") -> List[dict]:
+        return self._wait(self.submit("summarize", inputs, priority, (model_name, max_length, min_length)))
+
+    def load(self, model_names: List[str]):
+        """Load the embedding model and the given summarization models in the inference process"""
+        self._wait(self.submit("load", list(model_names), "interactive"))
+        self.models_loaded = True
+
+    def embedding_backend(self, wait: bool = True) -> Optional[str]:
+        """Backend the inference process loaded the embedding model with; None if unknown and not wait"""
+        if self._embedding_backend is None and wait:
+            self._embedding_backend = self._wait(self.submit("backend", [None], "interactive"))[0]
+        return self._embedding_backend
+
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lanes = {}
+            for lane, s in self._stats.items():
+                done = s["completed"] + s["failed"]
+                lanes[lane] = dict(
+                    s, pending=sum(1 for _, l, _ in self._futures.values() if l == lane),
+                    avg_batch_size=round(s["batched_inputs"] / s["batches"], 2) if s["batches"] else 0.0,
+                    avg_wait_ms=round(s["wait_ms_total"] / done, 1) if done else None,
+                )
+            return {
+                "mode": "process",
+                "running": self.is_running(),
+                "pid": self._process.pid if self._process is not None else None,
+                "restarts": max(self.restarts, 0),
+                "models_loaded": self.models_loaded,
+                "embedding_backend": self._embedding_backend,
+                "max_batch": self.max_batch,
+                "summary_batch": self.summary_batch,
+                "window_ms": self.window * 1000.0,
+                "lanes": lanes,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                self._requests.put(None)
+                self._process.join(timeout=5)
+            self._fail_pending("Inference client shut down")
+
+
+class RemotePipeline:
+    """Stands in for a transformers summarization pipeline, running generation in the inference process"""
+
+    def __init__(self, model_name: str, client: "InferenceClient"):
+        self.model_name = model_name
+        self.client = client
+        self._tokenizer = None
+        self._tokenizer_loaded = False
+
+    @property
+    def tokenizer(self):
+        """Tokenizer only (no model weights), used locally to sort chunks by token length"""
+        if not self._tokenizer_loaded:
+            self._tokenizer_loaded = True
+            try:
+                from transformers import AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            except Exception as e:
+                print(f"No local tokenizer for {self.model_name}: {e}")
+        return self._tokenizer
+
+    def __call__(self, inputs, max_length: int = 150, min_length: int = 30, **kwargs):
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        return self.client.summarize(self.model_name, texts, max_length, min_length)
+
+
+_client = None  # Lazy-started inference process
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_inference_client() -> InferenceClient:
+    """One inference process per server process (forked workers each start their own)"""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+                    print("⚠️ INFERENCE_MODE=process with several workers: each worker starts its own "
+                          "inference process and its own copy of the models")
+                _client, _client_pid = InferenceClient(), os.getpid()
+    return _client
+
+
+def get_inference_stats() -> dict:
+    if not inference_enabled():
+        return {"mode": "inprocess"}
+    if _client is None or _client_pid != os.getpid():
+        return {"mode": "process", "running": False}
+    return _client.stats()
+
+
+def shutdown_inference():
+    if _client is not None and _client_pid == os.getpid():
+        _client.shutdown()
@@ -0,0 +1,315 @@
+# app/ingest_utils.py
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from .pdf_utils import count_pdf_pages, iter_pdf_pages
+from .cache_utils import IngestionCache
+from .embed_utils import chunk_text, embed_chunks, embed_chunks_cached
+from .upload_utils import SpooledUpload
+
+INGEST_MAX_CONCURRENT = int(os.getenv("INGEST_MAX_CONCURRENT", "2"))  # Uploads processed at once
+INGEST_MAX_QUEUED = int(os.getenv("INGEST_MAX_QUEUED", "16"))         # Uploads waiting beyond that
+INGEST_EXTRACT_PROCESSES = int(os.getenv("INGEST_EXTRACT_PROCESSES", "2"))  # 0 = extract inline
+INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "64"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_STATE_DIR = os.getenv("JOB_STATE_DIR", "")  # Shared job status files for multi-worker servers ("" = off)
+JOB_PUBLISH_INTERVAL = 0.5  # Seconds between progress-only writes of a job's status file
+
+STAGES = ("extract", "chunk", "embed", "persist")
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept another upload"""
+
+
+class IngestionJob:
+    """Status and per-stage timing of one upload moving through the pipeline"""
+
+    def __init__(self, filename: str, content_type: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.content_type = content_type
+        self.status = "queued"  # queued, running, completed, failed
+        self.created_at = time.time()
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self.stages = {
+            name: {"status": "pending", "progress": 0.0, "started_at": None, "duration_ms": None}
+            for name in STAGES
+        }
+        self.state_path = None  # Status file other server workers read, when JOB_STATE_DIR is set
+        self._published_at = 0.0
+
+    def publish(self, force: bool = True):
+        """Write the job status where other worker processes can serve /jobs/{job_id}"""
+        if self.state_path is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._published_at < JOB_PUBLISH_INTERVAL:
+            return
+        self._published_at = now
+        tmp_path = f"{self.state_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"[job {self.id}] Could not publish status: {e}")
+
+    def start_stage(self, name: str):
+        self.stages[name].update(status="running", started_at=time.time())
+        self.publish()
+
+    def set_progress(self, name: str, progress: float):
+        self.stages[name]["progress"] = round(min(max(progress, 0.0), 1.0), 3)
+        self.publish(force=False)
+
+    def finish_stage(self, name: str, status: str = "completed"):
+        stage = self.stages[name]
+        stage["status"] = status
+        if status == "completed":
+            stage["progress"] = 1.0
+        if stage["started_at"] is not None:
+            stage["duration_ms"] = round((time.time() - stage["started_at"]) * 1000, 1)
+        self.publish()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "stages": self.stages,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class IngestionPipeline:
+    """Run extraction -> chunking -> embedding -> persistence off the event loop with bounded concurrency"""
+
+    def __init__(self, persist_fn: Callable, is_stored_fn: Callable = None, cache: IngestionCache = None,
+                 max_concurrent: int = INGEST_MAX_CONCURRENT, max_queued: int = INGEST_MAX_QUEUED,
+                 extract_processes: int = INGEST_EXTRACT_PROCESSES, embed_batch: int = INGEST_EMBED_BATCH,
+                 state_dir: str = JOB_STATE_DIR):
+        # persist_fn(job, upload, chunks, pages, embeddings, progress) -> pdf_id, called in a worker thread
+        self.persist_fn = persist_fn
+        # is_stored_fn(pdf_id) -> bool tells whether a previously ingested copy is still searchable
+        self.is_stored_fn = is_stored_fn or (lambda pdf_id: False)
+        self.cache = cache
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.extract_processes = extract_processes
+        self.embed_batch = embed_batch
+        self.jobs: Dict[str, IngestionJob] = {}
+        self.state_dir = state_dir or None
+        if self.state_dir:
+            os.makedirs(self.state_dir, exist_ok=True)
+        self._semaphore = None
+        self._tasks = set()  # Keep references so running jobs are not garbage collected
+        self._thread_pool = ThreadPoolExecutor(max_workers=max(2, max_concurrent * 2),
+                                               thread_name_prefix="ingest")
+        self._process_pool = None
+
+    def _get_process_pool(self):
+        if self.extract_processes <= 0:
+            return None
+        if self._process_pool is None:
+            # spawn avoids forking a parent that already holds torch threads
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.extract_processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._process_pool
+
+    def pending(self) -> int:
+        return sum(1 for job in self.jobs.values() if not job.done)
+
+    def ensure_capacity(self):
+        """Raise QueueFullError if another upload cannot be queued right now"""
+        self._prune()
+        if self.pending() >= self.max_concurrent + self.max_queued:
+            raise QueueFullError(
+                f"Ingestion queue is full ({self.pending()} uploads pending), retry later"
+            )
+
+    def submit(self, upload: SpooledUpload, filename: str, content_type: Optional[str] = None) -> IngestionJob:
+        """Queue an upload and return its job immediately; raises QueueFullError under backpressure.
+
+        The job owns the spooled file from here on and deletes it when it finishes.
+        """
+        self.ensure_capacity()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        job = IngestionJob(filename, content_type)
+        if self.state_dir:
+            job.state_path = os.path.join(self.state_dir, f"{job.id}.json")
+            job.publish()
+        self.jobs[job.id] = job
+        task = asyncio.get_running_loop().create_task(self._run(job, upload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self.jobs.get(job_id)
+
+    def get_status(self, job_id: str) -> Optional[dict]:
+        """Status of a job run by this process or, with a shared state directory, by another worker"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if not self.state_dir or not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.state_dir, f"{job_id}.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self.jobs.values() if j.done and j.finished_at < cutoff]:
+            job = self.jobs.pop(job_id)
+            if job.state_path and os.path.exists(job.state_path):
+                os.remove(job.state_path)
+
+    async def _stage(self, job: IngestionJob, name: str, executor, fn, *args):
+        job.start_stage(name)
+        result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        job.finish_stage(name)
+        return result
+
+    def _embed(self, chunks: list) -> Optional[np.ndarray]:
+        if not chunks:
+            return None
+        return embed_chunks_cached(chunks) if self.cache is not None else embed_chunks(chunks)
+
+    def _from_cache(self, upload: SpooledUpload):
+        """Look up an identical, previously ingested PDF by the SHA-256 of its bytes (hashed while spooling)"""
+        digest = upload.sha256
+        entry = self.cache.get_document(digest) if self.cache is not None else None
+        return digest, entry
+
+    def _extract_chunk_embed(self, job: IngestionJob, path: str):
+        """Stream pages from the extractor so chunking and embedding start before the last page is parsed"""
+        total_pages = count_pdf_pages(path)
+        chunks, pages, batches = [], [], []
+
+        def embed_ready(final: bool = False):
+            embedded = sum(len(b) for b in batches)
+            while len(chunks) - embedded >= self.embed_batch or (final and len(chunks) > embedded):
+                if job.stages["embed"]["status"] == "pending":
+                    job.start_stage("embed")
+                batch = chunks[embedded:embedded + self.embed_batch]
+                batches.append(self._embed(batch))
+                embedded += len(batch)
+                job.set_progress("embed", embedded / max(len(chunks), 1))
+
+        job.start_stage("extract")
+        for done, (page_number, text) in enumerate(
+                iter_pdf_pages(path, executor=self._get_process_pool(),
+                               workers=self.extract_processes), 1):
+            job.set_progress("extract", done / max(total_pages, 1))
+            if job.stages["chunk"]["status"] == "pending":
+                job.start_stage("chunk")
+            page_chunks = chunk_text(text, collapsed=True)  # pdf_utils normalized its whitespace
+            chunks.extend(page_chunks)
+            pages.extend([page_number] * len(page_chunks))
+            embed_ready()
+        job.finish_stage("extract")
+        if job.stages["chunk"]["status"] == "pending":
+            job.start_stage("chunk")
+        job.finish_stage("chunk")
+        print(f"[job {job.id}] Extracted {total_pages} pages into {len(chunks)} chunks")
+
+        embed_ready(final=True)
+        if job.stages["embed"]["status"] == "pending":
+            job.start_stage("embed")
+        job.finish_stage("embed")
+        return chunks, pages, (np.vstack(batches) if batches else None)
+
+    async def _run(self, job: IngestionJob, upload: SpooledUpload):
+        async with self._semaphore:
+            job.status = "running"
+            job.publish()
+            loop = asyncio.get_running_loop()
+            try:
+                digest, cached = await loop.run_in_executor(self._thread_pool, self._from_cache, upload)
+                if cached is not None and self.is_stored_fn(cached["pdf_id"]):
+                    self._complete_duplicate(job, cached)
+                    return
+
+                if cached is not None:
+                    # Same bytes seen before but no longer stored: reuse chunks, embeddings come from cache
+                    chunks, pages = cached["chunks"], cached["pages"]
+                    for name in ("extract", "chunk"):
+                        job.finish_stage(name, "skipped")
+                    embeddings = await self._stage(job, "embed", self._thread_pool, self._embed, chunks)
+                else:
+                    chunks, pages, embeddings = await loop.run_in_executor(
+                        self._thread_pool, self._extract_chunk_embed, job, upload.path)
+
+                progress = lambda value: job.set_progress("persist", value)
+                pdf_id = await self._stage(job, "persist", self._thread_pool, self.persist_fn,
+                                           job, upload, chunks, pages, embeddings, progress)
+
+                if self.cache is not None:
+                    self.cache.put_document(digest, pdf_id, chunks, pages)
+
+                job.result = {
+                    "message": f"{len(chunks)} chunks embedded and stored.",
+                    "preview": chunks[:2],
+                    "pdf_id": pdf_id,
+                    "chunks": len(chunks),
+                    "pages": len(set(pages)),
+                    "deduplicated": False,
+                }
+                job.status = "completed"
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._process_pool = None  # A worker died; start a fresh pool for the next job
+                for name, stage in job.stages.items():
+                    if stage["status"] == "running":
+                        job.finish_stage(name, "failed")
+                print(f"[job {job.id}] Ingestion failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                upload.release()
+                job.finished_at = time.time()
+                job.publish()
+
+    def _complete_duplicate(self, job: IngestionJob, cached: dict):
+        print(f"[job {job.id}] Identical PDF already stored as {cached['pdf_id']}, skipping ingestion")
+        for name in STAGES:
+            job.finish_stage(name, "skipped")
+        job.result = {
+            "message": f"{len(cached['chunks'])} chunks already stored (identical PDF).",
+            "preview": cached["chunks"][:2],
+            "pdf_id": cached["pdf_id"],
+            "chunks": len(cached["chunks"]),
+            "pages": len(set(cached["pages"])),
+            "deduplicated": True,
+        }
+        job.status = "completed"
+
+    def shutdown(self):
+        self._thread_pool.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
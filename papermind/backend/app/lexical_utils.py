@@ -0,0 +1,109 @@
+# app/lexical_utils.py
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ann_utils import exact_top_k
+from .minimal_summarizer import ENGLISH_STOPWORDS
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))   # Term frequency saturation
+BM25_B = float(os.getenv("BM25_B", "0.75"))    # Document length normalization
+RRF_K = int(os.getenv("RRF_K", "60"))          # Reciprocal rank fusion damping constant
+
+# Keep identifiers such as "il-6", "brca1" or "eq.3.2" together as single terms
+TERM_PATTERN = re.compile(r'[a-z0-9]+(?:[-_.][a-z0-9]+)*')
+
+
+def tokenize(text: str) -> List[str]:
+    return [term for term in TERM_PATTERN.findall(text.lower()) if term not in ENGLISH_STOPWORDS]
+
+
+class LexicalPostings:
+    """Inverted index (term -> chunk rows and term frequencies) for one document, grown as chunks are appended"""
+
+    def __init__(self):
+        self._lengths: List[int] = []
+        self._lists: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, chunks: Sequence[str]):
+        """Index chunks appended after the existing rows"""
+        first_row = len(self._lengths)
+        for offset, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            length = sum(counts.values())
+            self._lengths.append(length)
+            self.total_length += length
+            for term, tf in counts.items():
+                rows, tfs = self._lists.setdefault(term, ([], []))
+                rows.append(first_row + offset)
+                tfs.append(tf)
+                self._arrays.pop(term, None)  # Rebuilt on next lookup
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            lists = self._lists.get(term)
+            if lists is None:
+                return None
+            arrays = (np.array(lists[0], dtype=np.int64), np.array(lists[1], dtype=np.float32))
+            self._arrays[term] = arrays
+        return arrays
+
+    def lengths(self) -> np.ndarray:
+        return np.array(self._lengths, dtype=np.float32)
+
+
+def bm25_search(documents: List[Tuple[object, LexicalPostings]], query: str, top_k: int,
+                k1: float = BM25_K1, b: float = BM25_B) -> List[Tuple[float, object, int]]:
+    """Okapi BM25 over the chunks of the given documents; returns (score, document, row), best first"""
+    terms = list(dict.fromkeys(tokenize(query)))
+    total_chunks = sum(len(postings) for _, postings in documents)
+    if not terms or total_chunks == 0:
+        return []
+    avgdl = max(sum(postings.total_length for _, postings in documents) / total_chunks, 1e-6)
+
+    # Postings per term across documents, and inverse document frequency over all chunks
+    matches = {term: [(doc, postings, postings.postings(term)) for doc, postings in documents] for term in terms}
+    idf = {}
+    for term, found in matches.items():
+        df = sum(len(p[0]) for _, _, p in found if p is not None)
+        idf[term] = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5)) if df else 0.0
+
+    candidates = []
+    for doc, postings in documents:
+        scores = None
+        norms = None
+        for term in terms:
+            found = postings.postings(term)
+            if found is None or idf[term] == 0.0:
+                continue
+            if scores is None:
+                scores = np.zeros(len(postings), dtype=np.float32)
+                norms = k1 * (1 - b + b * postings.lengths() / avgdl)
+            rows, tfs = found
+            scores[rows] += idf[term] * tfs * (k1 + 1) / (tfs + norms[rows])
+        if scores is None:
+            continue
+        for row in exact_top_k(scores, top_k):
+            if scores[row] > 0:
+                candidates.append((float(scores[row]), doc, int(row)))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    return candidates[:top_k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[object]], k: int = RRF_K) -> List[Tuple[object, float]]:
+    """Fuse ranked lists of keys by summing 1 / (k + rank); best first"""
+    fused = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -1,24 +1,15 @@
 from fastapi import FastAPI, File, UploadFile, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Match
 from pydantic import BaseModel
 from typing import Optional
 from supabase import create_client, Client
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 
-
-from .pdf_utils import extract_text_from_pdf
-from .embed_utils import chunk_text, embed_chunks, search_chunks
-try:
-    from .summarizer_utils import summarize_text, get_available_models
-    ML_AVAILABLE = True
-except ImportError:
-    from .minimal_summarizer import summarize_text_minimal as summarize_text
-    ML_AVAILABLE = False
-    def get_available_models():
-        return {"minimal": "rule-based extractive summarizer"}
-
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), '.env')
 if os.path.exists(env_path):
@@ -29,6 +20,44 @@ else:
     if os.path.exists(env_path):
         load_dotenv(dotenv_path=env_path)
 
+# Config below is read from the environment at import time, so load .env first
+from .embed_utils import EMBEDDING_MODEL_NAME, get_index, get_model, is_index_loaded, is_model_loaded
+from .index_utils import SEARCH_MODE, SEARCH_MODES
+from .cache_utils import get_ingestion_cache
+from .chunk_utils import SUMMARY_CHUNK_TOKENS, chars_to_tokens, get_tokenization_stats
+from .ingest_utils import IngestionJob, IngestionPipeline, QueueFullError
+from .storage_utils import BatchWriter, SupabaseBackend
+from .upload_utils import UPLOAD_MAX_BYTES, SpooledUpload, UploadTooLargeError, spool_upload
+from .query_utils import encode_query, get_query_stats
+from .stream_utils import LatencyTracker, ndjson, stream_from_thread
+from .warmup_utils import Warmup
+from .inference_utils import get_inference_client, get_inference_stats, inference_enabled, shutdown_inference
+from .metrics_utils import PROFILE_REQUESTS, REQUEST_SECONDS, maybe_profile, registry, render_metrics, timed
+from .admission_utils import (MINIMAL_MAX_CONCURRENT, MINIMAL_MAX_QUEUED, SEARCH_MAX_CONCURRENT, SEARCH_MAX_QUEUED,
+                              SEARCH_QUEUE_TIMEOUT, SUMMARIZE_DEADLINE, SUMMARIZE_DEGRADE, SUMMARIZE_FALLBACK_RESERVE,
+                              SUMMARIZE_MAX_CONCURRENT, SUMMARIZE_MAX_QUEUED, SUMMARIZE_QUEUE_TIMEOUT, ShedError,
+                              get_admission_stats, get_limiter)
+from .minimal_summarizer import get_minimal_summarizer, is_minimal_summarizer_loaded, summarize_text_minimal
+try:
+    from .summarizer_utils import (summarize_text, iter_summarize_text, get_available_models,
+                                   get_model_registry, get_summary_cache_stats, resolve_model_name,
+                                   load_default_model, is_default_model_loaded, SummaryBudget)
+    ML_AVAILABLE = True
+except ImportError:
+    ML_AVAILABLE = False
+    SummaryBudget = None
+    # Loaded by the warmup policy so requests never pay setup cost
+    load_default_model, is_default_model_loaded = get_minimal_summarizer, is_minimal_summarizer_loaded
+    def summarize_text(text, style="academic", **kwargs):
+        # Model, chunking and budget options only apply to the ML summarizers
+        return summarize_text_minimal(text, style)
+    def iter_summarize_text(text, style="academic", **kwargs):
+        yield {"event": "summary", "summary": summarize_text_minimal(text, style)}
+    def get_available_models():
+        return {"minimal": "rule-based extractive summarizer"}
+    get_model_registry = None
+    get_summary_cache_stats = lambda: {}
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 print("Loaded SUPABASE_URL:", SUPABASE_URL)
@@ -47,6 +76,35 @@ else:
     print("Warning: SUPABASE_URL or SUPABASE_KEY not found in environment variables")
     print("Please create a .env file with your Supabase credentials")
 
+chunk_writer: BatchWriter = BatchWriter(SupabaseBackend(supabase)) if supabase else None
+
+# Models are loaded according to WARMUP_POLICY rather than at import time
+warmup = Warmup()
+warmup.register("vector_index", get_index, is_index_loaded)
+if inference_enabled():
+    # Embedding and summarization models live in the dedicated inference process
+    warmup.register(
+        "inference_process",
+        lambda: get_inference_client().load([resolve_model_name(None)] if ML_AVAILABLE else []),
+        lambda: get_inference_client().is_running() and get_inference_client().models_loaded,
+    )
+else:
+    warmup.register("embedding_model", get_model, is_model_loaded)
+warmup.register("summarizer", load_default_model, is_default_model_loaded)
+
+def model_memory_bytes() -> dict:
+    """Weights held by this process, per loaded model"""
+    memory = {}
+    if is_model_loaded() and hasattr(get_model(), "memory_mb"):
+        memory[(EMBEDDING_MODEL_NAME,)] = get_model().memory_mb() * 1024 * 1024
+    if get_model_registry is not None:
+        for entry in get_model_registry().stats()["resident"]:
+            memory[(entry["loaded_name"],)] = entry["memory_mb"] * 1024 * 1024
+    return memory
+
+registry.gauge("papermind_model_memory_bytes", "Estimated memory of each loaded model's weights", ("model",),
+               callback=model_memory_bytes)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="PaperMind AI API",
@@ -82,6 +140,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def route_template(request: Request) -> str:
+    """Path template of the matched route, so metrics are not labelled per document or job id"""
+    for route in app.router.routes:
+        if route.matches(request.scope)[0] == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Per-route latency histogram; with PROFILE_REQUESTS, ?profile=1 samples the request's stacks"""
+    start = time.perf_counter()
+    profile = PROFILE_REQUESTS and request.query_params.get("profile") == "1"
+    with maybe_profile(profile, request.url.path.strip("/").replace("/", "_") or "root") as profile_path:
+        response = await call_next(request)
+    REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                            route=route_template(request), status=response.status_code)
+    if profile_path:
+        response.headers["X-Profile-Path"] = profile_path
+    return response
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse uploads whose declared size is over the limit before the body is read"""
+    if request.url.path == "/upload-pdf/":
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > UPLOAD_MAX_BYTES + 64 * 1024:  # Multipart overhead
+            return JSONResponse(status_code=413, content={
+                "error": f"Upload exceeds the {UPLOAD_MAX_BYTES // (1024 * 1024)} MB limit"})
+    return await call_next(request)
+
 # Root endpoint
 @app.get("/")
 def read_root():
@@ -92,14 +180,22 @@ def read_root():
         "endpoints": {
             "docs": "/docs",
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "upload": "/upload-pdf/",
+            "jobs": "/jobs/{job_id}",
             "search": "/search/",
             "summarize": "/summarize/",
-            "models": "/models/"
+            "models": "/models/",
+            "documents": "/documents/"
         }
     }
 
-# Health check endpoint for monitoring
+@app.on_event("startup")
+def start_warmup():
+    warmup.start()
+
+# Health check endpoint for monitoring (liveness: the process is up)
 @app.get("/health")
 def health_check():
     return {
@@ -109,88 +205,220 @@ def health_check():
         "version": "1.0.0"
     }
 
-# In-memory fallback storage
-stored_chunks = []
-stored_embeddings = None
+# Prometheus scrape target: stage timings, request latency, memory (per worker process)
+@app.get("/metrics")
+def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+# Readiness: 200 once the models this instance needs are loaded, 503 while warming up
+@app.get("/ready")
+def readiness_check():
+    status = warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
 
 # Pydantic schemas
 class SummarizeRequest(BaseModel):
     text: str
     model: Optional[str] = "bart"  # Default model
     style: Optional[str] = "academic"  # academic, brief, detailed
-    chunk_length: Optional[int] = 1000
+    chunk_tokens: Optional[int] = None  # Max model tokens per chunk (default SUMMARY_CHUNK_TOKENS), capped at its limit
+    chunk_length: Optional[int] = None  # Older clients: max characters per chunk, converted to tokens
+    mode: Optional[str] = "standard"  # standard, hierarchical (map-reduce for long documents)
+    max_model_calls: Optional[int] = None  # Cap on model calls
+    time_budget: Optional[float] = None  # Deadline in seconds (default SUMMARIZE_DEADLINE), queueing included
 
-from typing import Optional
+    def chunk_token_budget(self) -> int:
+        if self.chunk_tokens:
+            return self.chunk_tokens
+        if self.chunk_length:
+            return chars_to_tokens(self.chunk_length)
+        return SUMMARY_CHUNK_TOKENS
 
-@app.post("/upload-pdf/")
-async def upload_pdf(file: UploadFile = File(...)):
-    global stored_chunks, stored_embeddings
-
-    # Read and extract text
-    contents = await file.read()
-    print(f"PDF file size: {len(contents)} bytes")
-    
-    text = extract_text_from_pdf(contents)
-    print(f"Extracted text length: {len(text)}")
-    print(f"Extracted text preview: {repr(text[:200])}")
-    
-    stored_chunks = chunk_text(text)
-    print(f"Number of chunks created: {len(stored_chunks)}")
-    
-    if stored_chunks:
-        stored_embeddings = embed_chunks(stored_chunks)
-        print("Embeddings created successfully")
-    else:
-        stored_embeddings = None
-        print("No chunks to embed")
+from typing import Optional
 
+def persist_document(job: IngestionJob, upload: SpooledUpload, chunks: list, pages: list,
+                     embeddings, progress) -> str:
+    """Store an ingested PDF in Supabase (when configured) and the local vector index"""
     pdf_id = None
-    
+
     # Only use Supabase if client is available
     if supabase:
         # Upload file to Supabase Storage
-        storage_path = f"pdfs/{file.filename}"
+        storage_path = f"pdfs/{job.filename}"
         try:
-            supabase.storage.from_("papers").upload(
-                path=storage_path,
-                file=contents,
-                file_options={"content-type": file.content_type}
-            )
+            # Streamed from the spooled file rather than read into memory
+            with timed("supabase_storage_upload"), upload.open() as pdf_file:
+                supabase.storage.from_("papers").upload(
+                    path=storage_path,
+                    file=pdf_file,
+                    file_options={"content-type": job.content_type}
+                )
         except Exception as e:
-            return JSONResponse(status_code=500, content={"error": f"Upload failed: {str(e)}"})
+            raise RuntimeError(f"Upload failed: {str(e)}")
 
         # Store PDF metadata
-        pdf_resp = supabase.table("pdfs").insert({
-            "title": file.filename,
-            "storage_path": storage_path,
-        }).execute()
+        with timed("supabase_insert", items=1):
+            pdf_resp = supabase.table("pdfs").insert({
+                "title": job.filename,
+                "storage_path": storage_path,
+            }).execute()
 
         pdf_id = pdf_resp.data[0]['id'] if pdf_resp.data else None
 
-        # Save chunks
-        for i, chunk in enumerate(stored_chunks):
-            supabase.table("chunks").insert({
-                "pdf_id": pdf_id,
-                "chunk_index": i,
-                "content": chunk
-            }).execute()
+        # Save chunks in bulk batches
+        chunk_writer.write_chunks(pdf_id, chunks, embeddings, progress)
     else:
-        print("Supabase not available - storing chunks in memory only")
+        print("Supabase not available - storing chunks in local index only")
 
-    return {
-        "message": f"{len(stored_chunks)} chunks embedded and stored.",
-        "preview": stored_chunks[:2],
-        "pdf_id": pdf_id,
+    # Documents without a Supabase row still need a stable id in the local index
+    if pdf_id is None:
+        pdf_id = uuid.uuid4().hex
+
+    if chunks:
+        with timed("index_add", items=len(chunks)):
+            get_index().add(pdf_id, chunks, embeddings, pages)
+
+    return pdf_id
+
+ingestion = IngestionPipeline(
+    persist_fn=persist_document,
+    is_stored_fn=lambda pdf_id: pdf_id in get_index(),
+    cache=get_ingestion_cache()
+)
+
+@app.on_event("shutdown")
+def shutdown_ingestion():
+    ingestion.shutdown()
+    if chunk_writer:
+        chunk_writer.shutdown()
+    shutdown_inference()
+
+@app.post("/upload-pdf/")
+async def upload_pdf(file: UploadFile = File(...)):
+    try:
+        ingestion.ensure_capacity()  # Before spooling, so a full queue costs no disk writes
+        upload = await spool_upload(file)
+    except QueueFullError as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "5"})
+    except UploadTooLargeError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    finally:
+        await file.close()
+    print(f"PDF file size: {upload.size} bytes")
+
+    try:
+        job = ingestion.submit(upload, file.filename, file.content_type)
+    except QueueFullError as e:
+        upload.release()
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "5"})
+
+    return JSONResponse(status_code=202, content={
+        "message": "PDF accepted for processing.",
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
         "supabase_available": supabase is not None
+    })
+
+@app.get("/cache/stats/")
+async def cache_stats():
+    """Hit/miss counts of the ingestion (PDF, chunk embedding), summary and token count caches"""
+    return {
+        "ingestion": get_ingestion_cache().stats(),
+        "summaries": get_summary_cache_stats(),
+        "tokenization": get_tokenization_stats()
     }
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, per-stage progress and timing of an upload"""
+    status = ingestion.get_status(job_id)
+    if status is None:
+        return JSONResponse(status_code=404, content={"error": f"Job {job_id} not found."})
+    return status
+
+search_latency = {mode: LatencyTracker() for mode in SEARCH_MODES}  # Per retrieval mode
+
+# Admission control: summaries, their rule-based fallback and searches are limited separately
+summarize_limiter = get_limiter("summarize", SUMMARIZE_MAX_CONCURRENT, SUMMARIZE_MAX_QUEUED, SUMMARIZE_QUEUE_TIMEOUT)
+minimal_limiter = get_limiter("summarize_minimal", MINIMAL_MAX_CONCURRENT, MINIMAL_MAX_QUEUED,
+                              SUMMARIZE_QUEUE_TIMEOUT)
+search_limiter = get_limiter("search", SEARCH_MAX_CONCURRENT, SEARCH_MAX_QUEUED, SEARCH_QUEUE_TIMEOUT)
+
+def shed_response(error: ShedError) -> JSONResponse:
+    return JSONResponse(status_code=error.status_code, content={"error": str(error)},
+                        headers={"Retry-After": str(error.retry_after)})
+
+def can_degrade() -> bool:
+    """Overloaded model summaries fall back to the rule-based summarizer"""
+    return SUMMARIZE_DEGRADE and ML_AVAILABLE
+
+def model_wait(deadline: float) -> float:
+    """How long a summary may wait for a model slot: its deadline, less the time kept for the fallback"""
+    remaining = deadline - time.monotonic()
+    return max(remaining - SUMMARIZE_FALLBACK_RESERVE, 0.0) if can_degrade() else remaining
+
+async def minimal_summary(text: str, style: str, deadline: float) -> str:
+    """Rule-based summary in its own lane; raises ShedError if that is full too"""
+    async with minimal_limiter.slot(timeout=deadline - time.monotonic()):
+        summary = await minimal_limiter.run(summarize_text_minimal, text, style)
+    summarize_limiter.record_degraded()
+    return summary
+
 @app.post("/search/")
-async def semantic_search(query: str = Form(...)):
-    if not stored_chunks or stored_embeddings is None:
+async def semantic_search(query: str = Form(...), pdf_id: Optional[str] = Form(None),
+                          top_k: int = Form(3), mode: Optional[str] = Form(None)):
+    mode = mode or SEARCH_MODE
+    if mode not in SEARCH_MODES:
+        return JSONResponse(status_code=400, content={"error": f"Unknown search mode '{mode}', expected one of {list(SEARCH_MODES)}."})
+    index = get_index()
+    if len(index) == 0:
         return {"error": "No PDF uploaded yet."}
 
-    results = search_chunks(query, stored_chunks, stored_embeddings)
-    return {"results": results}
+    started = time.perf_counter()
+    pdf_ids = [pdf_id] if pdf_id else None
+    try:
+        async with search_limiter.slot():
+            if mode == "lexical":
+                # Keyword fast path: no query embedding, no model call
+                matches = await search_limiter.run(index.lexical_search, query, top_k=top_k, doc_ids=pdf_ids)
+            else:
+                query_embedding = await encode_query(query)
+                # Scoring scans every shard: keep it off the event loop, on the search lane's threads
+                if mode == "hybrid":
+                    matches = await search_limiter.run(index.hybrid_search, query, query_embedding,
+                                                       top_k=top_k, doc_ids=pdf_ids)
+                else:
+                    matches = await search_limiter.run(index.search, query_embedding, top_k=top_k, doc_ids=pdf_ids)
+    except ShedError as e:
+        return shed_response(e)
+    search_latency[mode].record((time.perf_counter() - started) * 1000)
+    return {
+        "results": [m["content"] for m in matches],
+        "matches": matches,
+        "mode": mode
+    }
+
+@app.get("/search/stats/")
+async def search_stats():
+    """Query embedding cache and batching statistics, and latency per retrieval mode"""
+    return dict(get_query_stats(), latency={mode: t.stats() for mode, t in search_latency.items()})
+
+@app.get("/inference/stats/")
+async def inference_stats():
+    """Per-lane queue depth, batch sizes and wait times of the inference process"""
+    return get_inference_stats()
+
+@app.get("/documents/")
+async def list_documents():
+    """List documents held in the vector index"""
+    return {"documents": get_index().documents()}
+
+@app.delete("/documents/{pdf_id}")
+async def delete_document(pdf_id: str):
+    """Remove a document's vectors from the index"""
+    if not get_index().delete(pdf_id):
+        return JSONResponse(status_code=404, content={"error": f"Document {pdf_id} not found."})
+    return {"message": f"Document {pdf_id} removed from index."}
 
 @app.post("/summarize/")
 async def summarize_local(data: SummarizeRequest):
@@ -198,21 +426,138 @@ async def summarize_local(data: SummarizeRequest):
     if not text:
         return JSONResponse(status_code=400, content={"error": "No text provided."})
 
+    deadline = time.monotonic() + (data.time_budget if data.time_budget is not None else SUMMARIZE_DEADLINE)
     try:
-        summary = summarize_text(
-            text, 
-            max_chunk_length=data.chunk_length,
-            model=data.model,
-            style=data.style
-        )
+        async with summarize_limiter.slot(timeout=model_wait(deadline)):
+            # The model gets whatever time queueing left; chunks past the deadline are summarized extractively
+            budget = SummaryBudget(data.max_model_calls, deadline - time.monotonic()) if ML_AVAILABLE else None
+            summary = await summarize_limiter.run(
+                summarize_text,
+                text, 
+                max_chunk_length=data.chunk_token_budget(),
+                model=data.model,
+                style=data.style,
+                mode=data.mode,
+                budget=budget
+            )
         return {
             "summary": summary,
             "model_used": data.model,
-            "style": data.style
+            "style": data.style,
+            "mode": data.mode,
+            "partial": budget is not None and budget.partial,
+            "degraded": False
+        }
+    except ShedError as e:
+        if not can_degrade():
+            return shed_response(e)
+        try:
+            summary = await minimal_summary(text, data.style, deadline)
+        except ShedError as minimal_error:
+            return shed_response(minimal_error)
+        return {
+            "summary": summary,
+            "model_used": "minimal",
+            "style": data.style,
+            "mode": data.mode,
+            "partial": False,
+            "degraded": True
         }
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+stream_first_chunk = LatencyTracker()  # Time to first streamed chunk summary
+stream_total = LatencyTracker()
+
+@app.post("/summarize/stream")
+async def summarize_stream(data: SummarizeRequest, request: Request):
+    """Stream chunk summaries as NDJSON as soon as they are produced, then the combined summary"""
+    if not data.text:
+        return JSONResponse(status_code=400, content={"error": "No text provided."})
+
+    deadline = time.monotonic() + (data.time_budget if data.time_budget is not None else SUMMARIZE_DEADLINE)
+    degraded = False
+    try:
+        # The slot itself is taken inside the stream; once taken it belongs to the worker thread
+        summarize_limiter.ensure_capacity()
+    except ShedError as e:
+        if not can_degrade():
+            return shed_response(e)
+        degraded = True
+
+    async def degraded_events(started: float):
+        try:
+            summary = await minimal_summary(data.text, data.style, deadline)
+        except ShedError as e:
+            yield ndjson({"event": "error", "error": str(e), "status_code": e.status_code})
+            return
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        yield ndjson({"event": "summary", "summary": summary, "model_used": "minimal", "style": data.style,
+                      "partial": False, "degraded": True, "time_to_first_chunk_ms": elapsed_ms,
+                      "total_ms": elapsed_ms})
+
+    async def events():
+        started = time.perf_counter()
+        first_ms = None
+        yield ndjson({"event": "start", "model": data.model, "style": data.style})
+        if not degraded:
+            try:
+                await summarize_limiter.acquire(timeout=model_wait(deadline))
+            except ShedError as e:
+                if not can_degrade():
+                    yield ndjson({"event": "error", "error": str(e), "status_code": e.status_code})
+                    return
+            else:
+                budget = SummaryBudget(data.max_model_calls, deadline - time.monotonic()) if ML_AVAILABLE else None
+
+                def produce(cancel):
+                    return iter_summarize_text(
+                        data.text,
+                        max_chunk_length=data.chunk_token_budget(),
+                        model=data.model,
+                        style=data.style,
+                        cancel_event=cancel,
+                        budget=budget
+                    )
+
+                try:
+                    # Nothing is awaited between taking the slot and starting the worker, which gives
+                    # it back when generation has really stopped, not when the client goes away
+                    async for event in stream_from_thread(produce, request, executor=summarize_limiter.executor,
+                                                          on_done=summarize_limiter.release):
+                        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+                        if first_ms is None:
+                            first_ms = elapsed_ms
+                            stream_first_chunk.record(first_ms)
+                        if event["event"] == "summary":
+                            stream_total.record(elapsed_ms)
+                            event.update(model_used=data.model, style=data.style,
+                                         partial=budget is not None and budget.partial, degraded=False,
+                                         time_to_first_chunk_ms=first_ms, total_ms=elapsed_ms)
+                        else:
+                            event["elapsed_ms"] = elapsed_ms
+                        yield ndjson(event)
+                except Exception as e:
+                    yield ndjson({"event": "error", "error": str(e)})
+                return
+        async for line in degraded_events(started):
+            yield line
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.get("/admission/stats/")
+async def admission_stats():
+    """Per-endpoint concurrency, queue depth, queue wait, shed and degraded request counts"""
+    return get_admission_stats()
+
+@app.get("/summarize/stream/stats")
+async def summarize_stream_stats():
+    """Time-to-first-chunk and total latency of streamed summaries"""
+    return {
+        "time_to_first_chunk": stream_first_chunk.stats(),
+        "total": stream_total.stats()
+    }
+
 @app.get("/models/")
 async def get_models():
     """Get available summarization models"""
@@ -220,3 +565,20 @@ async def get_models():
         "available_models": get_available_models(),
         "styles": ["academic", "brief", "detailed"]
     }
+
+@app.get("/models/loaded/")
+async def get_loaded_models():
+    """Resident summarization models, their load times and memory use"""
+    if not ML_AVAILABLE:
+        return {"resident": [], "ml_available": False}
+    return get_model_registry().stats()
+
+@app.post("/models/{model}/preload")
+async def preload_model(model: str):
+    """Start loading a summarization model in the background"""
+    if not ML_AVAILABLE:
+        return JSONResponse(status_code=400, content={"error": "ML models are not available."})
+    if model not in get_available_models():
+        return JSONResponse(status_code=404, content={"error": f"Unknown model '{model}'."})
+    started = get_model_registry().preload(resolve_model_name(model))
+    return {"model": model, "status": "loading" if started else "already loaded or loading"}
@@ -0,0 +1,296 @@
+# app/metrics_utils.py
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "false").lower() == "true"  # Allow ?profile=1 per request
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))          # Stack sampling period
+PROFILE_DIR = os.getenv(  # Collapsed-stack profiles
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "profiles")
+)
+
+# Seconds; spans a millisecond cache hit to a multi-minute summary
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> str:
+        return f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> str:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + "".join(
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}\n" for key, value in values)
+
+
+class Gauge(_Metric):
+    """Current value per label set; `callback` returns {label values: value} at scrape time instead"""
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> str:
+        if self.callback is not None:
+            try:
+                values = list(self.callback().items())
+            except Exception as e:
+                print(f"Gauge {self.name} callback failed: {e}")
+                values = []
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return self.header() + "".join(
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}\n" for key, value in values)
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observations per label set"""
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts, sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> Tuple[float, int]:
+        """(sum, count) of one label set"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return (series[1], series[2]) if series else (0.0, 0)
+
+    def render(self) -> str:
+        with self._lock:
+            series = [(key, list(s[0]), s[1], s[2]) for key, s in self._series.items()]
+        lines = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}\n")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}\n")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}\n")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}\n")
+        return self.header() + "".join(lines)
+
+
+class MetricsRegistry:
+    """Named metrics of this process, rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (), callback=None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, callback=callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "papermind_stage_duration_seconds", "Time spent in each pipeline stage", ("stage",))
+STAGE_ITEMS = registry.counter(
+    "papermind_stage_items_total", "Items (pages, chunks, texts, rows) processed by each stage", ("stage",))
+STAGE_ERRORS = registry.counter(
+    "papermind_stage_errors_total", "Stage calls that raised an exception", ("stage",))
+REQUEST_SECONDS = registry.histogram(
+    "papermind_http_request_duration_seconds", "Time to the response headers, per route",
+    ("method", "route", "status"))
+
+
+@contextmanager
+def timed(stage: str, items: int = 0):
+    """Record the duration, item count and failure of one stage call"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+        if items:
+            STAGE_ITEMS.inc(items, stage=stage)
+
+
+def record_stage(stage: str, seconds: float, items: int = 0):
+    """Record a stage timed elsewhere, e.g. in a worker process"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if items:
+        STAGE_ITEMS.inc(items, stage=stage)
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Bytes on macOS, kilobytes on Linux
+
+
+registry.gauge("process_resident_memory_bytes", "Resident set size of this worker process",
+               callback=lambda: {(): current_rss_bytes()})
+registry.gauge("papermind_peak_resident_memory_bytes", "Peak resident set size of this worker process",
+               callback=lambda: {(): peak_rss_bytes()})
+
+
+class SamplingProfiler:
+    """Sample the stacks of all other threads at a fixed interval and tally them as collapsed stacks"""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.stacks = TallyCounter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if names:
+                    self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path: str):
+        """Collapsed-stack format, readable by flamegraph.pl and speedscope"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+_profile_lock = threading.Lock()  # Profiles sample every thread, so only one request is profiled at a time
+
+
+@contextmanager
+def maybe_profile(enabled: bool, label: str, directory: str = PROFILE_DIR):
+    """Profile the enclosed block if enabled and no other profile is running; yields the output path or None"""
+    if not enabled or not _profile_lock.acquire(blocking=False):
+        yield None
+        return
+    path = str(Path(directory) / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{label}.folded")
+    profiler = SamplingProfiler().start()
+    try:
+        yield path
+    finally:
+        profiler.stop()
+        _profile_lock.release()
+        profiler.write(path)
+        print(f"Profile of {label}: {profiler.samples} samples written to {path}")
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -1,67 +1,180 @@
 # app/minimal_summarizer.py
-import nltk
+import os
 import re
+import threading
+import numpy as np
 from typing import List
 from collections import Counter
 import math
 
+from .metrics_utils import timed
+from .normalize_utils import normalize_whitespace
+
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+TEXTRANK_MAX_SENTENCES = int(os.getenv("TEXTRANK_MAX_SENTENCES", "2000"))  # Cap on the dense similarity graph
+
+def top_k_in_order(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores (ties go to the earlier index), in document order.
+    
+    Uses a partition instead of a full sort, and matches what a stable descending
+    sort followed by [:k] would select.
+    """
+    n = len(scores)
+    if k >= n:
+        return np.arange(n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    threshold = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    return np.sort(np.concatenate([above, ties]))
+
+class SentenceTermMatrix:
+    """Sparse sentence x term counts built from one tokenization pass (COO triplets)"""
+    
+    def __init__(self, sentences: List[str], stopwords: set):
+        token_lists = [TOKEN_PATTERN.findall(sentence.lower()) for sentence in sentences]
+        tokens = [word for words in token_lists for word in words]
+        sentence_ids = np.repeat(np.arange(len(sentences)), [len(words) for words in token_lists])
+        self.n_sentences = len(sentences)
+        
+        # Vocabulary from a hash pass (dict.fromkeys keeps first-seen order at C speed)
+        vocabulary = list(dict.fromkeys(tokens))
+        lookup = dict(zip(vocabulary, range(len(vocabulary))))
+        all_ids = np.fromiter(map(lookup.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+        
+        # Keep content words only (same rule as the original scorer), remapping ids densely
+        content = np.array([len(word) > 2 and word not in stopwords for word in vocabulary], dtype=bool)
+        remap = np.cumsum(content) - 1
+        keep = content[all_ids] if len(all_ids) else np.zeros(0, dtype=bool)
+        self.vocabulary = [word for word, is_content in zip(vocabulary, content) if is_content]
+        self.term_ids = remap[all_ids[keep]]
+        self.sentence_ids = sentence_ids[keep]
+        
+        # Collapse repeated (sentence, term) pairs into counts
+        n_terms = max(len(self.vocabulary), 1)
+        pairs, counts = np.unique(self.sentence_ids * n_terms + self.term_ids, return_counts=True)
+        self.rows = pairs // n_terms
+        self.cols = pairs % n_terms
+        self.counts = counts.astype(np.float64)
+    
+    def frequency_scores(self) -> np.ndarray:
+        """Average corpus frequency of a sentence's content words"""
+        freq = np.bincount(self.term_ids, minlength=len(self.vocabulary)).astype(np.float64)
+        totals = np.bincount(self.sentence_ids, weights=freq[self.term_ids], minlength=self.n_sentences)
+        lengths = np.bincount(self.sentence_ids, minlength=self.n_sentences)
+        return np.divide(totals, lengths, out=np.zeros(self.n_sentences), where=lengths > 0)
+    
+    def tfidf_weights(self) -> np.ndarray:
+        df = np.bincount(self.cols, minlength=len(self.vocabulary))
+        idf = np.log((1 + self.n_sentences) / (1 + df)) + 1.0
+        return self.counts * idf[self.cols]
+    
+    def tfidf_scores(self) -> np.ndarray:
+        """Mean TF-IDF weight per content word of each sentence"""
+        totals = np.bincount(self.rows, weights=self.tfidf_weights(), minlength=self.n_sentences)
+        lengths = np.bincount(self.rows, weights=self.counts, minlength=self.n_sentences)
+        return np.divide(totals, lengths, out=np.zeros(self.n_sentences), where=lengths > 0)
+    
+    def textrank_scores(self, damping: float = 0.85, iterations: int = 30,
+                        max_sentences: int = TEXTRANK_MAX_SENTENCES) -> np.ndarray:
+        """PageRank over the TF-IDF cosine similarity graph of sentences.
+        
+        The graph is dense, so very long documents are ranked among their
+        max_sentences best TF-IDF candidates only; other sentences score 0.
+        """
+        n = self.n_sentences
+        weights = self.tfidf_weights()
+        candidates = top_k_in_order(self.tfidf_scores(), max_sentences)
+        position = np.full(n, -1, dtype=np.int64)
+        position[candidates] = np.arange(len(candidates))
+        
+        # Row-normalized TF-IDF vectors of the candidate sentences
+        inside = position[self.rows] >= 0
+        x = np.zeros((len(candidates), max(len(self.vocabulary), 1)))
+        np.add.at(x, (position[self.rows[inside]], self.cols[inside]), weights[inside])
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        x /= np.where(norms > 0, norms, 1.0)
+        
+        similarity = x @ x.T
+        np.fill_diagonal(similarity, 0.0)
+        out_weight = similarity.sum(axis=1, keepdims=True)
+        transition = similarity / np.where(out_weight > 0, out_weight, 1.0)
+        
+        m = len(candidates)
+        rank = np.full(m, 1.0 / max(m, 1))
+        for _ in range(iterations):
+            rank = (1 - damping) / max(m, 1) + damping * (transition.T @ rank)
+        scores = np.zeros(n)
+        scores[candidates] = rank
+        return scores
+
+# Bundled copy of NLTK's English stopword list, so no corpus download is needed
+ENGLISH_STOPWORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves
+he him his himself she she's her hers herself it it's its itself they them their theirs themselves
+what which who whom this that that'll these those am is are was were be been being have has had
+having do does did doing a an the and but if or because as until while of at by for with about
+against between into through during before after above below to from up down in out on off over
+under again further then once here there when where why how all any both each few more most other
+some such no nor not only own same so than too very s t can will just don don't should should've
+now d ll m o re ve y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn
+hasn't haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn
+shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+""".split())
+
+def regex_sent_tokenize(text: str) -> List[str]:
+    """Split after sentence-ending punctuation followed by whitespace"""
+    return [sentence for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+def regex_word_tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+def _local_punkt():
+    """NLTK's punkt sentence tokenizer if its data is already installed; never downloads"""
+    try:
+        from nltk.tokenize import sent_tokenize
+        sent_tokenize("Probe sentence. Another one.")  # Raises LookupError when punkt is missing
+        return sent_tokenize
+    except Exception:
+        return None
+
 class MinimalSummarizer:
     """Ultra-lightweight extractive summarizer without ML models"""
     
-    def __init__(self):
-        """Initialize with NLTK data"""
-        try:
-            # Download required NLTK data (small)
-            nltk.download('punkt', quiet=True)
-            nltk.download('stopwords', quiet=True)
-            from nltk.corpus import stopwords
-            from nltk.tokenize import sent_tokenize, word_tokenize
-            self.stopwords = set(stopwords.words('english'))
-            self.sent_tokenize = sent_tokenize
-            self.word_tokenize = word_tokenize
-        except:
-            # Fallback if NLTK fails
-            self.stopwords = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'])
-            self.sent_tokenize = lambda x: re.split(r'[.!?]+', x)
-            self.word_tokenize = lambda x: re.findall(r'\b\w+\b', x.lower())
+    def __init__(self, use_nltk: bool = True):
+        """Initialize from bundled resources; uses locally installed NLTK punkt when available"""
+        self.stopwords = ENGLISH_STOPWORDS
+        self.sent_tokenize = (_local_punkt() if use_nltk else None) or regex_sent_tokenize
+        self.word_tokenize = regex_word_tokenize
     
-    def extractive_summarize(self, text: str, num_sentences: int = 3) -> str:
-        """Create extractive summary using TF-IDF-like scoring"""
+    def extractive_summarize(self, text: str, num_sentences: int = 3, method: str = "frequency") -> str:
+        """Create extractive summary by scoring sentences in bulk.
+        
+        method: "frequency" (average word frequency), "tfidf" or "textrank".
+        """
         # Clean and preprocess text
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = normalize_whitespace(text)
         
         # Split into sentences
-        sentences = self.sent_tokenize(text)
+        with timed("minimal_sentence_split"):
+            sentences = self.sent_tokenize(text)
         if len(sentences) <= num_sentences:
             return text
         
-        # Calculate word frequencies
-        word_freq = {}
-        for sentence in sentences:
-            words = self.word_tokenize(sentence.lower())
-            for word in words:
-                if word not in self.stopwords and len(word) > 2:
-                    word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Score sentences based on word frequencies
-        sentence_scores = {}
-        for i, sentence in enumerate(sentences):
-            words = self.word_tokenize(sentence.lower())
-            score = 0
-            word_count = 0
-            for word in words:
-                if word in word_freq:
-                    score += word_freq[word]
-                    word_count += 1
-            
-            if word_count > 0:
-                sentence_scores[i] = score / word_count
+        # Tokenize once into a sparse sentence x term matrix and score every sentence together
+        with timed("minimal_score", items=len(sentences)):
+            matrix = SentenceTermMatrix(sentences, self.stopwords)
+            if method == "textrank":
+                scores = matrix.textrank_scores()
+            elif method == "tfidf":
+                scores = matrix.tfidf_scores()
             else:
-                sentence_scores[i] = 0
+                scores = matrix.frequency_scores()
         
-        # Get top sentences
-        top_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:num_sentences]
-        top_sentences = sorted([idx for idx, score in top_sentences])  # Maintain order
+        # Get top sentences, maintaining document order
+        top_sentences = top_k_in_order(scores, num_sentences)
         
         # Create summary
         summary_sentences = [sentences[idx] for idx in top_sentences]
@@ -70,7 +183,8 @@ class MinimalSummarizer:
     def abstractive_summary(self, text: str, style: str = "academic") -> str:
         """Simple rule-based abstractive summary"""
         # Extract key information
-        sentences = self.sent_tokenize(text)
+        with timed("minimal_sentence_split"):
+            sentences = self.sent_tokenize(text)
         
         # Find sentences with key academic indicators
         key_indicators = {
@@ -81,23 +195,25 @@ class MinimalSummarizer:
         
         indicators = key_indicators.get(style, key_indicators['academic'])
         
-        # Score sentences by key indicators
-        scored_sentences = []
-        for sentence in sentences:
-            score = sum(1 for indicator in indicators if indicator.lower() in sentence.lower())
-            scored_sentences.append((sentence, score))
-        
-        # Sort by score and take top sentences
-        scored_sentences.sort(key=lambda x: x[1], reverse=True)
+        # Score sentences by key indicators. A plain substring test per sentence: a fixed-width
+        # numpy string array would pad every row to the longest sentence
+        indicators = [indicator.lower() for indicator in indicators]
+        with timed("minimal_score", items=len(sentences)):
+            scores = np.fromiter((sum(indicator in lowered for indicator in indicators)
+                                  for lowered in (sentence.lower() for sentence in sentences)),
+                                 dtype=np.int64, count=len(sentences))
         
         if style == "brief":
-            num_sentences = min(2, len(scored_sentences))
+            num_sentences = min(2, len(sentences))
         elif style == "detailed":
-            num_sentences = min(5, len(scored_sentences))
+            num_sentences = min(5, len(sentences))
         else:  # academic
-            num_sentences = min(3, len(scored_sentences))
+            num_sentences = min(3, len(sentences))
         
-        summary = ' '.join([sent[0] for sent in scored_sentences[:num_sentences]])
+        # Take top sentences, highest score first (ties keep document order)
+        top = top_k_in_order(scores.astype(np.float64), num_sentences)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        summary = ' '.join([sentences[i] for i in top])
         
         # If no high-scoring sentences, fall back to extractive
         if not summary.strip():
@@ -105,7 +221,21 @@ class MinimalSummarizer:
         
         return summary
 
+_minimal_summarizer = None  # Shared instance, created once
+_minimal_lock = threading.Lock()
+
+def get_minimal_summarizer() -> MinimalSummarizer:
+    """Create the shared summarizer once; call at startup to keep setup off the request path"""
+    global _minimal_summarizer
+    if _minimal_summarizer is None:
+        with _minimal_lock:
+            if _minimal_summarizer is None:
+                _minimal_summarizer = MinimalSummarizer()
+    return _minimal_summarizer
+
+def is_minimal_summarizer_loaded() -> bool:
+    return _minimal_summarizer is not None
+
 def summarize_text_minimal(text: str, style: str = "academic") -> str:
     """Minimal summarization function"""
-    summarizer = MinimalSummarizer()
-    return summarizer.abstractive_summary(text, style)
+    return get_minimal_summarizer().abstractive_summary(text, style)
@@ -0,0 +1,103 @@
+# app/normalize_utils.py
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+NORMALIZE_SEGMENT_CHARS = int(os.getenv("NORMALIZE_SEGMENT_CHARS", "65536"))  # Long texts are cleaned in pieces
+EMBED_TEXT_CLEANUP = os.getenv("EMBED_TEXT_CLEANUP", "")  # Rules applied before embedding (default: whitespace only)
+SUMMARY_TEXT_CLEANUP = os.getenv("SUMMARY_TEXT_CLEANUP", "citations,figures,urls,et_al")  # ... before summarizing
+
+_LINK_END = r'\S*[^\s.,;:)\]]'  # Trailing punctuation stays, so a link ending a sentence keeps its full stop
+
+
+def _removal(first: str, rest: str) -> str:
+    """Pattern for text to delete, starting with `first`. When a space precedes it, one space after
+    it goes too, so the deletion does not leave a double space that needs another pass"""
+    return rf'{first}(?:(?<= {first}){rest} ?|{rest})'
+
+
+# Cleanup rules: (pattern, replacement) pairs. Every pattern starts with a literal (or a small set
+# of capitals), which sre finds with its fast prefix search; a `\b`, group or `\s*` in front, or
+# merging the rules into one alternation, falls back to trying the pattern at every position
+RULES: Dict[str, List[Tuple[str, str]]] = {
+    # [12], [3, 4], [5-7]
+    "citations": [(_removal(r'\[', r'\d+(?:\s*[,;–-]\s*\d+)*\]'), '')],
+    # "(Fig. 2)", "Table 1" and "Figure 3: caption text." up to the end of the caption sentence
+    "figures": [(_removal(r'\(', r'\s*(?:see\s+)?(?:Figure|Fig\.|Table|Tab\.)\s*\d+[a-z]?\s*\)'), ''),
+                (_removal(r'[FT]', r'(?<=\b[FT])(?:igure|ig\.|able|ab\.)\s*\d+[a-z]?(?::[^.!?]*[.!?]?)?'), '')],
+    "urls": [(_removal('http', rf's?://{_LINK_END}'), ''), (_removal('doi:', _LINK_END), ''),
+             (_removal('DOI:', _LINK_END), '')],
+    # Also keeps "al." from ending a sentence
+    "et_al": [(r'et al\.(?<=\bet al\.)', 'and colleagues')],
+}
+
+# A sentence end that is not an abbreviation this module knows about; long texts are only cut here
+_SEGMENT_BOUNDARY = re.compile(r'(?<![Ff]ig\.)(?<!Tab\.)(?<!al\.)(?<=[.!?])\s+')
+
+
+def is_collapsed(text: str) -> bool:
+    """True if text has no whitespace but single inner spaces (every other whitespace character
+    is unprintable), checked without splitting it"""
+    return text.isprintable() and '  ' not in text and not text.startswith(' ') and not text.endswith(' ')
+
+
+class TextNormalizer:
+    """Cleans text with the chosen rules (compiled once), then collapses whitespace.
+
+    Long texts are processed in segments of about segment_chars: each piece goes through every
+    rule while it is cache-hot, and no full-size intermediate copy of the document is made.
+    """
+
+    def __init__(self, rules: Iterable[str] = (), segment_chars: int = NORMALIZE_SEGMENT_CHARS):
+        self.rules = tuple(rule for rule in rules if rule)
+        unknown = [rule for rule in self.rules if rule not in RULES]
+        if unknown:
+            raise ValueError(f"Unknown text cleanup rules: {', '.join(unknown)}")
+        self.segment_chars = segment_chars
+        self.patterns = [(re.compile(pattern), replacement)
+                         for rule in self.rules for pattern, replacement in RULES[rule]]
+
+    def normalize(self, text: str) -> str:
+        for pattern, replacement in self.patterns:
+            text = pattern.sub(replacement, text)
+        if is_collapsed(text):
+            return text  # e.g. page text pdf_utils already cleaned: skip the copy
+        return ' '.join(text.split())
+
+    def segments(self, text: str) -> Iterator[str]:
+        """Split a long text at sentence ends into pieces of about segment_chars"""
+        start = 0
+        while len(text) - start > self.segment_chars:
+            boundary = _SEGMENT_BOUNDARY.search(text, start + self.segment_chars)
+            if boundary is None:
+                break
+            yield text[start:boundary.start()]
+            start = boundary.end()
+        yield text[start:] if start else text
+
+    def iter_normalized(self, texts: Iterable[str], collapsed: bool = False) -> Iterator[str]:
+        """Yield cleaned, non-empty segments of each text (e.g. page texts) as they are consumed,
+        so a large document is never copied whole. With collapsed=True the texts are already
+        whitespace-normalized (pdf_utils page texts): without cleanup rules they pass through as is"""
+        if collapsed and not self.patterns:
+            yield from (text for text in texts if text)
+            return
+        for text in texts:
+            for segment in self.segments(text):
+                segment = self.normalize(segment)
+                if segment:
+                    yield segment
+
+
+def _rules(spec: str) -> Tuple[str, ...]:
+    return tuple(rule.strip() for rule in spec.split(",") if rule.strip())
+
+
+WHITESPACE_NORMALIZER = TextNormalizer()
+EMBED_NORMALIZER = TextNormalizer(_rules(EMBED_TEXT_CLEANUP))
+SUMMARY_NORMALIZER = TextNormalizer(_rules(SUMMARY_TEXT_CLEANUP))
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse all whitespace runs to single spaces"""
+    return WHITESPACE_NORMALIZER.normalize(text)
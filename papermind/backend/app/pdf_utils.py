@@ -1,23 +1,173 @@
 # app/pdf_utils.py
+import io
 from io import BytesIO
-from pdfminer.high_level import extract_text
+from pdfminer.high_level import extract_text, extract_pages
+from pdfminer.layout import LTTextContainer
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple, Union
 import logging
+import mmap
+import multiprocessing
+import os
+import time
+
+from .metrics_utils import record_stage, timed
+from .normalize_utils import normalize_whitespace
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))  # Smaller files are parsed inline
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))
+
+PdfSource = Union[bytes, str, os.PathLike]  # PDF bytes, or the path of a PDF file
+
+class _MappedFile(io.RawIOBase):
+    """Read-only file object over a memory map (pdfminer only accepts io.IOBase instances)"""
+
+    def __init__(self, mapped: mmap.mmap):
+        self._map = mapped
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        return self._map.read(size if size is not None and size >= 0 else None)
+
+    def readinto(self, buffer) -> int:
+        data = self._map.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._map.seek(offset, whence)
+        return self._map.tell()
+
+    def tell(self) -> int:
+        return self._map.tell()
+
+@contextmanager
+def open_pdf(source: PdfSource):
+    """File-like view of a PDF: bytes are wrapped, files are memory-mapped instead of read into memory"""
+    if isinstance(source, (bytes, bytearray)):
+        yield BytesIO(source)
+        return
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield BytesIO(b"")  # Empty files cannot be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield _MappedFile(mapped)
+
+def extract_text_from_pdf(file_bytes: PdfSource, page_range: Optional[Tuple[int, int]] = None) -> str:
+    """Extract text from PDF bytes (or a PDF file) with error handling"""
+    if page_range is not None:
+        return ' '.join(text for _, text in iter_pdf_pages(file_bytes, page_range) if text)
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    """Extract text from PDF bytes with error handling"""
     try:
-        pdf_stream = BytesIO(file_bytes)
-        text = extract_text(pdf_stream)
-        
+        # Without caching, parsed objects (e.g. scanned page images) are freed after each page
+        with open_pdf(file_bytes) as pdf_stream, timed("pdf_extract"):
+            text = extract_text(pdf_stream, caching=False)
+
         # Clean up the extracted text
         if text:
             # Remove excessive whitespace and normalize
-            text = ' '.join(text.split())
+            text = normalize_whitespace(text)
             return text
         else:
             print("Warning: No text extracted from PDF")
             return ""
-            
+
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
         return ""
+
+def count_pdf_pages(file_bytes: PdfSource) -> int:
+    """Read the page count from the document catalog without parsing page content"""
+    try:
+        with open_pdf(file_bytes) as pdf_stream, timed("pdf_count_pages"):
+            document = PDFDocument(PDFParser(pdf_stream))
+            count = resolve1(document.catalog['Pages']).get('Count')
+            if isinstance(count, int) and count > 0:
+                return count
+            return sum(1 for _ in PDFPage.create_pages(document))
+    except Exception as e:
+        print(f"Error counting PDF pages: {e}")
+        return 0
+
+def _extract_page_texts(file_bytes: PdfSource, page_indexes: List[int]) -> List[Tuple[int, str]]:
+    """Extract normalized text for the given 0-based pages (runs in a worker process)"""
+    results = []
+    try:
+        with open_pdf(file_bytes) as pdf_stream:
+            layouts = extract_pages(pdf_stream, page_numbers=page_indexes, caching=False)
+            for index, layout in zip(sorted(page_indexes), layouts):
+                text = ''.join(element.get_text() for element in layout
+                               if isinstance(element, LTTextContainer))
+                results.append((index + 1, normalize_whitespace(text)))
+    except Exception as e:
+        print(f"Error extracting pages {page_indexes[0] + 1}-{page_indexes[-1] + 1}: {e}")
+    # Keep one entry per requested page so callers can rely on page order
+    found = {page for page, _ in results}
+    results.extend((index + 1, "") for index in page_indexes if index + 1 not in found)
+    return sorted(results)
+
+def _extract_page_texts_timed(file_bytes: PdfSource, page_indexes: List[int]) -> Tuple[List[Tuple[int, str]], float]:
+    """_extract_page_texts plus its duration, for worker processes whose own metrics are not scraped"""
+    start = time.perf_counter()
+    results = _extract_page_texts(file_bytes, page_indexes)
+    return results, time.perf_counter() - start
+
+def _page_indexes(file_bytes: PdfSource, page_range: Optional[Tuple[int, int]]) -> List[int]:
+    total = count_pdf_pages(file_bytes)
+    first, last = page_range if page_range else (1, total)
+    first, last = max(1, first), min(total, last)
+    return list(range(first - 1, last))
+
+def iter_pdf_pages(file_bytes: PdfSource, page_range: Optional[Tuple[int, int]] = None,
+                   executor: Optional[Executor] = None, workers: int = PDF_EXTRACT_WORKERS,
+                   pages_per_task: int = PDF_PAGES_PER_TASK) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) in page order as soon as each page is parsed.
+
+    page_range is a 1-based inclusive (first, last) tuple. Pages are farmed out to
+    `executor` (or a temporary process pool) in batches of `pages_per_task`. Pass a file
+    path rather than bytes for large PDFs: workers then map the file instead of each
+    receiving a pickled copy.
+    """
+    indexes = _page_indexes(file_bytes, page_range)
+    if not indexes:
+        return
+
+    if executor is None and (workers <= 1 or len(indexes) < PDF_PARALLEL_MIN_PAGES):
+        for start in range(0, len(indexes), pages_per_task):
+            batch = indexes[start:start + pages_per_task]
+            with timed("pdf_extract", items=len(batch)):
+                results = _extract_page_texts(file_bytes, batch)
+            yield from results
+        return
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [executor.submit(_extract_page_texts_timed, file_bytes, indexes[start:start + pages_per_task])
+                   for start in range(0, len(indexes), pages_per_task)]
+        for future in futures:
+            results, seconds = future.result()
+            record_stage("pdf_extract", seconds, len(results))
+            yield from results
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def extract_pages_from_pdf(file_bytes: PdfSource, page_range: Optional[Tuple[int, int]] = None,
+                           executor: Optional[Executor] = None) -> List[Tuple[int, str]]:
+    """Page-parallel extraction returning (page_number, text) for every page in order"""
+    return list(iter_pdf_pages(file_bytes, page_range, executor=executor))
@@ -0,0 +1,170 @@
+# app/query_utils.py
+import asyncio
+import os
+import re
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from .embed_utils import EMBEDDING_MODEL_NAME, embedding_backend, encode_texts
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))       # Seconds
+QUERY_BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", "5"))
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "32"))
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form used both as cache key and as encoder input"""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query embeddings, bounded by entry count and age"""
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (model_name, backend, query) -> (timestamp, embedding)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model_name: str, backend: str, query: str) -> Optional[np.ndarray]:
+        key = (model_name, backend, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]  # Expired
+            self.misses += 1
+            return None
+
+    def put(self, model_name: str, backend: str, query: str, embedding: np.ndarray):
+        if self.max_size <= 0:
+            return
+        key = (model_name, backend, query)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class QueryBatcher:
+    """Coalesce queries arriving within a short window into a single encode call"""
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 window_ms: float = QUERY_BATCH_WINDOW_MS, max_batch: int = QUERY_BATCH_MAX):
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending = []  # (query, future)
+        self._flush_handle = None
+        self._tasks = set()  # Keep references so in-flight batches are not garbage collected
+        self.batches = 0
+        self.batched_queries = 0
+        self.max_batch_seen = 0
+
+    async def encode(self, query: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list):
+        # Identical queries in the same window are encoded once
+        unique = list(dict.fromkeys(query for query, _ in batch))
+        self.batches += 1
+        self.batched_queries += len(unique)
+        self.max_batch_seen = max(self.max_batch_seen, len(unique))
+        try:
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(None, self.encode_fn, unique)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_query = dict(zip(unique, vectors))
+        for query, future in batch:
+            if not future.done():  # The request may have been cancelled meanwhile
+                future.set_result(by_query[query])
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "queries_encoded": self.batched_queries,
+            "avg_batch_size": self.batched_queries / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+        }
+
+
+def _encode_batch(queries: List[str]) -> np.ndarray:
+    return encode_texts(queries, "interactive")
+
+
+_query_cache = QueryEmbeddingCache()
+_query_batcher = QueryBatcher(_encode_batch)
+
+
+async def encode_query(query: str) -> np.ndarray:
+    """Embed a search query, served from the cache or a coalesced encoder batch"""
+    query = normalize_query(query)
+    backend = embedding_backend(wait=False)
+    if backend is None:  # Finding out loads the model, so not on the event loop
+        backend = await asyncio.get_running_loop().run_in_executor(None, embedding_backend)
+    embedding = _query_cache.get(EMBEDDING_MODEL_NAME, backend, query)
+    if embedding is None:
+        embedding = await _query_batcher.encode(query)
+        _query_cache.put(EMBEDDING_MODEL_NAME, backend, query, embedding)
+    return embedding
+
+
+def get_query_stats() -> dict:
+    """Cache hit rate and batch size statistics for tuning"""
+    return {
+        "model": EMBEDDING_MODEL_NAME,
+        "cache": _query_cache.stats(),
+        "batching": _query_batcher.stats(),
+    }
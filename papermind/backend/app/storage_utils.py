@@ -0,0 +1,153 @@
+# app/storage_utils.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from .metrics_utils import timed
+
+STORAGE_BATCH_SIZE = int(os.getenv("STORAGE_BATCH_SIZE", "200"))    # Rows per insert request
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "4"))  # Concurrent insert requests
+STORAGE_RETRIES = int(os.getenv("STORAGE_RETRIES", "3"))
+STORAGE_RETRY_BACKOFF = float(os.getenv("STORAGE_RETRY_BACKOFF", "0.5"))  # Seconds, doubled per attempt
+SUPABASE_STORE_EMBEDDINGS = os.getenv("SUPABASE_STORE_EMBEDDINGS", "false").lower() == "true"
+# Upsert chunks on (pdf_id, chunk_index) so retries are idempotent; needs migrations/001_chunks_unique_index.sql
+STORAGE_UPSERT = os.getenv("STORAGE_UPSERT", "false").lower() == "true"
+CHUNK_CONFLICT_COLUMNS = "pdf_id,chunk_index"
+
+MISSING_CONSTRAINT_CODE = "42P10"  # Postgres: ON CONFLICT columns have no unique or exclusion constraint
+
+
+def is_missing_constraint(error: Exception) -> bool:
+    """True if an upsert failed because the table has no unique constraint on its conflict columns"""
+    return getattr(error, "code", None) == MISSING_CONSTRAINT_CODE or \
+        "no unique or exclusion constraint" in str(error)
+
+
+class MissingConstraintError(Exception):
+    """LocalBackend's version of the error PostgREST returns for an upsert without a matching constraint"""
+    code = MISSING_CONSTRAINT_CODE
+
+
+class SupabaseBackend:
+    """Bulk inserts through the Supabase client"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def insert_rows(self, table: str, rows: List[dict], on_conflict: Optional[str] = None) -> list:
+        """Plain insert, or an upsert on the on_conflict columns (which need a unique constraint)"""
+        with timed("supabase_insert", items=len(rows)):
+            if on_conflict:
+                return self.client.table(table).upsert(rows, on_conflict=on_conflict).execute().data
+            return self.client.table(table).insert(rows).execute().data
+
+
+class LocalBackend:
+    """In-memory stand-in for Supabase tables, with optional simulated latency and failures"""
+
+    def __init__(self, latency: float = 0.0, fail_every: int = 0, unique: Optional[Dict[str, str]] = None):
+        self.latency = latency
+        self.fail_every = fail_every  # Fail every Nth request (0 = never)
+        self.unique = unique or {}  # table -> "col1,col2" unique constraint; upserts need a matching one
+        self.tables: Dict[str, List[dict]] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def insert_rows(self, table: str, rows: List[dict], on_conflict: Optional[str] = None) -> list:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if self.fail_every and self.requests % self.fail_every == 0:
+                raise ConnectionError(f"Simulated failure on request {self.requests}")
+            if on_conflict and self.unique.get(table) != on_conflict:
+                raise MissingConstraintError("there is no unique or exclusion constraint matching the "
+                                             "ON CONFLICT specification")
+            stored = self.tables.setdefault(table, [])
+            columns = on_conflict.split(",") if on_conflict else None
+            existing = {tuple(row[c] for c in columns): i for i, row in enumerate(stored)} if columns else {}
+            inserted = []
+            for row in rows:
+                position = existing.get(tuple(row[c] for c in columns)) if columns else None
+                if position is None:
+                    row = dict(row, id=len(stored) + 1)
+                    stored.append(row)
+                else:
+                    row = stored[position] = dict(row, id=stored[position]["id"])
+                inserted.append(row)
+        return inserted
+
+
+class BatchWriter:
+    """Write rows in bulk batches over a bounded pool of concurrent requests, retrying failed batches"""
+
+    def __init__(self, backend, batch_size: int = STORAGE_BATCH_SIZE,
+                 max_connections: int = STORAGE_MAX_CONNECTIONS, retries: int = STORAGE_RETRIES,
+                 backoff: float = STORAGE_RETRY_BACKOFF, upsert: bool = STORAGE_UPSERT):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.upsert = upsert  # Turned off for good if the table turns out to lack the unique constraint
+        self._pool = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="storage")
+        self.batches_written = 0
+        self.batch_retries = 0
+        self._lock = threading.Lock()  # Counters are updated from the writer threads
+
+    def _disable_upsert(self, table: str, on_conflict: str):
+        with self._lock:
+            if self.upsert:
+                self.upsert = False
+                print(f"⚠️ {table} has no unique constraint on ({on_conflict}): falling back to plain inserts, "
+                      f"whose retries can duplicate rows. Apply migrations/001_chunks_unique_index.sql")
+
+    def _insert_with_retry(self, table: str, rows: List[dict], on_conflict: Optional[str] = None) -> list:
+        # Without on_conflict a retry may duplicate rows if a timed-out attempt was in fact committed
+        attempt = 0
+        while True:
+            try:
+                result = self.backend.insert_rows(table, rows, on_conflict)
+                with self._lock:
+                    self.batches_written += 1
+                return result
+            except Exception as e:
+                if on_conflict and is_missing_constraint(e):
+                    self._disable_upsert(table, on_conflict)
+                    on_conflict = None  # Not a failed attempt: the insert has not been tried yet
+                    continue
+                if attempt == self.retries:
+                    raise RuntimeError(f"Insert into {table} failed after {attempt + 1} attempts: {e}")
+                with self._lock:
+                    self.batch_retries += 1
+                print(f"Batch insert into {table} failed ({e}), retrying...")
+                time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+
+    def write(self, table: str, rows: List[dict],
+              progress: Optional[Callable[[float], None]] = None, on_conflict: Optional[str] = None) -> int:
+        """Insert all rows (upsert on the on_conflict columns, so retries are idempotent);
+        raises RuntimeError if any batch still fails after retries"""
+        batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+        futures = [self._pool.submit(self._insert_with_retry, table, batch, on_conflict) for batch in batches]
+        written = 0
+        for future in as_completed(futures):
+            written += len(future.result())
+            if progress:
+                progress(written / len(rows))
+        return written
+
+    def write_chunks(self, pdf_id, chunks: List[str], embeddings=None,
+                     progress: Optional[Callable[[float], None]] = None,
+                     store_embeddings: bool = SUPABASE_STORE_EMBEDDINGS) -> int:
+        rows = []
+        for i, chunk in enumerate(chunks):
+            row = {"pdf_id": pdf_id, "chunk_index": i, "content": chunk}
+            if store_embeddings and embeddings is not None:
+                row["embedding"] = [float(x) for x in embeddings[i]]
+            rows.append(row)
+        return self.write("chunks", rows, progress, on_conflict=CHUNK_CONFLICT_COLUMNS if self.upsert else None)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
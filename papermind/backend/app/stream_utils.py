@@ -0,0 +1,87 @@
+# app/stream_utils.py
+import asyncio
+import json
+import threading
+from collections import deque
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from fastapi import Request
+
+
+class LatencyTracker:
+    """Rolling window of latency samples (milliseconds) with percentile summaries"""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, value_ms: float):
+        with self._lock:
+            self._samples.append(value_ms)
+            self.count += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count, "avg_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+        return {
+            "count": self.count,
+            "avg_ms": round(sum(samples) / len(samples), 1),
+            "p50_ms": round(pick(0.50), 1),
+            "p95_ms": round(pick(0.95), 1),
+            "max_ms": round(samples[-1], 1),
+        }
+
+
+async def stream_from_thread(produce: Callable[[threading.Event], Iterator], request: Request,
+                             poll_interval: float = 0.25, executor: Optional[Executor] = None,
+                             on_done: Optional[Callable[[], None]] = None) -> AsyncIterator:
+    """Run a blocking generator in a worker thread and relay its items to the event loop.
+
+    produce receives a cancel event; it is set when the client disconnects (or the
+    response is torn down) so the worker can stop instead of burning CPU. on_done is
+    called on the event loop once the worker has returned, which may be after the
+    stream itself was closed.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancel = threading.Event()
+
+    def worker():
+        try:
+            for item in produce(cancel):
+                loop.call_soon_threadsafe(queue.put_nowait, ("item", item))
+                if cancel.is_set():
+                    break
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+            if on_done is not None:
+                loop.call_soon_threadsafe(on_done)
+
+    loop.run_in_executor(executor, worker)
+    try:
+        while True:
+            try:
+                kind, value = await asyncio.wait_for(queue.get(), poll_interval)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    print("Client disconnected, cancelling stream")
+                    return
+                continue
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        cancel.set()
+
+
+def ndjson(event: dict) -> str:
+    return json.dumps(event) + "\n"
@@ -1,77 +1,153 @@
 # app/summarizer_utils.py
 
-from transformers import pipeline
-import re
-from typing import List, Optional
+from collections import OrderedDict
+import hashlib
+import importlib.util
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from .cache_utils import SummaryCache, get_summary_caches, summary_key
+from .chunk_utils import (SPECIAL_TOKENS_RESERVE, SUMMARY_CHUNK_OVERLAP, SUMMARY_CHUNK_TOKENS, TokenCounter,
+                          get_token_counter, iter_token_chunks)
+from .inference_utils import RemotePipeline, get_inference_client, inference_enabled
+from .metrics_utils import timed
+from .normalize_utils import SUMMARY_NORMALIZER
+
+# transformers (and torch) take seconds to import, so they are imported when a model is
+# first loaded; fail fast here so callers can fall back to the minimal summarizer
+if importlib.util.find_spec("transformers") is None:
+    raise ImportError("transformers is not installed")
+
+SUMMARIZER_BATCH_SIZE = int(os.getenv("SUMMARIZER_BATCH_SIZE", "4"))  # 1 = one chunk per pipeline call
+SUMMARIZER_MEMORY_BUDGET_MB = int(os.getenv("SUMMARIZER_MEMORY_BUDGET_MB", "4096"))  # Resident model weights
+
+SUMMARIZER_DEDUPE_THRESHOLD = float(os.getenv("SUMMARIZER_DEDUPE_THRESHOLD", "0.95"))  # Cosine similarity
+
+_threads_configured = False
+
+def configure_torch_threads(num_threads: Optional[int] = None):
+    """Use SUMMARIZER_THREADS (0 = every core) for intra-op parallelism and a single inter-op thread
+    for CPU inference. Read at first model load, so a preforking master can pin it to 1"""
+    global _threads_configured
+    if _threads_configured:
+        return
+    try:
+        import torch
+        num_threads = num_threads or int(os.getenv("SUMMARIZER_THREADS", "0")) or os.cpu_count() or 1
+        torch.set_num_threads(num_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Can only be set before the first parallel op
+        print(f"Torch using {num_threads} intra-op threads")
+    except Exception as e:
+        print(f"Could not configure torch threads: {e}")
+    _threads_configured = True
+
+class SummaryBudget:
+    """Caps the number of model calls and the wall-clock time spent on one request"""
+    
+    def __init__(self, max_calls: Optional[int] = None, time_budget: Optional[float] = None):
+        self.max_calls = max_calls
+        self.started = time.time()
+        # 0 (or less) is a deadline that has already passed, not "no deadline"
+        self.deadline = self.started + time_budget if time_budget is not None else None
+        self.calls = 0
+        self.partial = False  # Set once running out changed the result (extractive chunks, skipped reduce)
+    
+    def elapsed(self) -> float:
+        return time.time() - self.started
+    
+    def exhausted(self) -> bool:
+        if self.deadline is not None and time.time() >= self.deadline:
+            return True
+        return self.max_calls is not None and self.calls >= self.max_calls
+    
+    def take(self, n: int) -> int:
+        """Reserve up to n model calls; returns how many may run"""
+        if self.exhausted():
+            return 0
+        allowed = n if self.max_calls is None else min(n, self.max_calls - self.calls)
+        self.calls += allowed
+        return allowed
 
 class PaperMindSummarizer:
     """Advanced summarization with multiple model options for academic papers"""
     
-    def __init__(self, model_name: str = "sshleifer/distilbart-cnn-12-6"):
+    def __init__(self, model_name: str = "sshleifer/distilbart-cnn-12-6",
+                 chunk_cache: Optional[SummaryCache] = None):
         """Initialize with specified model"""
         self.model_name = model_name
         self.summarizer = None
+        self.chunk_cache = chunk_cache  # Per-chunk summaries, so edited documents only redo changed chunks
         self.load_model()
     
     def load_model(self):
         """Load the summarization model"""
-        try:
-            print(f"Loading summarization model: {self.model_name}")
-            self.summarizer = pipeline("summarization", model=self.model_name)
-            print("✓ Summarization model loaded successfully")
-        except Exception as e:
-            print(f"Error loading model {self.model_name}: {e}")
-            # Fallback to ultra-lightweight T5
-            print("Falling back to ultra-lightweight T5-small model...")
-            self.model_name = "t5-small"
-            self.summarizer = pipeline("summarization", model=self.model_name)
-    
-    def preprocess_academic_text(self, text: str) -> str:
-        """Preprocess text specifically for academic papers"""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove common academic paper artifacts
-        text = re.sub(r'\b(Figure|Table|Fig\.|Tab\.)\s+\d+[^\n]*', '', text)
-        text = re.sub(r'\[\d+\]', '', text)  # Remove reference citations
-        text = re.sub(r'\b(et al\.)', 'and colleagues', text)
-        
-        # Remove URLs and DOIs
-        text = re.sub(r'http[s]?://\S+', '', text)
-        text = re.sub(r'doi:\S+', '', text)
-        
-        return text.strip()
-    
-    def smart_chunk_text(self, text: str, max_length: int = 1000) -> List[str]:
-        """Intelligently chunk text preserving sentence boundaries"""
-        # First preprocess the text
-        text = self.preprocess_academic_text(text)
-        
-        # Split by sentences
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            # Check if adding this sentence would exceed the limit
-            if len(current_chunk) + len(sentence) + 1 <= max_length:
-                current_chunk += " " + sentence if current_chunk else sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-        
-        # Add the last chunk
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        # Filter out very short chunks
-        return [chunk for chunk in chunks if len(chunk.split()) >= 10]
+        if inference_enabled():
+            # Generation runs in the inference process, which loads the weights on first use
+            self.summarizer = RemotePipeline(self.model_name, get_inference_client())
+            return
+        from transformers import pipeline
+        with timed("summarizer_model_load"):
+            try:
+                print(f"Loading summarization model: {self.model_name}")
+                configure_torch_threads()
+                self.summarizer = pipeline("summarization", model=self.model_name)
+                print("✓ Summarization model loaded successfully")
+            except Exception as e:
+                print(f"Error loading model {self.model_name}: {e}")
+                # Fallback to ultra-lightweight T5
+                print("Falling back to ultra-lightweight T5-small model...")
+                self.model_name = "t5-small"
+                self.summarizer = pipeline("summarization", model=self.model_name)
+    
+    @staticmethod
+    def preprocess_academic_text(text: str) -> str:
+        """Preprocess text specifically for academic papers: whitespace, citations,
+        figure/table references, URLs and DOIs, in one pass"""
+        return SUMMARY_NORMALIZER.normalize(text)
+    
+    def token_counter(self) -> TokenCounter:
+        """Cached token counts from this model's own tokenizer"""
+        return get_token_counter(self.model_name, getattr(self.summarizer, "tokenizer", None))
+    
+    def _chunk_token_budget(self, max_length: int) -> int:
+        """Tokens per chunk: max_length, capped so a chunk plus special tokens fits the model input"""
+        limit = self.token_counter().model_max_tokens
+        budget = max_length if limit is None else min(max_length, limit - SPECIAL_TOKENS_RESERVE)
+        return max(1, budget)
+    
+    def smart_chunk_text(self, text: str, max_length: int = SUMMARY_CHUNK_TOKENS) -> List[str]:
+        """Chunk text at sentence boundaries into pieces of at most max_length model tokens"""
+        # Preprocess segment by segment as the chunker consumes them, and filter out very short chunks
+        with timed("chunk_summary"):
+            return list(iter_token_chunks(SUMMARY_NORMALIZER.iter_normalized([text]), self.token_counter(),
+                                          self._chunk_token_budget(max_length), SUMMARY_CHUNK_OVERLAP,
+                                          min_words=10))
+    
+    def _style_lengths(self, text: str, summary_style: str) -> tuple:
+        """Generation max/min length for a summary style, scaled to the input length"""
+        words = len(text.split())
+        if summary_style == "academic":
+            max_length = min(150, words // 3)
+            min_length = min(50, max_length // 3)
+        elif summary_style == "brief":
+            max_length = min(100, words // 4)
+            min_length = min(30, max_length // 3)
+        else:  # detailed
+            max_length = min(200, words // 2)
+            min_length = min(80, max_length // 3)
+        return max_length, min_length
     
-    def summarize_text(self, text: str, max_chunk_length: int = 1000, 
-                      summary_style: str = "academic") -> str:
-        """Advanced text summarization with different styles"""
+    def summarize_text(self, text: str, max_chunk_length: int = SUMMARY_CHUNK_TOKENS, 
+                      summary_style: str = "academic",
+                      batch_size: int = SUMMARIZER_BATCH_SIZE,
+                      budget: Optional[SummaryBudget] = None) -> str:
+        """Advanced text summarization with different styles; chunks left once the budget
+        runs out get extractive summaries, so the result arrives in time but partial"""
         if not text.strip():
             return "No text provided for summarization."
         
@@ -80,58 +156,245 @@ class PaperMindSummarizer:
         if not chunks:
             return "Text too short for meaningful summarization."
         
+        # Adjust parameters based on summary style
+        max_length, min_length = self._style_lengths(text, summary_style)
+        summaries = self.summarize_chunks(chunks, max_length, min_length, batch_size, budget)
+        
+        # Combine summaries intelligently
+        final_summary = self.combine_summaries(summaries)
+        return final_summary
+    
+    def iter_summaries(self, text: str, max_chunk_length: int = SUMMARY_CHUNK_TOKENS,
+                       summary_style: str = "academic",
+                       batch_size: int = SUMMARIZER_BATCH_SIZE,
+                       cancel_event: Optional[threading.Event] = None,
+                       budget: Optional[SummaryBudget] = None) -> Iterator[dict]:
+        """Yield each chunk summary in document order as soon as its batch is done,
+        then the combined summary. Stops early once cancel_event is set; chunks past
+        the budget get extractive summaries."""
+        if not text.strip():
+            yield {"event": "summary", "summary": "No text provided for summarization."}
+            return
+        
+        chunks = self.smart_chunk_text(text, max_chunk_length)
+        if not chunks:
+            yield {"event": "summary", "summary": "Text too short for meaningful summarization."}
+            return
+        
+        max_length, min_length = self._style_lengths(text, summary_style)
         summaries = []
+        step = max(batch_size, 1)
+        for start in range(0, len(chunks), step):
+            if cancel_event is not None and cancel_event.is_set():
+                print(f"Summarization cancelled after {len(summaries)}/{len(chunks)} chunks")
+                return
+            window = self.summarize_chunks(chunks[start:start + step], max_length, min_length, batch_size, budget)
+            for offset, summary in enumerate(window):
+                summaries.append(summary)
+                yield {"event": "chunk", "index": start + offset, "total": len(chunks), "summary": summary}
         
-        # Adjust parameters based on summary style
-        if summary_style == "academic":
-            max_length = min(150, len(text.split()) // 3)
-            min_length = min(50, max_length // 3)
-        elif summary_style == "brief":
-            max_length = min(100, len(text.split()) // 4)
-            min_length = min(30, max_length // 3)
-        else:  # detailed
-            max_length = min(200, len(text.split()) // 2)
-            min_length = min(80, max_length // 3)
+        yield {"event": "summary", "summary": self.combine_summaries(summaries)}
+    
+    def summarize_chunks(self, chunks: List[str], max_length: int, min_length: int,
+                         batch_size: int = SUMMARIZER_BATCH_SIZE,
+                         budget: Optional["SummaryBudget"] = None) -> List[str]:
+        """Summarize each chunk; chunks beyond the budget get an extractive fallback"""
+        summaries = [None] * len(chunks)
+        pending = []  # (index, input_text, chunk_max_length, chunk_min_length)
         
         for i, chunk in enumerate(chunks):
-            try:
-                # Adjust max_length if chunk is very short
-                chunk_words = len(chunk.split())
-                chunk_max_length = min(max_length, chunk_words // 2) if chunk_words < 100 else max_length
-                chunk_min_length = min(min_length, chunk_max_length // 2)
-                
-                if chunk_max_length < 10:
-                    # Skip very short chunks or add them directly
-                    summaries.append(chunk[:200])
+            # Adjust max_length if chunk is very short
+            chunk_words = len(chunk.split())
+            chunk_max_length = min(max_length, chunk_words // 2) if chunk_words < 100 else max_length
+            chunk_min_length = min(min_length, chunk_max_length // 2)
+            
+            if chunk_max_length < 10:
+                # Skip very short chunks or add them directly
+                summaries[i] = chunk[:200]
+                continue
+            
+            # Handle T5 models which need text preprocessing
+            if "t5" in self.model_name.lower():
+                # T5 expects "summarize: " prefix
+                input_text = f"summarize: {chunk}"
+            else:
+                input_text = chunk
+            
+            if self.chunk_cache is not None:
+                cached = self.chunk_cache.get(self._chunk_cache_key(input_text, chunk_max_length, chunk_min_length))
+                if cached is not None:
+                    summaries[i] = cached
+                    continue
+            
+            pending.append((i, input_text, chunk_max_length, chunk_min_length))
+        
+        if batch_size > 1:
+            self._summarize_batched(pending, chunks, summaries, batch_size, budget)
+        else:
+            for item in pending:
+                if budget is not None and not budget.take(1):
+                    budget.partial = True
+                    summaries[item[0]] = self._fallback_summary(chunks[item[0]])
                     continue
-                
-                # Handle T5 models which need text preprocessing
-                if "t5" in self.model_name.lower():
-                    # T5 expects "summarize: " prefix
-                    input_text = f"summarize: {chunk}"
-                else:
-                    input_text = chunk
-                
-                summary = self.summarizer(
+                summaries[item[0]] = self._summarize_one(item, chunks)
+        
+        if self.chunk_cache is not None:
+            for i, input_text, chunk_max_length, chunk_min_length in pending:
+                # Extractive fallbacks (errors, exhausted budgets) are not worth remembering
+                if summaries[i] != self._fallback_summary(chunks[i]):
+                    self.chunk_cache.put(self._chunk_cache_key(input_text, chunk_max_length, chunk_min_length),
+                                         summaries[i])
+        return summaries
+    
+    def _chunk_cache_key(self, input_text: str, max_length: int, min_length: int) -> str:
+        return summary_key("chunk", self.model_name, max_length, min_length, input_text)
+    
+    def _fallback_summary(self, chunk: str) -> str:
+        """Use the first few sentences of a chunk when the model cannot be used"""
+        sentences = chunk.split('. ')
+        return '. '.join(sentences[:3]) + '.'
+    
+    def _summarize_one(self, item: tuple, chunks: List[str]) -> str:
+        """Summarize a single chunk, falling back to its first sentences on error"""
+        i, input_text, chunk_max_length, chunk_min_length = item
+        try:
+            with timed("generate", items=1):
+                return self.summarizer(
                     input_text,
                     max_length=chunk_max_length,
                     min_length=chunk_min_length,
                     do_sample=False,
                     truncation=True
                 )[0]['summary_text']
-                
-                summaries.append(summary)
-                
-            except Exception as e:
-                print(f"Error summarizing chunk {i+1}: {e}")
-                # Fallback: use first few sentences of the chunk
-                sentences = chunk.split('. ')
-                fallback = '. '.join(sentences[:3]) + '.'
-                summaries.append(fallback)
+        except Exception as e:
+            print(f"Error summarizing chunk {i+1}: {e}")
+            # Fallback: use first few sentences of the chunk
+            return self._fallback_summary(chunks[i])
+    
+    def _token_length(self, text: str) -> int:
+        return self.token_counter().count(text)
+    
+    def _summarize_batched(self, pending: list, chunks: List[str], summaries: list, batch_size: int,
+                           budget: Optional["SummaryBudget"] = None):
+        """Run chunks through the pipeline in batches of similar token length.
         
-        # Combine summaries intelligently
-        final_summary = self.combine_summaries(summaries)
-        return final_summary
+        Chunks are grouped by their generation limits so every chunk gets the same
+        max/min length as in the one-by-one loop, then sorted by token count so a
+        batch pads to a similar length.
+        """
+        groups = {}
+        for item in pending:
+            groups.setdefault((item[2], item[3]), []).append(item)
+        
+        for (chunk_max_length, chunk_min_length), items in groups.items():
+            items.sort(key=lambda item: self._token_length(item[1]))
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                allowed = budget.take(len(batch)) if budget is not None else len(batch)
+                if allowed < len(batch):
+                    budget.partial = True
+                for item in batch[allowed:]:
+                    summaries[item[0]] = self._fallback_summary(chunks[item[0]])
+                batch = batch[:allowed]
+                if not batch:
+                    continue
+                try:
+                    with timed("generate", items=len(batch)):
+                        outputs = self.summarizer(
+                            [item[1] for item in batch],
+                            max_length=chunk_max_length,
+                            min_length=chunk_min_length,
+                            do_sample=False,
+                            truncation=True,
+                            batch_size=len(batch)
+                        )
+                    for item, output in zip(batch, outputs):
+                        summaries[item[0]] = output['summary_text']
+                except Exception as e:
+                    print(f"Error summarizing batch of {len(batch)} chunks, retrying one by one: {e}")
+                    for item in batch:
+                        summaries[item[0]] = self._summarize_one(item, chunks)
+    
+    def prune_near_duplicates(self, chunks: List[str], threshold: float = 0.95) -> List[str]:
+        """Drop chunks whose embedding is nearly identical to an earlier chunk"""
+        if len(chunks) < 2 or threshold >= 1.0:
+            return chunks
+        try:
+            from .embed_utils import embed_chunks
+            from .index_utils import normalize_vectors
+            vectors = normalize_vectors(embed_chunks(chunks, priority="normal"))
+        except Exception as e:
+            print(f"Skipping near-duplicate pruning: {e}")
+            return chunks
+        
+        similarity = vectors @ vectors.T
+        kept = []
+        for i in range(len(chunks)):
+            if not kept or similarity[i, kept].max() < threshold:
+                kept.append(i)
+        if len(kept) < len(chunks):
+            print(f"Pruned {len(chunks) - len(kept)} near-duplicate chunks before summarization")
+        return [chunks[i] for i in kept]
+    
+    def _group_for_reduce(self, summaries: List[str], max_chunk_length: int) -> List[str]:
+        """Concatenate consecutive summaries into groups that fit one model input"""
+        budget = self._chunk_token_budget(max_chunk_length)
+        groups, current, size = [], "", 0
+        for summary, tokens in zip(summaries, self.token_counter().count_many(summaries)):
+            if current and size + tokens > budget:
+                groups.append(current)
+                current, size = summary, tokens
+            else:
+                current = f"{current} {summary}" if current else summary
+                size += tokens
+        if current:
+            groups.append(current)
+        # Always make progress, even when single summaries already exceed the chunk length
+        if len(groups) == len(summaries) and len(summaries) > 1:
+            groups = [" ".join(summaries[i:i + 2]) for i in range(0, len(summaries), 2)]
+        return groups
+    
+    def summarize_hierarchical(self, text: str, max_chunk_length: int = SUMMARY_CHUNK_TOKENS,
+                               summary_style: str = "academic",
+                               batch_size: int = SUMMARIZER_BATCH_SIZE,
+                               target_words: Optional[int] = None,
+                               max_model_calls: Optional[int] = None,
+                               time_budget: Optional[float] = None,
+                               dedupe_threshold: float = SUMMARIZER_DEDUPE_THRESHOLD,
+                               budget: Optional[SummaryBudget] = None) -> str:
+        """Map-reduce summarization for long documents.
+        
+        Map: summarize (near-duplicate-pruned) chunks in batches. Reduce: group the
+        summaries and re-summarize each group, repeating until the result fits
+        target_words. Once max_model_calls or time_budget (seconds) is spent, or the
+        given budget runs out, the remaining work falls back to extractive text and
+        concatenation.
+        """
+        if not text.strip():
+            return "No text provided for summarization."
+        
+        chunks = self.smart_chunk_text(text, max_chunk_length)
+        if not chunks:
+            return "Text too short for meaningful summarization."
+        
+        max_length, min_length = self._style_lengths(text, summary_style)
+        target_words = target_words or max(max_length, 30)
+        budget = budget or SummaryBudget(max_model_calls, time_budget)
+        
+        chunks = self.prune_near_duplicates(chunks, dedupe_threshold)
+        level = self.summarize_chunks(chunks, max_length, min_length, batch_size, budget)
+        
+        while len(level) > 1 and len(" ".join(level).split()) > target_words:
+            if budget.exhausted():
+                budget.partial = True
+                break
+            groups = self._group_for_reduce(level, max_chunk_length)
+            level = self.summarize_chunks(groups, max_length, min_length, batch_size, budget)
+        
+        print(f"Hierarchical summary used {budget.calls} model calls in {budget.elapsed():.1f}s")
+        if len(level) == 1:
+            return level[0]
+        return self.combine_summaries(level)
     
     def combine_summaries(self, summaries: List[str]) -> str:
         """Intelligently combine multiple summaries"""
@@ -166,19 +429,191 @@ AVAILABLE_MODELS = {
     "led": "allenai/led-base-16384",                # Best for very long documents
 }
 
-# Initialize default summarizer
-_default_summarizer = PaperMindSummarizer()
+DEFAULT_MODEL = "distilbart"
+
+def estimate_model_memory_mb(summarizer: "PaperMindSummarizer") -> float:
+    """Size of the model's parameters and buffers in MB"""
+    model = getattr(summarizer.summarizer, "model", None)
+    if model is None:
+        return 0.0
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors) / (1024 * 1024)
+    except Exception:
+        return 0.0
 
-def summarize_text(text: str, max_chunk_length: int = 1000, 
-                  model: str = "distilbart", style: str = "academic") -> str:
-    """Main summarization function with model selection"""
-    global _default_summarizer
+class ModelRegistry:
+    """Keep several summarization pipelines resident within a memory budget, evicting the least recently used"""
+    
+    def __init__(self, memory_budget_mb: int = SUMMARIZER_MEMORY_BUDGET_MB,
+                 chunk_cache: Optional[SummaryCache] = None):
+        self.memory_budget_mb = memory_budget_mb
+        self.chunk_cache = chunk_cache
+        self._models: "OrderedDict[str, dict]" = OrderedDict()  # model_name -> entry, LRU first
+        self._lock = threading.Lock()
+        self._model_locks: Dict[str, threading.Lock] = {}
+        self._loading = set()
+        self.evictions = 0
+    
+    def _model_lock(self, model_name: str) -> threading.Lock:
+        with self._lock:
+            return self._model_locks.setdefault(model_name, threading.Lock())
+    
+    def _touch(self, model_name: str) -> Optional[PaperMindSummarizer]:
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is None:
+                return None
+            self._models.move_to_end(model_name)
+            entry["last_used"] = time.time()
+            entry["uses"] += 1
+            return entry["summarizer"]
+    
+    def get(self, model_name: str) -> PaperMindSummarizer:
+        """Return a resident summarizer, loading it (once, even under concurrency) if needed"""
+        summarizer = self._touch(model_name)
+        if summarizer is not None:
+            return summarizer
+        
+        # One lock per model: concurrent requests for the same model wait for a single load,
+        # while requests for other resident models are not blocked
+        with self._model_lock(model_name):
+            summarizer = self._touch(model_name)
+            if summarizer is not None:
+                return summarizer
+            
+            with self._lock:
+                self._loading.add(model_name)
+            try:
+                start = time.time()
+                summarizer = PaperMindSummarizer(model_name, chunk_cache=self.chunk_cache)
+                load_seconds = time.time() - start
+            finally:
+                with self._lock:
+                    self._loading.discard(model_name)
+            
+            memory_mb = estimate_model_memory_mb(summarizer)
+            print(f"Model {model_name} loaded in {load_seconds:.1f}s ({memory_mb:.0f} MB)")
+            with self._lock:
+                self._models[model_name] = {
+                    "summarizer": summarizer,
+                    "memory_mb": memory_mb,
+                    "load_seconds": load_seconds,
+                    "loaded_at": time.time(),
+                    "last_used": time.time(),
+                    "uses": 1,
+                }
+                self._evict(keep=model_name)
+            return summarizer
+    
+    def _evict(self, keep: str):
+        """Drop least recently used models until resident weights fit the budget"""
+        total = sum(entry["memory_mb"] for entry in self._models.values())
+        for model_name in list(self._models):
+            if total <= self.memory_budget_mb:
+                break
+            if model_name == keep:
+                continue
+            total -= self._models.pop(model_name)["memory_mb"]
+            self.evictions += 1
+            print(f"Evicted summarization model {model_name} (memory budget {self.memory_budget_mb} MB)")
     
-    # Switch model if requested
-    if model in AVAILABLE_MODELS and _default_summarizer.model_name != AVAILABLE_MODELS[model]:
-        _default_summarizer.switch_model(AVAILABLE_MODELS[model])
+    def preload(self, model_name: str) -> bool:
+        """Load a model in a background thread; returns False if it is already resident or loading"""
+        with self._lock:
+            if model_name in self._models or model_name in self._loading:
+                return False
+        threading.Thread(target=self.get, args=(model_name,), daemon=True,
+                         name=f"load-{model_name}").start()
+        return True
     
-    return _default_summarizer.summarize_text(text, max_chunk_length, style)
+    def is_loaded(self, model_name: str) -> bool:
+        with self._lock:
+            return model_name in self._models
+    
+    def stats(self) -> dict:
+        with self._lock:
+            resident = [{
+                "model_name": name,
+                "loaded_name": entry["summarizer"].model_name,
+                "memory_mb": round(entry["memory_mb"], 1),
+                "load_seconds": round(entry["load_seconds"], 2),
+                "loaded_at": entry["loaded_at"],
+                "last_used": entry["last_used"],
+                "uses": entry["uses"],
+            } for name, entry in reversed(self._models.items())]  # Most recently used first
+            return {
+                "memory_budget_mb": self.memory_budget_mb,
+                "resident_mb": round(sum(m["memory_mb"] for m in resident), 1),
+                "resident": resident,
+                "loading": sorted(self._loading),
+                "evictions": self.evictions,
+            }
+
+_summary_cache, _chunk_summary_cache = get_summary_caches()
+_registry = ModelRegistry(chunk_cache=_chunk_summary_cache)  # Default model is loaded by the warmup policy
+
+def resolve_model_name(model: Optional[str]) -> str:
+    """Map a model key (e.g. "bart") to its Hugging Face name, falling back to the default"""
+    return AVAILABLE_MODELS.get(model, AVAILABLE_MODELS[DEFAULT_MODEL])
+
+def preprocessed_digest(text: str) -> str:
+    """SHA-256 of the preprocessed text, hashed segment by segment rather than from one cleaned copy"""
+    digest = hashlib.sha256()
+    for segment in SUMMARY_NORMALIZER.iter_normalized([text]):
+        digest.update(segment.encode("utf-8") + b" ")
+    return digest.hexdigest()
+
+def summarize_text(text: str, max_chunk_length: int = SUMMARY_CHUNK_TOKENS, 
+                  model: str = "distilbart", style: str = "academic",
+                  batch_size: int = SUMMARIZER_BATCH_SIZE, mode: str = "standard",
+                  max_model_calls: Optional[int] = None,
+                  time_budget: Optional[float] = None,
+                  budget: Optional[SummaryBudget] = None) -> str:
+    """Main summarization function with model selection.
+    
+    Pass a budget (or max_model_calls / time_budget) to bound the work; budget.partial
+    then tells whether the result was cut short.
+    """
+    model_name = resolve_model_name(model)
+    if budget is None and (max_model_calls is not None or time_budget is not None):
+        budget = SummaryBudget(max_model_calls, time_budget)
+    key = summary_key("document", model_name, style, max_chunk_length, mode, preprocessed_digest(text))
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    summarizer = _registry.get(model_name)
+    if mode == "hierarchical":
+        summary = summarizer.summarize_hierarchical(text, max_chunk_length, style, batch_size, budget=budget)
+    else:
+        summary = summarizer.summarize_text(text, max_chunk_length, style, batch_size, budget)
+    
+    # Only complete summaries are cached
+    if budget is None or not budget.partial:
+        _summary_cache.put(key, summary)
+    return summary
+
+def iter_summarize_text(text: str, max_chunk_length: int = SUMMARY_CHUNK_TOKENS,
+                        model: str = "distilbart", style: str = "academic",
+                        batch_size: int = SUMMARIZER_BATCH_SIZE,
+                        cancel_event: Optional[threading.Event] = None,
+                        budget: Optional[SummaryBudget] = None) -> Iterator[dict]:
+    """Streaming variant of summarize_text: chunk summary events, then the combined summary"""
+    summarizer = _registry.get(resolve_model_name(model))
+    yield from summarizer.iter_summaries(text, max_chunk_length, style, batch_size, cancel_event, budget)
+
+def get_model_registry() -> ModelRegistry:
+    return _registry
+
+def load_default_model() -> PaperMindSummarizer:
+    return _registry.get(AVAILABLE_MODELS[DEFAULT_MODEL])
+
+def is_default_model_loaded() -> bool:
+    return _registry.is_loaded(AVAILABLE_MODELS[DEFAULT_MODEL])
+
+def get_summary_cache_stats() -> dict:
+    return {"documents": _summary_cache.stats(), "chunks": _chunk_summary_cache.stats()}
 
 def get_available_models() -> dict:
     """Return available summarization models"""
@@ -0,0 +1,63 @@
+# app/upload_utils.py
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Optional
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))  # Larger uploads get 413
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))    # Read from the request at a time
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "")  # Where uploads wait for ingestion ("" = system temp dir)
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES"""
+
+
+class SpooledUpload:
+    """An uploaded file spooled to local disk, hashed on the way in; the file is deleted on release()"""
+
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Binary file object for streaming the upload elsewhere (e.g. to Supabase Storage)"""
+        return open(self.path, "rb")
+
+    def read(self) -> bytes:
+        """The whole file in memory; only for small files"""
+        with self.open() as f:
+            return f.read()
+
+    def release(self):
+        with self._lock:
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+            self.path = None
+
+
+async def spool_upload(file, max_bytes: int = UPLOAD_MAX_BYTES, chunk_bytes: int = UPLOAD_CHUNK_BYTES,
+                       directory: Optional[str] = UPLOAD_SPOOL_DIR) -> SpooledUpload:
+    """Copy an UploadFile to a temp file chunk by chunk, so at most chunk_bytes of it are in memory"""
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=".pdf", dir=directory or None)
+    digest, size = hashlib.sha256(), 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_bytes)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, size, digest.hexdigest())
@@ -0,0 +1,84 @@
+# app/warmup_utils.py
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# eager: load models during startup, before requests are served
+# background: start serving immediately and load models in a background thread
+# lazy: load each model on its first use
+WARMUP_POLICY = os.getenv("WARMUP_POLICY", "background").lower()
+WARMUP_POLICIES = ("eager", "background", "lazy")
+
+
+class Warmup:
+    """Loads registered components according to the warmup policy and reports readiness"""
+
+    def __init__(self, policy: str = WARMUP_POLICY):
+        if policy not in WARMUP_POLICIES:
+            print(f"Unknown WARMUP_POLICY '{policy}', using 'background'")
+            policy = "background"
+        self.policy = policy
+        self._components: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = time.time()
+
+    def register(self, name: str, load: Callable[[], object], is_loaded: Callable[[], bool],
+                 required: bool = True):
+        """load() brings the component into memory; is_loaded() reports its current state"""
+        self._components[name] = {
+            "load": load, "is_loaded": is_loaded, "required": required,
+            "status": "pending", "duration_ms": None, "error": None,
+        }
+
+    def _load(self, name: str):
+        component = self._components[name]
+        with self._lock:
+            if component["status"] in ("loading", "ready"):
+                return
+            component["status"] = "loading"
+        start = time.perf_counter()
+        try:
+            component["load"]()
+            component["status"] = "ready"
+        except Exception as e:
+            component["status"] = "failed"
+            component["error"] = str(e)
+            print(f"Warmup of {name} failed: {e}")
+        component["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        print(f"Warmup: {name} {component['status']} in {component['duration_ms']} ms")
+
+    def load_all(self):
+        for name in list(self._components):
+            self._load(name)
+
+    def start(self):
+        """Apply the policy; call once the app is starting up"""
+        if self.policy == "eager":
+            self.load_all()
+        elif self.policy == "background":
+            self._thread = threading.Thread(target=self.load_all, name="warmup", daemon=True)
+            self._thread.start()
+
+    def status(self) -> dict:
+        components = {}
+        for name, component in self._components.items():
+            loaded = bool(component["is_loaded"]())
+            components[name] = {
+                "loaded": loaded,
+                "required": component["required"],
+                "status": "ready" if loaded else component["status"],
+                "duration_ms": component["duration_ms"],
+                "error": component["error"],
+            }
+        # With lazy loading the instance can take traffic at once; models load on first use
+        ready = self.policy == "lazy" or all(
+            c["loaded"] for c in components.values() if c["required"]
+        )
+        return {
+            "ready": ready,
+            "policy": self.policy,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "components": components,
+        }
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark approximate nearest-neighbour search against the exact path.
+Reports query latency and recall@k for each IVF nprobe setting.
+
+Usage: python benchmarks/bench_ann.py --vectors 200000 --dim 384 --top-k 10
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.ann_utils import ExactEngine, IVFEngine, recall_at_k
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, roughly like sentence embeddings of many papers"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def run_queries(engine, queries: np.ndarray, top_k: int):
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        found, _ = engine.search(q, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(found)
+    return ids, np.array(latencies)
+
+
+def brute_force_argsort(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """The original search_chunks approach: full argsort of every score"""
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        scores = vectors @ q
+        scores.argsort()[-top_k:][::-1]
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def report(name: str, latencies: np.ndarray, recall: float = None):
+    line = (f"{name:<22} p50={np.percentile(latencies, 50):8.3f} ms  "
+            f"p99={np.percentile(latencies, 99):8.3f} ms")
+    if recall is not None:
+        line += f"  recall@k={recall:.3f}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.vectors, args.dim, args.clusters)
+    queries = synthetic_vectors(args.queries, args.dim, args.clusters, seed=1)
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, top_k={args.top_k}")
+
+    report("argsort (baseline)", brute_force_argsort(vectors, queries, args.top_k))
+
+    exact = ExactEngine()
+    exact.build(vectors)
+    exact_ids, latencies = run_queries(exact, queries, args.top_k)
+    report("exact (argpartition)", latencies, 1.0)
+
+    ivf = IVFEngine(nlist=args.nlist)
+    start = time.perf_counter()
+    ivf.build(vectors)
+    print(f"IVF build: {time.perf_counter() - start:.2f} s, nlist={len(ivf.centroids)}")
+
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        ivf_ids, latencies = run_queries(ivf, queries, args.top_k)
+        report(f"ivf nprobe={nprobe}", latencies, recall_at_k(ivf_ids, exact_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark: generates synthetic papers (as PDFs and plain text)
+offline, times the core functions directly (extract_text_from_pdf,
+chunk_text, search_chunks, the minimal summarizer) and drives the FastAPI
+app in-process through upload, search and summarize (each model and style)
+with a concurrency sweep. Throughput, p50/p95/p99 latency and peak RSS of
+every scenario are written to a JSON file; --compare prints the change
+against an earlier run, so two commits can be diffed.
+
+By default the embedding and summarization models are replaced by tiny
+local stand-ins (benchmarks/stand_ins.py), so the run needs no network or
+GPU; --real-models uses the configured models instead.
+
+Usage: python benchmarks/bench_e2e.py --pages 4 32 --concurrency 1 4 16 --output bench_e2e.json
+       python benchmarks/bench_e2e.py --compare bench_e2e.json --output bench_e2e_new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+WORDS = ("model data results analysis method study protein network training accuracy sample experiment "
+         "significant approach performance evaluation baseline signal cell gene expression inference "
+         "dataset parameter estimate variance regression transformer attention layer loss").split()
+
+
+def synthetic_page(rng: random.Random, words: int) -> str:
+    sentences, count = [], 0
+    while count < words:
+        length = rng.randint(8, 28)
+        sentences.append(" ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + ".")
+        count += length
+    return " ".join(sentences)
+
+
+def synthetic_pdf(pages: list) -> bytes:
+    """Minimal single-font PDF with one text page per entry, readable by pdfminer"""
+    out = b"%PDF-1.4\n"
+    offsets = []
+
+    def add(number: int, data: bytes):
+        nonlocal out
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + data + b"\nendobj\n"
+
+    add(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{4 + 2 * k} 0 R" for k in range(len(pages)))
+    add(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    add(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for k, text in enumerate(pages):
+        lines = [text[i:i + 90] for i in range(0, len(text), 90)]
+        stream = "BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        add(4 + 2 * k, (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * k} 0 R >>").encode())
+        add(5 + 2 * k, f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+    xref = len(out)
+    out += f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer << /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    return out
+
+
+class MemorySampler:
+    """Highest resident set size seen while a scenario runs"""
+
+    def __init__(self, interval: float = 0.02):
+        from app.metrics_utils import current_rss_bytes
+        self._rss = current_rss_bytes
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, self._rss())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+
+def summarize_latencies(latencies_ms: list, elapsed: float, errors: int, peak_rss: int) -> dict:
+    latencies_ms = sorted(latencies_ms)
+    pick = lambda q: round(latencies_ms[min(len(latencies_ms) - 1, int(q * len(latencies_ms)))], 2) \
+        if latencies_ms else None
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "throughput_per_s": round(len(latencies_ms) / elapsed, 2) if elapsed else None,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+    }
+
+
+def time_function(call, repeats: int) -> dict:
+    """Micro-benchmark one blocking call"""
+    latencies = []
+    with MemorySampler() as memory:
+        start = time.perf_counter()
+        for i in range(repeats):
+            t = time.perf_counter()
+            call(i)
+            latencies.append((time.perf_counter() - t) * 1000)
+        elapsed = time.perf_counter() - start
+    return summarize_latencies(latencies, elapsed, 0, memory.peak)
+
+
+async def sweep(call, concurrency: int, requests: int) -> dict:
+    """Run `requests` calls of `call(i) -> ok` with `concurrency` in flight"""
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception as e:
+                print(f"  request {i} failed: {e}")
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    with MemorySampler() as memory:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return summarize_latencies(latencies, elapsed, errors, memory.peak)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=backend_dir, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def record(results: list, scenario: str, params: dict, metrics: dict):
+    results.append(dict(scenario=scenario, params=params, **metrics))
+    label = " ".join(f"{k}={v}" for k, v in params.items())
+    print(f"{scenario:<22} {label:<46} {metrics['throughput_per_s'] or 0:9.2f}/s  p50 {metrics['p50_ms']} ms  "
+          f"p95 {metrics['p95_ms']} ms  p99 {metrics['p99_ms']} ms  errors {metrics['errors']}  "
+          f"rss {metrics['peak_rss_mb']} MB")
+
+
+def run_micro(args, results: list, rng: random.Random):
+    from app.embed_utils import chunk_text, embed_chunks, search_chunks
+    from app.minimal_summarizer import MinimalSummarizer
+    from app.pdf_utils import extract_text_from_pdf
+
+    for pages in args.pages:
+        pdfs = [synthetic_pdf([synthetic_page(rng, args.words_per_page) for _ in range(pages)])
+                for _ in range(args.repeats)]
+        record(results, "extract_text_from_pdf", {"pages": pages},
+               time_function(lambda i: extract_text_from_pdf(pdfs[i]), args.repeats))
+        texts = [" ".join(synthetic_page(rng, args.words_per_page) for _ in range(pages))
+                 for _ in range(args.repeats)]
+        record(results, "chunk_text", {"pages": pages},
+               time_function(lambda i: chunk_text(texts[i]), args.repeats))
+        chunks = chunk_text(texts[0])
+        embeddings = embed_chunks(chunks)
+        record(results, "search_chunks", {"pages": pages, "chunks": len(chunks)},
+               time_function(lambda i: search_chunks(f"{WORDS[i % len(WORDS)]} results", chunks, embeddings),
+                             args.repeats))
+        summarizer = MinimalSummarizer()
+        for method in ("frequency", "tfidf", "textrank"):
+            record(results, "minimal_summarizer", {"pages": pages, "method": method},
+                   time_function(lambda i: summarizer.extractive_summarize(texts[i], 5, method), args.repeats))
+
+
+async def run_api(args, results: list, rng: random.Random):
+    import httpx
+    from app.main import app, warmup
+
+    warmup.load_all()  # ASGITransport does not run startup hooks
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        models = args.models or list((await client.get("/models/")).json()["available_models"])
+        sequence = iter(range(10 ** 9))  # Unique content per request, so no cache answers for it
+
+        for pages in args.pages:
+            async def upload(i):
+                n = next(sequence)
+                pdf = synthetic_pdf([f"Document {n}. " + synthetic_page(rng, args.words_per_page)
+                                     for _ in range(pages)])
+                response = await client.post("/upload-pdf/", files={"file": (f"bench-{n}.pdf", pdf, "application/pdf")})
+                if response.status_code != 202:
+                    return False
+                status_url = response.json()["status_url"]
+                while True:
+                    status = (await client.get(status_url)).json()["status"]
+                    if status in ("completed", "failed"):
+                        return status == "completed"
+                    await asyncio.sleep(0.01)
+
+            for concurrency in args.concurrency:
+                record(results, "upload", {"pages": pages, "concurrency": concurrency},
+                       await sweep(upload, concurrency, args.requests))
+
+        for mode in ("semantic", "lexical", "hybrid"):
+            async def search(i):
+                query = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {next(sequence)}"
+                response = await client.post("/search/", data={"query": query, "mode": mode, "top_k": 5})
+                return response.status_code == 200
+
+            for concurrency in args.concurrency:
+                record(results, "search", {"mode": mode, "concurrency": concurrency},
+                       await sweep(search, concurrency, args.requests))
+
+        text_pages = max(args.pages)
+        for model in models:
+            for style in args.styles:
+                async def summarize(i):
+                    text = f"Request {next(sequence)}. " + " ".join(
+                        synthetic_page(rng, args.words_per_page) for _ in range(text_pages))
+                    response = await client.post("/summarize/", json={"text": text, "model": model, "style": style})
+                    return response.status_code == 200
+
+                for concurrency in args.concurrency:
+                    record(results, "summarize", {"model": model, "style": style, "pages": text_pages,
+                                                  "concurrency": concurrency},
+                           await sweep(summarize, concurrency, args.requests))
+
+
+def compare(results: list, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    key = lambda r: (r["scenario"], json.dumps(r["params"], sort_keys=True))
+    previous = {key(r): r for r in baseline["results"]}
+    print(f"\nChange versus {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    change = lambda new, old: f"{(new - old) / old * 100:+7.1f}%" if new is not None and old else "    n/a"
+    for r in results:
+        old = previous.get(key(r))
+        if old is None:
+            continue
+        label = " ".join(f"{k}={v}" for k, v in r["params"].items())
+        print(f"{r['scenario']:<22} {label:<46} throughput {change(r['throughput_per_s'], old['throughput_per_s'])}  "
+              f"p95 {change(r['p95_ms'], old['p95_ms'])}  peak rss {change(r['peak_rss_mb'], old['peak_rss_mb'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 32], help="Synthetic paper sizes")
+    parser.add_argument("--words-per-page", type=int, default=450)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per scenario and concurrency level")
+    parser.add_argument("--repeats", type=int, default=5, help="Calls per function micro-benchmark")
+    parser.add_argument("--models", nargs="+", help="Summarization models (default: every available model)")
+    parser.add_argument("--styles", nargs="+", default=["academic", "brief", "detailed"])
+    parser.add_argument("--real-models", action="store_true", help="Use the configured models, not stand-ins")
+    parser.add_argument("--stand-in-embed-ms", type=float, default=0.0, help="Simulated cost per embedded text")
+    parser.add_argument("--stand-in-generate-ms", type=float, default=0.0, help="Simulated cost per summarized chunk")
+    parser.add_argument("--skip-api", action="store_true", help="Only run the function micro-benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_e2e.json")
+    parser.add_argument("--compare", help="Earlier --output file to diff against")
+    args = parser.parse_args()
+
+    if not args.real_models:
+        import stand_ins
+        stand_ins.install(args.stand_in_embed_ms, args.stand_in_generate_ms)
+        os.environ["INFERENCE_MODE"] = "inprocess"  # A spawned inference process would load the real models
+    # Isolated, empty state: nothing is read from or left in the working directories
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    for name in ("INDEX_DIR", "CACHE_DIR", "PROFILE_DIR", "ONNX_MODEL_DIR"):
+        os.environ.setdefault(name, os.path.join(workdir, name.lower()))
+    os.environ["JOB_STATE_DIR"] = ""
+    os.environ["WARMUP_POLICY"] = "lazy"
+    os.environ["SUPABASE_URL"] = ""  # Never write benchmark documents to a real Supabase project
+
+    rng = random.Random(args.seed)
+    results = []
+    run_micro(args, results, rng)
+    if not args.skip_api:
+        asyncio.run(run_api(args, results, rng))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "stand_ins": not args.real_models,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Compare embedding backends (EMBEDDING_BACKEND) against the fp32 torch model:
+throughput in texts/second, and cosine agreement of every embedding with its
+fp32 counterpart. Exits non-zero if any backend's lowest cosine similarity is
+below --tolerance, so it can gate a backend switch in CI. ONNX backends need
+onnxruntime (and export the model to ONNX_MODEL_DIR on first use).
+
+Usage: python benchmarks/bench_embedding_backends.py --backends torch-int8 onnx onnx-int8 --threads 4
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.embed_utils import EMBEDDING_MODEL_NAME
+from app.encoder_utils import EMBEDDING_BACKENDS, load_encoder
+from app.index_utils import normalize_vectors
+
+WORDS = ("model data results analysis method study protein network training accuracy "
+         "sample experiment significant approach performance evaluation baseline signal").split()
+
+
+def synthetic_chunks(n: int, seed: int = 0) -> list:
+    """Chunks from a few words to a full embedding window, so length-sorted batching matters"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.choice([4, 12, 30, 90]))) for _ in range(n)]
+
+
+def throughput(encoder, texts: list, batch_size: int) -> float:
+    encoder.encode(texts[:batch_size], batch_size=batch_size)  # Warm up
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=["torch-int8", "onnx", "onnx-int8"])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 128])
+    parser.add_argument("--threads", type=int, default=0, help="0 = library default")
+    parser.add_argument("--tolerance", type=float, default=0.98, help="Minimum cosine similarity to fp32")
+    args = parser.parse_args()
+
+    texts = synthetic_chunks(args.chunks)
+    reference = load_encoder(EMBEDDING_MODEL_NAME, "torch", threads=args.threads)
+    expected = normalize_vectors(reference.encode(texts))
+
+    failed = False
+    print(f"{'backend':<11} {'batch':>6} {'texts/s':>9} {'speedup':>8} {'min cos':>8} {'mean cos':>9}")
+    for batch_size in args.batch_sizes:
+        baseline = throughput(reference, texts, batch_size)
+        print(f"{'torch':<11} {batch_size:6d} {baseline:9.1f} {1.0:7.2f}x {1.0:8.4f} {1.0:9.4f}")
+    for backend in args.backends:
+        encoder = load_encoder(EMBEDDING_MODEL_NAME, backend, threads=args.threads)
+        if encoder.backend != backend:
+            print(f"{backend:<11} unavailable (fell back to {encoder.backend})")
+            failed = True
+            continue
+        cosines = np.sum(normalize_vectors(encoder.encode(texts)) * expected, axis=1)
+        for batch_size in args.batch_sizes:
+            rate = throughput(encoder, texts, batch_size)
+            baseline = throughput(reference, texts, batch_size)
+            print(f"{backend:<11} {batch_size:6d} {rate:9.1f} {rate / baseline:7.2f}x "
+                  f"{cosines.min():8.4f} {cosines.mean():9.4f}")
+        if cosines.min() < args.tolerance:
+            print(f"❌ {backend}: cosine similarity {cosines.min():.4f} to fp32 is below {args.tolerance}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark the rule-based MinimalSummarizer on multi-megabyte inputs: the old
+per-sentence dictionary loops against the vectorized sentence x term matrix,
+plus the TF-IDF and TextRank scoring modes. Checks that the vectorized
+frequency scorer picks the same sentences as the loop.
+
+Also times abstractive_summary (the indicator scorer summarize_text_minimal
+and the overload fallback use) against the original sort, on the same text
+and on text with one long unpunctuated run, which must not cost more than
+its length.
+
+Usage: python benchmarks/bench_minimal_summarizer.py --megabytes 1 4
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.minimal_summarizer import TOKEN_PATTERN, MinimalSummarizer
+
+WORDS = ("model data results analysis method study protein network training accuracy "
+         "sample experiment significant approach performance evaluation baseline signal "
+         "the of and with for findings conclusion research key important process").split()
+
+
+def synthetic_text(megabytes: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    sentences, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 30))).capitalize() + "."
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def loop_extractive(summarizer: MinimalSummarizer, text: str, num_sentences: int) -> str:
+    """The original scorer: one dictionary pass to count, another to score each sentence"""
+    text = re.sub(r'\s+', ' ', text.strip())
+    sentences = summarizer.sent_tokenize(text)
+    if len(sentences) <= num_sentences:
+        return text
+    word_freq = {}
+    for sentence in sentences:
+        for word in TOKEN_PATTERN.findall(sentence.lower()):
+            if word not in summarizer.stopwords and len(word) > 2:
+                word_freq[word] = word_freq.get(word, 0) + 1
+    sentence_scores = {}
+    for i, sentence in enumerate(sentences):
+        score = word_count = 0
+        for word in TOKEN_PATTERN.findall(sentence.lower()):
+            if word in word_freq:
+                score += word_freq[word]
+                word_count += 1
+        sentence_scores[i] = score / word_count if word_count else 0
+    top_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:num_sentences]
+    return ' '.join(sentences[idx] for idx in sorted(idx for idx, _ in top_sentences))
+
+
+def loop_abstractive(summarizer: MinimalSummarizer, text: str, style: str = "academic") -> str:
+    """The original indicator scorer: a substring test per sentence, then a full sort"""
+    sentences = summarizer.sent_tokenize(text)
+    indicators = ['results', 'conclusion', 'findings', 'analysis', 'study', 'research', 'data', 'significant']
+    scored = [(sentence, sum(1 for ind in indicators if ind in sentence.lower())) for sentence in sentences]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return ' '.join(sentence for sentence, _ in scored[:min(3, len(scored))])
+
+
+def unpunctuated_run(sentences: int = 5000, run_words: int = 40000, seed: int = 0) -> str:
+    """Ordinary sentences plus one long span without a sentence end (e.g. a flattened table)"""
+    rng = random.Random(seed)
+    text = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 30))).capitalize() + "."
+            for _ in range(sentences)]
+    text.insert(sentences // 2, " ".join(rng.choice(WORDS) for _ in range(run_words)) + ".")
+    return " ".join(text)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1.0, 4.0])
+    parser.add_argument("--sentences", type=int, default=5, help="Summary length")
+    parser.add_argument("--textrank", action="store_true", help="Also time TextRank (slow on huge inputs)")
+    args = parser.parse_args()
+
+    summarizer = MinimalSummarizer()
+    for megabytes in args.megabytes:
+        text = synthetic_text(megabytes)
+        baseline, loop_time = timed(loop_extractive, summarizer, text, args.sentences)
+        summary, fast_time = timed(summarizer.extractive_summarize, text, args.sentences)
+        print(f"{megabytes:.1f} MB  loop       {loop_time:7.3f} s")
+        print(f"{megabytes:.1f} MB  vectorized {fast_time:7.3f} s  {loop_time / fast_time:5.2f}x  "
+              f"same selection: {summary == baseline}")
+        _, tfidf_time = timed(summarizer.extractive_summarize, text, args.sentences, method="tfidf")
+        print(f"{megabytes:.1f} MB  tfidf      {tfidf_time:7.3f} s")
+        if args.textrank:
+            _, rank_time = timed(summarizer.extractive_summarize, text, args.sentences, method="textrank")
+            print(f"{megabytes:.1f} MB  textrank   {rank_time:7.3f} s")
+
+    inputs = [(f"{megabytes:.1f} MB", synthetic_text(megabytes)) for megabytes in args.megabytes]
+    inputs.append(("long run", unpunctuated_run()))
+    for label, text in inputs:
+        baseline, loop_time = timed(loop_abstractive, summarizer, text)
+        summary, fast_time = timed(summarizer.abstractive_summary, text)
+        print(f"{label:>8}  abstractive loop {loop_time:7.3f} s  current {fast_time:7.3f} s  "
+              f"same selection: {summary == baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark retrieval modes (lexical BM25, semantic, hybrid RRF) on a synthetic
+corpus: latency per query (including query embedding where needed) and
+quality as recall@k and MRR for two query sets: exact-term queries naming a
+chunk's unique identifier (like a gene name or equation label), and topical
+queries built from a chunk's content words.
+
+--embedder model uses the real sentence-transformers model; --embedder hashing
+uses a deterministic bag-of-words stand-in so the benchmark runs offline.
+
+Usage: python benchmarks/bench_retrieval.py --chunks 20000 --queries 200 --embedder model
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.index_utils import VectorIndex
+from app.lexical_utils import tokenize
+
+
+def hashing_embed(texts, dim: int = 256) -> np.ndarray:
+    """Signed feature hashing of terms: a crude, offline stand-in for a sentence encoder"""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for term in tokenize(text):
+            h = zlib.crc32(term.encode("utf-8"))
+            vectors[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    return vectors
+
+
+def synthetic_corpus(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    topics = [[f"{prefix}{i}" for i in range(40)] for prefix in
+              ("cell", "neur", "qubit", "climate", "graph", "protein", "market", "solar")]
+    topics = [[word.rstrip("0123456789") + chr(97 + int(i) % 26) * 3 + str(i)
+               for i, word in enumerate(words)] for words in topics]
+    chunks, identifiers, content = [], [], []
+    for i in range(n):
+        words = rng.choice(topics)
+        picked = [rng.choice(words) for _ in range(rng.randint(25, 60))]
+        identifier = f"XR{i:06d}"
+        sentence = " ".join(picked[:10]) + f" were measured alongside {identifier}. " + " ".join(picked[10:]) + "."
+        chunks.append(sentence)
+        identifiers.append(identifier)
+        content.append(picked)
+    return chunks, identifiers, content
+
+
+def evaluate(run, queries, targets, top_k: int):
+    latencies, hits, reciprocal = [], 0, 0.0
+    for query, target in zip(queries, targets):
+        start = time.perf_counter()
+        results = run(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        rows = [r["chunk_index"] for r in results]
+        if target in rows:
+            hits += 1
+            reciprocal += 1.0 / (rows.index(target) + 1)
+    latencies = np.array(latencies)
+    return {"p50": np.percentile(latencies, 50), "p95": np.percentile(latencies, 95),
+            "recall": hits / len(queries), "mrr": reciprocal / len(queries)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--embedder", choices=["model", "hashing"], default="model")
+    args = parser.parse_args()
+
+    if args.embedder == "model":
+        from app.embed_utils import get_model
+        model = get_model()
+        embed = lambda texts: model.encode(texts, batch_size=256)
+    else:
+        embed = hashing_embed
+
+    chunks, identifiers, content = synthetic_corpus(args.chunks)
+    index = VectorIndex(tempfile.mkdtemp(prefix="bench_retrieval_"), engine="exact")
+    start = time.perf_counter()
+    index.add("corpus", chunks, embed(chunks))
+    print(f"Indexed {len(chunks)} chunks (embeddings + BM25) in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(1)
+    targets = rng.sample(range(args.chunks), args.queries)
+    query_sets = {
+        "exact-term": [f"results for {identifiers[t]}" for t in targets],
+        "topical": [" ".join(rng.sample(content[t], 6)) for t in targets],
+    }
+    modes = {
+        "lexical": lambda q: index.lexical_search(q, args.top_k),
+        "semantic": lambda q: index.search(embed([q]), args.top_k),
+        "hybrid": lambda q: index.hybrid_search(q, embed([q]), args.top_k),
+    }
+    print(f"{'queries':<11} {'mode':<9} {'p50 ms':>9} {'p95 ms':>9} {'recall@k':>9} {'MRR':>6}")
+    for set_name, queries in query_sets.items():
+        for mode, run in modes.items():
+            r = evaluate(run, queries, targets, args.top_k)
+            print(f"{set_name:<11} {mode:<9} {r['p50']:9.3f} {r['p95']:9.3f} {r['recall']:9.3f} {r['mrr']:6.3f}")
+
+
+if __name__ == "__main__":
+    main()
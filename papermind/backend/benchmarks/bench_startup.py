@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold start of the API for each warmup policy: time to import
+app.main, time until /health answers, and time until /ready reports the
+models loaded. Each policy runs in a fresh interpreter so nothing is cached
+in-process. --importtime also lists the slowest imports of app.main.
+
+Usage: python benchmarks/bench_startup.py --policies eager background lazy
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:  # Runs the startup hooks
+    assert client.get("/health").status_code == 200
+    healthy = time.perf_counter()
+    ready = None
+    while time.perf_counter() - start < TIMEOUT:
+        if client.get("/ready").status_code == 200:
+            ready = time.perf_counter()
+            break
+        time.sleep(0.05)
+    status = client.get("/ready").json()
+print(json.dumps({
+    "import_s": imported - start,
+    "health_s": healthy - start,
+    "ready_s": ready - start if ready else None,
+    "loaded": [name for name, c in status["components"].items() if c["loaded"]],
+}))
+"""
+
+
+def run_policy(policy: str, timeout: float) -> dict:
+    env = dict(os.environ, WARMUP_POLICY=policy)
+    code = CHILD.replace("TIMEOUT", str(timeout))
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, env=env,
+                         capture_output=True, text=True, timeout=timeout + 120)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr[-2000:])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int):
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                         cwd=backend_dir, capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    for cumulative_us, name in sorted(rows, reverse=True)[:limit]:
+        print(f"{cumulative_us / 1000:9.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policies", nargs="+", default=["eager", "background", "lazy"])
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for /ready")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="Show the N slowest imports")
+    args = parser.parse_args()
+
+    print(f"{'policy':<12} {'import':>9} {'/health':>9} {'/ready':>9}  loaded")
+    for policy in args.policies:
+        result = run_policy(policy, args.timeout)
+        ready = f"{result['ready_s']:8.2f}s" if result["ready_s"] is not None else "  timeout"
+        print(f"{policy:<12} {result['import_s']:8.2f}s {result['health_s']:8.2f}s {ready}  "
+              f"{', '.join(result['loaded']) or '-'}")
+
+    if args.importtime:
+        print()
+        slowest_imports(args.importtime)
+
+
+if __name__ == "__main__":
+    main()
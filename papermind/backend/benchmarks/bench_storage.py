@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark chunk persistence: one insert per chunk (the old upload path) versus
+batched, concurrent inserts. Runs against the local stand-in backend with a
+simulated network round trip, so no Supabase project is needed.
+
+--upsert writes chunks as upserts on (pdf_id, chunk_index) (STORAGE_UPSERT);
+add --no-constraint to check the fallback to plain inserts on a table that
+lacks the unique constraint, as existing Supabase schemas do.
+
+Usage: python benchmarks/bench_storage.py --chunks 400 --latency-ms 40
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.storage_utils import CHUNK_CONFLICT_COLUMNS, BatchWriter, LocalBackend
+
+
+def per_row(backend: LocalBackend, chunks: list) -> float:
+    start = time.perf_counter()
+    for i, chunk in enumerate(chunks):
+        backend.insert_rows("chunks", [{"pdf_id": 1, "chunk_index": i, "content": chunk}])
+    return time.perf_counter() - start
+
+
+def batched(backend: LocalBackend, chunks: list, batch_size: int, connections: int, upsert: bool) -> float:
+    writer = BatchWriter(backend, batch_size=batch_size, max_connections=connections, backoff=0.01, upsert=upsert)
+    start = time.perf_counter()
+    writer.write_chunks(1, chunks)
+    elapsed = time.perf_counter() - start
+    writer.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="Simulated round trip per request")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--fail-every", type=int, default=0, help="Inject a failure every N requests")
+    parser.add_argument("--upsert", action="store_true", help="Upsert on (pdf_id, chunk_index)")
+    parser.add_argument("--no-constraint", action="store_true", help="Table lacks the unique constraint")
+    args = parser.parse_args()
+
+    chunks = [f"Chunk {i} of a synthetic paper. " * 10 for i in range(args.chunks)]
+    latency = args.latency_ms / 1000.0
+
+    baseline = per_row(LocalBackend(latency), chunks)
+    print(f"{args.chunks} chunks, {args.latency_ms:.0f} ms simulated round trip")
+    print(f"{'per-row inserts':<28} {baseline:7.3f} s  {args.chunks:4d} requests")
+
+    for batch_size in args.batch_size:
+        unique = {} if args.no_constraint else {"chunks": CHUNK_CONFLICT_COLUMNS}
+        backend = LocalBackend(latency, fail_every=args.fail_every, unique=unique)
+        elapsed = batched(backend, chunks, batch_size, args.connections, args.upsert)
+        assert len(backend.tables["chunks"]) == args.chunks
+        print(f"{f'batch={batch_size} conns={args.connections}':<28} {elapsed:7.3f} s  "
+              f"{backend.requests:4d} requests  {baseline / elapsed:6.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark summarization throughput (chunks/second) of the one-chunk-at-a-time
+loop against batched pipeline calls, for each entry in AVAILABLE_MODELS.
+Models are downloaded from the Hugging Face hub on first use.
+
+Usage: python benchmarks/bench_summarizer.py --models distilbart t5 --batch-sizes 4 8
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.chunk_utils import SUMMARY_CHUNK_TOKENS
+from app.summarizer_utils import AVAILABLE_MODELS, PaperMindSummarizer
+
+WORDS = ("model data results analysis method study protein network training accuracy "
+         "sample experiment significant approach performance evaluation baseline signal").split()
+
+
+def synthetic_paper(sentences: int, seed: int = 0) -> str:
+    """Sentences of varying length so chunk token counts differ"""
+    rng = random.Random(seed)
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def measure(summarizer: PaperMindSummarizer, text: str, batch_size: int, chunk_tokens: int) -> float:
+    chunks = len(summarizer.smart_chunk_text(text, chunk_tokens))
+    start = time.perf_counter()
+    summarizer.summarize_text(text, chunk_tokens, "academic", batch_size=batch_size)
+    return chunks / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=list(AVAILABLE_MODELS))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--sentences", type=int, default=120)
+    parser.add_argument("--chunk-tokens", type=int, default=SUMMARY_CHUNK_TOKENS, help="Chunk size in model tokens")
+    args = parser.parse_args()
+
+    text = synthetic_paper(args.sentences)
+    for key in args.models:
+        summarizer = PaperMindSummarizer(AVAILABLE_MODELS[key])
+        summarizer.summarize_text(text[:2000], args.chunk_tokens, batch_size=1)  # Warm up
+
+        baseline = measure(summarizer, text, 1, args.chunk_tokens)
+        print(f"{key:<12} loop        {baseline:7.2f} chunks/s")
+        for batch_size in args.batch_sizes:
+            rate = measure(summarizer, text, batch_size, args.chunk_tokens)
+            print(f"{key:<12} batch={batch_size:<5} {rate:7.2f} chunks/s  {rate / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark text normalization on multi-megabyte paper text, for both chunkers:
+
+- summary: a whole document as /summarize/ receives it. The old chain (six
+  re.sub passes in preprocess_academic_text, then sentence splitting of the
+  whole string) against SUMMARY_NORMALIZER feeding the sentence splitter
+  segment by segment.
+- embedding: page texts as ingestion receives them. The whitespace join in
+  pdf_utils plus the newline replace in chunk_text, against
+  normalize_whitespace plus EMBED_NORMALIZER (whitespace only by default;
+  set EMBED_TEXT_CLEANUP=citations,urls to time the opt-in cleanup).
+
+Reports the best wall time and the peak traced allocation of each path.
+
+The old figure/table rule ran `[^\\n]*` over text whose newlines were already
+collapsed, deleting everything after the first reference; the baseline here
+uses the bounded rule so both paths do comparable work.
+
+Usage: python benchmarks/bench_text_normalization.py --megabytes 10 25
+"""
+import argparse
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.chunk_utils import split_sentences
+from app.normalize_utils import EMBED_NORMALIZER, SUMMARY_NORMALIZER, normalize_whitespace
+
+WORDS = ("model data results analysis method study protein network training accuracy "
+         "sample experiment significant approach performance evaluation baseline signal "
+         "the of and with for findings conclusion research key important process").split()
+ARTIFACTS = [" [12]", " [3, 4]", " (Fig. 2)", " as shown in Table 3", " https://example.org/paper/42",
+             " doi:10.1000/xyz123", " Smith et al."]
+
+
+def synthetic_paper(megabytes: float, seed: int = 0) -> str:
+    """Raw extracted-looking text: ~80 character lines, double spaces, citations, links and captions"""
+    rng = random.Random(seed)
+    lines, line, size = [], [], 0
+    while size < megabytes * 1024 * 1024:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 30))]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(ARTIFACTS).strip())
+        sentence = " ".join(words).capitalize() + "."
+        if rng.random() < 0.02:
+            sentence = f"Figure {rng.randint(1, 9)}: {sentence}"
+        for word in sentence.split(" "):
+            line.append(word)
+            if sum(len(w) + 1 for w in line) > 80:
+                lines.append(("  " if rng.random() < 0.1 else " ").join(line))
+                size += len(lines[-1]) + 1
+                line = []
+    lines.append(" ".join(line))
+    return "\n".join(lines)
+
+
+def old_preprocess(text: str) -> str:
+    """preprocess_academic_text before the single-pass normalizer (figure rule bounded, see above)"""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\b(Figure|Table|Fig\.|Tab\.)\s+\d+[a-z]?(?::[^.!?]*[.!?]?)?', '', text)
+    text = re.sub(r'\[\d+\]', '', text)
+    text = re.sub(r'\b(et al\.)', 'and colleagues', text)
+    text = re.sub(r'http[s]?://\S+', '', text)
+    text = re.sub(r'doi:\S+', '', text)
+    return text.strip()
+
+
+def paginate(raw: str, lines_per_page: int = 45) -> list:
+    lines = raw.split("\n")
+    return ["\n".join(lines[i:i + lines_per_page]) for i in range(0, len(lines), lines_per_page)]
+
+
+def old_summary_path(raw: str) -> int:
+    return len(split_sentences(old_preprocess(raw)))  # smart_chunk_text
+
+
+def new_summary_path(raw: str) -> int:
+    return sum(len(split_sentences(segment)) for segment in SUMMARY_NORMALIZER.iter_normalized([raw]))
+
+
+def old_embed_path(pages: list) -> int:
+    sentences = 0
+    for page in pages:
+        text = ' '.join(page.split())  # pdf_utils
+        sentences += len(split_sentences(text.replace('\n', ' ')))  # chunk_text
+    return sentences
+
+
+def new_embed_path(pages: list) -> int:
+    texts = (normalize_whitespace(page) for page in pages)  # pdf_utils
+    return sum(len(split_sentences(segment)) for segment in EMBED_NORMALIZER.iter_normalized(texts, collapsed=True))
+
+
+def measure(fn, text, repeats: int):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        sentences = fn(text)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sentences, best, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[10.0, 25.0])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'input':>8} {'path':<10} {'pipeline':<12} {'sentences':>10} {'seconds':>8} {'peak MB':>8} {'speedup':>8}")
+    for megabytes in args.megabytes:
+        raw = synthetic_paper(megabytes)
+        pages = paginate(raw)
+        for path, old, new, data in (("summary", old_summary_path, new_summary_path, raw),
+                                     ("embedding", old_embed_path, new_embed_path, pages)):
+            old_sentences, old_time, old_peak = measure(old, data, args.repeats)
+            new_sentences, new_time, new_peak = measure(new, data, args.repeats)
+            print(f"{megabytes:6.1f}MB {path:<10} {'multi-pass':<12} {old_sentences:10d} {old_time:8.3f} "
+                  f"{old_peak:8.1f}")
+            print(f"{megabytes:6.1f}MB {path:<10} {'normalizer':<12} {new_sentences:10d} {new_time:8.3f} "
+                  f"{new_peak:8.1f} {old_time / new_time:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
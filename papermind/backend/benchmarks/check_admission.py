@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Overload check for admission control: floods /summarize/ with slow summaries
+(stand-in models from benchmarks/stand_ins.py with a fixed generation cost per
+chunk) while probing /health and lexical /search/ in the same process, the
+way a single uvicorn worker sees it. Reports how the summaries were answered
+(complete, partial at the deadline, degraded to the minimal summarizer, or
+shed with 429/503), probe latency, and /admission/stats/.
+
+Exits non-zero if a probe's p95 latency exceeds --max-probe-ms.
+
+Usage: python benchmarks/check_admission.py --summaries 24 --generate-cost-ms 400 --deadline 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+TEXT = ("This study presents an analysis of protein folding data [4]. The main results show a significant "
+        "improvement over the baseline (Fig. 2). Our approach uses a simple process with a key training step. ")
+
+
+def percentile(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+
+
+async def probe(client, method: str, url: str, stop: asyncio.Event, latencies: list, **kwargs):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def run(args) -> int:
+    import httpx
+    from app.main import app, get_index, warmup
+    import numpy as np
+
+    warmup.load_all()
+    # One tiny document so lexical search has something to score
+    get_index().add("check", ["protein folding results on the baseline"], np.ones((1, 384), dtype=np.float32))
+
+    outcomes = Counter()
+    probes = {"health": [], "search": []}
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=300) as client:
+        async def summarize():
+            response = await client.post("/summarize/", json={
+                "text": TEXT * args.repeat_text, "model": "bart", "chunk_tokens": 64,
+                "time_budget": args.deadline})
+            body = response.json()
+            if response.status_code != 200:
+                outcomes[str(response.status_code)] += 1
+            elif body.get("degraded"):
+                outcomes["degraded"] += 1
+            elif body.get("partial"):
+                outcomes["partial"] += 1
+            else:
+                outcomes["complete"] += 1
+
+        probers = [
+            asyncio.create_task(probe(client, "GET", "/health", stop, probes["health"])),
+            asyncio.create_task(probe(client, "POST", "/search/", stop, probes["search"],
+                                      data={"query": "protein folding", "mode": "lexical"})),
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*(summarize() for _ in range(args.summaries)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*probers)
+        stats = (await client.get("/admission/stats/")).json()
+
+    print(f"{args.summaries} concurrent summaries in {elapsed:.1f}s: {dict(outcomes)}")
+    failed = False
+    for name, latencies in probes.items():
+        p95 = percentile(latencies, 0.95)
+        print(f"/{name}: {len(latencies)} probes, p50 {percentile(latencies, 0.5):.1f} ms, "
+              f"p95 {p95:.1f} ms, max {max(latencies, default=0):.1f} ms")
+        failed |= p95 > args.max_probe_ms
+    print(json.dumps(stats, indent=2))
+    if failed:
+        print(f"❌ Probe p95 latency above {args.max_probe_ms} ms under summarization load")
+        return 1
+    print("✅ Health and search stayed responsive under summarization load")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--summaries", type=int, default=24, help="Concurrent /summarize/ requests")
+    parser.add_argument("--generate-cost-ms", type=float, default=400.0, help="Stand-in generation time per chunk")
+    parser.add_argument("--repeat-text", type=int, default=20, help="Input size, in repeats of a 3-sentence text")
+    parser.add_argument("--deadline", type=float, default=3.0, help="time_budget sent with each summary")
+    parser.add_argument("--max-probe-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    import stand_ins
+    stand_ins.install(generate_cost_ms=args.generate_cost_ms)
+    workdir = tempfile.mkdtemp(prefix="check_admission_")
+    os.environ.update(INDEX_DIR=os.path.join(workdir, "index"), CACHE_DIR=os.path.join(workdir, "cache"),
+                      INFERENCE_MODE="inprocess", WARMUP_POLICY="lazy", JOB_STATE_DIR="", SUPABASE_URL="",
+                      SUMMARY_CACHE_SIZE="0")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Check that the rule-based minimal summarizer stays off the network and off
+NLTK's downloader on the request path, and report its setup and per-request
+latency. Any socket connection or nltk.download() call made after startup
+fails the check.
+
+Usage: python benchmarks/check_minimal_offline.py --requests 200
+"""
+import argparse
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app import minimal_summarizer
+
+TEXT = ("This study presents an analysis of protein folding data. The main results show a significant "
+        "improvement over the baseline. Our approach uses a simple process with a key training step. "
+        "The findings support the conclusion that the method generalizes. Further research is needed. ") * 20
+
+blocked = []
+
+
+def guard_network():
+    """Record and refuse every outbound connection and NLTK download"""
+    def refuse(name):
+        def call(*args, **kwargs):
+            blocked.append(name)
+            raise RuntimeError(f"{name} attempted on the request path")
+        return call
+
+    socket.socket.connect = refuse("socket.connect")
+    socket.create_connection = refuse("socket.create_connection")
+    try:
+        import nltk
+        nltk.download = refuse("nltk.download")
+    except ImportError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--max-setup-ms", type=float, default=1.0, help="Budget for a request's setup cost")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    minimal_summarizer.get_minimal_summarizer()  # Startup preload
+    print(f"startup preload  {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    guard_network()
+    setup, total = [], []
+    for style in ("academic", "brief", "detailed") * (args.requests // 3 + 1):
+        start = time.perf_counter()
+        minimal_summarizer.get_minimal_summarizer()
+        setup.append((time.perf_counter() - start) * 1000)
+        minimal_summarizer.summarize_text_minimal(TEXT, style)
+        total.append((time.perf_counter() - start) * 1000)
+
+    setup.sort()
+    total.sort()
+    print(f"request setup    {setup[len(setup) // 2]:8.4f} ms p50  {setup[-1]:8.4f} ms max")
+    print(f"request total    {total[len(total) // 2]:8.2f} ms p50  {total[-1]:8.2f} ms max")
+    print(f"blocked network/download attempts: {len(blocked)}")
+    if blocked or setup[-1] > args.max_setup_ms:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Check that upload memory stays flat as PDF size grows: for each size a fresh
+process starts the app in-process (with the stand-in models of
+benchmarks/stand_ins.py), streams a synthetic scanned-style PDF (one
+incompressible 1 MB page image plus a line of text per page) to
+/upload-pdf/, waits for ingestion to finish and reports how far its resident
+set size rose above the idle baseline. Extraction runs inline
+(INGEST_EXTRACT_PROCESSES=0) so parsing is counted too.
+
+Two rises are reported: anonymous RSS (heap, buffers: what actually has to
+stay flat) and total RSS, which also counts the pages of the memory-mapped
+PDF the parser has touched. Those are shared page cache the kernel can drop
+under pressure, so total RSS grows with the file by design.
+
+Exits non-zero if the anonymous rise for the largest file exceeds the rise for
+the smallest by more than --tolerance-mb.
+
+Usage: python benchmarks/check_upload_memory.py --megabytes 16 64 256
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+PAGE_IMAGE_BYTES = 1024 * 1024  # 1024 x 1024 8-bit grayscale
+
+
+def anonymous_rss_bytes() -> int:
+    """Resident memory not backed by a file (Linux)"""
+    with open("/proc/self/status") as f:
+        return int(re.search(r"RssAnon:\s+(\d+) kB", f.read()).group(1)) * 1024
+
+
+def write_scanned_pdf(path: str, pages: int):
+    """Write the PDF object by object, so generating a large file does not need it in memory"""
+    offsets = []
+    with open(path, "wb") as f:
+        def add(number: int, header: bytes, stream: bytes = None):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n".encode() + header)
+            if stream is not None:
+                f.write(b"\nstream\n" + stream + b"\nendstream")
+            f.write(b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        add(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{4 + 3 * k} 0 R" for k in range(pages))
+        add(2, f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+        add(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for k in range(pages):
+            page, content, image = 4 + 3 * k, 5 + 3 * k, 6 + 3 * k
+            add(page, (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents {content} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> /XObject << /Im1 {image} 0 R >> >> >>").encode())
+            text = (f"q 612 0 0 842 0 0 cm /Im1 Do Q BT /F1 10 Tf 40 40 Td (Scanned page {k + 1} of the "
+                    f"memory check, with results of the protein analysis study.) Tj ET").encode()
+            add(content, f"<< /Length {len(text)} >>".encode(), text)
+            add(image, (f"<< /Type /XObject /Subtype /Image /Width 1024 /Height 1024 /ColorSpace /DeviceGray "
+                        f"/BitsPerComponent 8 /Length {PAGE_IMAGE_BYTES} >>").encode(), os.urandom(PAGE_IMAGE_BYTES))
+        xref = f.tell()
+        f.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+        f.write(b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets))
+        f.write(f"trailer << /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode())
+
+
+async def upload(path: str) -> dict:
+    import httpx
+    from app.main import app, warmup
+
+    warmup.load_all()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=600) as client:
+        with open(path, "rb") as f:  # httpx streams file parts in chunks
+            response = await client.post("/upload-pdf/", files={"file": ("scan.pdf", f, "application/pdf")})
+        response.raise_for_status()
+        status_url = response.json()["status_url"]
+        while True:
+            job = (await client.get(status_url)).json()
+            if job["status"] in ("completed", "failed"):
+                return job
+            await asyncio.sleep(0.05)
+
+
+def child(megabytes: int):
+    import stand_ins
+    stand_ins.install()
+    workdir = tempfile.mkdtemp(prefix="check_upload_")
+    os.environ.update(INDEX_DIR=os.path.join(workdir, "index"), CACHE_DIR=os.path.join(workdir, "cache"),
+                      UPLOAD_SPOOL_DIR=os.path.join(workdir, "spool"), INGEST_EXTRACT_PROCESSES="0",
+                      INFERENCE_MODE="inprocess", WARMUP_POLICY="lazy", JOB_STATE_DIR="", SUPABASE_URL="",
+                      UPLOAD_MAX_BYTES=str((megabytes + 16) * 1024 * 1024))
+    path = os.path.join(workdir, "scan.pdf")
+    write_scanned_pdf(path, max(1, megabytes))
+
+    from app.metrics_utils import current_rss_bytes
+    import app.main  # noqa: F401  Import everything before taking the baseline
+    baseline = {"anon": anonymous_rss_bytes(), "total": current_rss_bytes()}
+    peak, stop = dict(baseline), threading.Event()
+
+    def sample():
+        while not stop.wait(0.01):
+            peak["anon"] = max(peak["anon"], anonymous_rss_bytes())
+            peak["total"] = max(peak["total"], current_rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    job = asyncio.run(upload(path))
+    stop.set()
+    sampler.join()
+    print(json.dumps({
+        "file_mb": round(os.path.getsize(path) / (1024 * 1024), 1),
+        "status": job["status"],
+        "chunks": (job["result"] or {}).get("chunks"),
+        "seconds": round(time.perf_counter() - start, 2),
+        "baseline_mb": round(baseline["anon"] / (1024 * 1024), 1),
+        "anon_rise_mb": round((peak["anon"] - baseline["anon"]) / (1024 * 1024), 1),
+        "total_rise_mb": round((peak["total"] - baseline["total"]) / (1024 * 1024), 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--tolerance-mb", type=float, default=48.0)
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        child(args.child)
+        return
+
+    results = []
+    print(f"{'file MB':>8} {'status':>10} {'chunks':>7} {'seconds':>8} {'anon rise MB':>13} {'total rise MB':>14}")
+    for megabytes in sorted(args.megabytes):
+        output = subprocess.run([sys.executable, __file__, "--child", str(megabytes)], capture_output=True,
+                                text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{result['file_mb']:8.1f} {result['status']:>10} {result['chunks']!s:>7} "
+              f"{result['seconds']:8.2f} {result['anon_rise_mb']:13.1f} {result['total_rise_mb']:14.1f}")
+
+    growth = results[-1]["anon_rise_mb"] - results[0]["anon_rise_mb"]
+    if any(r["status"] != "completed" for r in results):
+        print("❌ An upload did not complete")
+        sys.exit(1)
+    if growth > args.tolerance_mb:
+        print(f"❌ Anonymous RSS rise grew by {growth:.1f} MB from the smallest to the largest file "
+              f"(tolerance {args.tolerance_mb} MB)")
+        sys.exit(1)
+    print(f"✅ Anonymous RSS rise grew by {growth:.1f} MB across a {results[-1]['file_mb'] / results[0]['file_mb']:.0f}x "
+          f"larger file")
+
+
+if __name__ == "__main__":
+    main()
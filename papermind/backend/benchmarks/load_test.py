@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Load test: requests/second and latency of one endpoint versus the number of
+server worker processes. For each worker count a fresh server is started
+through start_production.py (WEB_CONCURRENCY=N), warmed up until /ready,
+then hit by concurrent clients for a fixed duration.
+
+Usage: python benchmarks/load_test.py --workers 1 2 4 --endpoint search --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+backend_dir = Path(__file__).resolve().parent.parent
+
+QUERIES = ["protein folding results", "training accuracy on the baseline", "significant findings",
+           "network architecture", "evaluation method", "sample size of the experiment"]
+TEXT = ("This study presents an analysis of protein folding data. The main results show a significant "
+        "improvement over the baseline. Our approach uses a simple process with a key training step. ") * 15
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), ENVIRONMENT="production")
+    return subprocess.Popen([sys.executable, "start_production.py"], cwd=backend_dir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+def stop_server(server: subprocess.Popen):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+
+
+async def wait_ready(base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout:.0f}s")
+
+
+async def one_request(client: httpx.AsyncClient, endpoint: str, i: int) -> int:
+    if endpoint == "search":
+        response = await client.post("/search/", data={"query": f"{QUERIES[i % len(QUERIES)]} {i}"})
+    elif endpoint == "summarize":
+        response = await client.post("/summarize/", json={"text": f"{TEXT} Request {i}.", "style": "brief"})
+    else:
+        response = await client.get("/health")
+    return response.status_code
+
+
+async def run_load(base_url: str, endpoint: str, concurrency: int, duration: float) -> dict:
+    latencies, errors = [], 0
+    counter = iter(range(10 ** 9))
+    deadline = time.monotonic() + duration
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await one_request(client, endpoint, next(counter))
+            except httpx.HTTPError:
+                status = 0
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else float("nan")
+    return {"rps": len(latencies) / elapsed, "p50": pick(0.5), "p95": pick(0.95), "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--endpoint", choices=["search", "summarize", "health"], default="search")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per worker count")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{args.endpoint}: {args.concurrency} concurrent clients, {args.duration:.0f}s per run")
+    baseline = None
+    for workers in args.workers:
+        server = start_server(workers, args.port)
+        try:
+            asyncio.run(wait_ready(base_url, args.ready_timeout))
+            asyncio.run(run_load(base_url, args.endpoint, args.concurrency, 2.0))  # Warm caches and connections
+            result = asyncio.run(run_load(base_url, args.endpoint, args.concurrency, args.duration))
+        finally:
+            stop_server(server)
+        baseline = baseline or result["rps"]
+        print(f"workers={workers:<3} {result['rps']:8.1f} req/s  {result['rps'] / baseline:5.2f}x  "
+              f"p50 {result['p50']:7.1f} ms  p95 {result['p95']:7.1f} ms  errors {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Tiny local stand-ins for the sentence-transformers and transformers models, so
+benchmarks exercise the whole application on a CPU box without network or
+model downloads. install() must run before the app is imported.
+
+The embedding stand-in hashes words into a fixed-size vector and the
+summarization stand-in returns the leading words of each input; both can be
+given a fixed cost per text to mimic model compute.
+"""
+import importlib.machinery
+import re
+import sys
+import time
+import types
+import zlib
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class WhitespaceTokenizer:
+    """Word and punctuation "tokens", with the call signature of a Hugging Face tokenizer"""
+    model_max_length = 1024
+
+    @classmethod
+    def from_pretrained(cls, name, **kwargs):
+        return cls()
+
+    def __call__(self, texts, add_special_tokens=False, **kwargs):
+        if isinstance(texts, str):
+            return {"input_ids": list(range(len(WORD_PATTERN.findall(texts))))}
+        return {"input_ids": [list(range(len(WORD_PATTERN.findall(text)))) for text in texts]}
+
+
+class HashingSentenceTransformer:
+    """Signed feature hashing of words in place of a sentence embedding model"""
+    cost_ms = 0.0  # Simulated compute per text
+
+    def __init__(self, model_name, device=None, dim: int = 384, **kwargs):
+        self.model_name = model_name
+        self.dim = dim
+        self.tokenizer = WhitespaceTokenizer()
+        self.max_seq_length = 128
+
+    def encode(self, texts, batch_size: int = 32, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if self.cost_ms:
+            time.sleep(self.cost_ms * len(texts) / 1000)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split()[:self.max_seq_length]:
+                h = zlib.crc32(word.encode("utf-8"))
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vectors[0] if single else vectors
+
+
+class LeadWordsPipeline:
+    """Summarization "pipeline" returning the leading words of each input"""
+    cost_ms = 0.0  # Simulated generation time per text
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.model = None  # No weights to account for
+        self.tokenizer = WhitespaceTokenizer()
+
+    def __call__(self, inputs, max_length: int = 50, min_length: int = 5, **kwargs):
+        batch = [inputs] if isinstance(inputs, str) else list(inputs)
+        if self.cost_ms:
+            time.sleep(self.cost_ms * len(batch) / 1000)
+        return [{"summary_text": " ".join(text.split()[:max(min_length, max_length // 2)])} for text in batch]
+
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__spec__ = importlib.machinery.ModuleSpec(name, None)  # So importlib.util.find_spec succeeds
+    module.__dict__.update(attributes)
+    return module
+
+
+def install(embed_cost_ms: float = 0.0, generate_cost_ms: float = 0.0):
+    """Register the stand-ins as the sentence_transformers and transformers modules"""
+    HashingSentenceTransformer.cost_ms = embed_cost_ms
+    LeadWordsPipeline.cost_ms = generate_cost_ms
+    sys.modules["sentence_transformers"] = _module(
+        "sentence_transformers", SentenceTransformer=HashingSentenceTransformer)
+    sys.modules["transformers"] = _module(
+        "transformers", AutoTokenizer=WhitespaceTokenizer,
+        pipeline=lambda task, model=None, **kwargs: LeadWordsPipeline(model))
@@ -0,0 +1,13 @@
+-- Unique (pdf_id, chunk_index) on chunks, needed by STORAGE_UPSERT=true: chunk batches are then
+-- upserted, so a retried batch whose first attempt was committed overwrites its rows instead of
+-- writing them twice. Run once in the Supabase SQL editor before enabling STORAGE_UPSERT.
+
+-- Drop duplicates left by earlier retries, keeping the first copy of each chunk
+delete from chunks a
+using chunks b
+where a.pdf_id = b.pdf_id
+  and a.chunk_index = b.chunk_index
+  and a.id > b.id;
+
+alter table chunks
+  add constraint chunks_pdf_id_chunk_index_key unique (pdf_id, chunk_index);
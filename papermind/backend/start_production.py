@@ -2,6 +2,14 @@
 """
 Production server startup script for PaperMind AI
 Optimized for Render deployment
+
+Set WEB_CONCURRENCY > 1 to run several worker processes. With gunicorn
+installed, the app and its models are loaded once in the master process and
+shared copy-on-write by the forked workers; the vector index is memory-mapped
+from INDEX_DIR, so every worker sees the same documents. The master loads the
+models with a single thread, so no thread pools exist when it forks; each
+worker then applies the configured thread counts (by default its share of the
+cores) to the models it inherited.
 """
 import os
 import sys
@@ -12,27 +20,98 @@ from pathlib import Path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
+THREAD_VARIABLES = ("SUMMARIZER_THREADS", "EMBEDDING_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS")
+
+def configure_workers(workers: int):
+    """Shared state and per-worker thread counts; must run before the app is imported"""
+    # Upload job status must be visible to whichever worker serves /jobs/{job_id}
+    os.environ.setdefault("JOB_STATE_DIR", str(backend_dir / "job_state"))
+    # Split the cores between workers instead of every worker using all of them
+    threads = str(max(1, (os.cpu_count() or 1) // workers))
+    os.environ.setdefault("SUMMARIZER_THREADS", threads)
+    os.environ.setdefault("EMBEDDING_THREADS", threads)
+    os.environ.setdefault("OMP_NUM_THREADS", threads)
+
+def limit_master_threads() -> dict:
+    """Pin thread counts to 1 while the master loads models; returns the values to restore.
+    Forking a process whose torch/OpenMP thread pools are running can deadlock the children
+    (ingestion spawns its extraction processes for the same reason)"""
+    saved = {name: os.environ.get(name) for name in THREAD_VARIABLES}
+    for name in THREAD_VARIABLES:
+        os.environ[name] = "1"
+    return saved
+
+def restore_threads(saved: dict):
+    for name, value in saved.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+def worker_threads():
+    """post_fork: apply the restored thread counts to the models the master loaded with one thread"""
+    torch = sys.modules.get("torch")
+    if torch is not None and os.environ.get("SUMMARIZER_THREADS"):
+        torch.set_num_threads(int(os.environ["SUMMARIZER_THREADS"]))
+    embed_utils = sys.modules.get("app.embed_utils")
+    if embed_utils is not None and embed_utils.is_model_loaded():
+        # Torch: process-wide like the above; ONNX: rebuilds the session with its own thread count
+        embed_utils.get_model().set_threads(int(os.environ.get("EMBEDDING_THREADS", "0")))
+
+def run_preforked(config: dict, workers: int) -> bool:
+    """Serve with gunicorn, loading models before forking; returns False if gunicorn is unavailable"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        return False
+
+    class PreforkApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{config['host']}:{config['port']}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("preload_app", True)
+            self.cfg.set("keepalive", config["timeout_keep_alive"])
+            self.cfg.set("timeout", 120)
+            self.cfg.set("post_fork", lambda server, worker: worker_threads())
+
+        def load(self):
+            from app.main import app, warmup
+            if os.environ.get("PRELOAD_MODELS", "true").lower() == "true":
+                print("⏳ Loading models before forking workers...")
+                saved = limit_master_threads()  # Read when torch is imported and the models are built
+                try:
+                    warmup.load_all()  # Inherited copy-on-write by every worker
+                finally:
+                    restore_threads(saved)  # Workers see the operator's values again
+            return app
+
+    print(f"👥 Starting {workers} workers (gunicorn, preloaded app)")
+    PreforkApplication().run()
+    return True
+
 def main():
     """Start the production server"""
     # Get port from environment (Render sets this)
     port = int(os.environ.get("PORT", 8000))
-    
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))  # Worker processes
+
     # Set environment variables for production
     os.environ["TOKENIZERS_PARALLELISM"] = "false"  # Avoid tokenizer warnings
-    
+
     print(f"🚀 Starting PaperMind AI server on port {port}")
     print(f"📍 Environment: {os.environ.get('ENVIRONMENT', 'development')}")
     print(f"🔧 Python version: {sys.version}")
-    
+
     # Configure uvicorn for production
     config = {
         "app": "app.main:app",
         "host": "0.0.0.0",
         "port": port,
-        "workers": 1,  # Single worker for free tier
+        "workers": workers,
         "timeout_keep_alive": 30,
     }
-    
+
     # Add production-specific settings
     if os.environ.get("ENVIRONMENT") == "production":
         config.update({
@@ -40,12 +119,23 @@ def main():
             "use_colors": False,
             "log_level": "info",
         })
-    else:
+    elif workers == 1:
         config.update({
             "reload": True,
             "log_level": "debug",
         })
-    
+
+    if workers > 1:
+        if os.environ.get("INFERENCE_MODE", "inprocess").lower() == "process":
+            # Every worker would start its own inference process with its own copy of the models
+            sys.exit("❌ INFERENCE_MODE=process cannot be combined with WEB_CONCURRENCY > 1: "
+                     "use one worker with the inference process, or in-process models with several workers")
+        configure_workers(workers)
+        if run_preforked(config, workers):
+            return
+        # uvicorn spawns fresh interpreters, so each worker loads its own copy of the models
+        print("⚠️ gunicorn not installed: each worker loads its own models")
+
     # Start the server
     uvicorn.run(**config)
 